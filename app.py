@@ -1,16 +1,33 @@
-import json
 import base64
+import json
 import logging
 import os
-from pathlib import Path
 
 import streamlit as st
-import typst
 from dotenv import load_dotenv
 
-from src.loader import get_resumes, load_resume
-from src.processor import Processor
-from src.providers import create_provider, DEFAULT_MODEL, DEFAULT_PROVIDER, PROVIDERS
+from src.json_stream import IncrementalJSONParser, extract_json
+from src.keywords import match_keywords, merge_missing
+from src.loader import get_resumes, load_resume, preload_prompts
+from src.near_duplicates import NearDuplicateIndex
+from src.processor import (
+    DEFAULT_INPUT_BUDGET,
+    AnalysisMode,
+    BatchItem,
+    Processor,
+    RescoreBase,
+)
+from src.providers import (
+    create_provider,
+    DEFAULT_MODEL,
+    DEFAULT_PROVIDER,
+    HedgedProvider,
+    PROVIDERS,
+    warm_up,
+)
+from src.result_cache import ResultCache
+from src.router import get_router
+from src.typst_compiler import TypstCompileError, compile_pages, compile_pdf
 
 logging.basicConfig(
     filename="data/logs/app.log",
@@ -20,6 +37,23 @@ logging.basicConfig(
 
 _app_logger = logging.getLogger(__name__)
 
+_JD_SEPARATOR = "---"
+_NO_BACKUP = "None"
+_SETTINGS_KEYS = (
+    "api_key",
+    "provider_name",
+    "model",
+    "backup_provider_name",
+    "backup_model",
+    "backup_api_key",
+    "resume_format",
+    "section_parallel",
+)
+_BATCH_DEPTHS: dict[str, AnalysisMode] = {
+    "Quick score": "score",
+    "Full analysis": "full",
+}
+
 st.set_page_config(
     page_title="AI Job Application Helper",
     page_icon="💼",
@@ -27,20 +61,6 @@ st.set_page_config(
 )
 
 
-def extract_json(text: str) -> dict:
-    """Extract JSON from an LLM response text."""
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        start, end = text.find("{"), text.rfind("}")
-        if start != -1 and end != -1:
-            try:
-                return json.loads(text[start : end + 1])
-            except json.JSONDecodeError:
-                pass
-    raise ValueError("Failed to extract valid JSON from the response.")
-
-
 def render_score(score: int | str) -> None:
     """Render a color-coded percentage score."""
     try:
@@ -75,23 +95,32 @@ def display_pdf(bstr: bytes):
     st.markdown(html, unsafe_allow_html=True)
 
 
+def display_pages(typst_str: str) -> None:
+    """Render each page as an image, unchanged pages keep their cached media URL."""
+    try:
+        pages = compile_pages(typst_str)
+    except TypstCompileError as e:
+        st.error(f"Typst Compilation Error: {e}")
+        return
+    for page in pages:
+        st.image(page, use_container_width=True)
+
+
 def compile_typst(typst_str: str) -> bytes | None:
     """Compile Typst source code to PDF bytes."""
-    tmp_path = Path("tmp_resume.typ")
-    tmp_path.write_text(typst_str, encoding="utf-8")
     try:
-        return typst.compile(str(tmp_path))
-    except Exception as e:
+        return compile_pdf(typst_str)
+    except TypstCompileError as e:
         st.error(f"Typst Compilation Error: {e}")
         return None
-    finally:
-        tmp_path.unlink(missing_ok=True)
 
 
 def reset_analysis() -> None:
     """Clear analysis results from session state."""
     keys = [
         "analyzed",
+        "batch_results",
+        "batch_report",
         "score",
         "new_score",
         "main_fixes",
@@ -100,22 +129,74 @@ def reset_analysis() -> None:
         "improvements",
         "updated_typst",
         "editor_textarea",
+        "rescore_base",
+        "reused_similarity",
     ]
     for key in keys:
         st.session_state.pop(key, None)
 
 
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache shared by all sessions."""
+    return ResultCache()
+
+
+@st.cache_resource
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """Process-wide index of analyzed job descriptions shared by all sessions."""
+    return NearDuplicateIndex()
+
+
 def run_analysis(
-    resume_content: str, job_desc: str, resume_filename: str | None = None
+    resume_content: str,
+    job_desc: str,
+    resume_filename: str | None = None,
+    fresh: bool = False,
 ):
     with st.spinner("Analyzing resume against job description..."):
         try:
-            result = Processor(build_provider(get_api_key())).analyze(
-                resume=resume_content,
-                job_desc=job_desc,
-                mode="full",
-                resume_filename=resume_filename,
-            )
+            processor = build_processor(fresh=fresh)
+            parser = IncrementalJSONParser()
+            score_slot, keywords_slot = st.empty(), st.empty()
+            # Verbatim matches are known before the model answers
+            keywords = match_keywords(resume_content, job_desc)
+            if keywords.missing:
+                keywords_slot.markdown(
+                    "**Missing Keywords:** "
+                    + " ".join(f"`{k}`" for k in keywords.missing)
+                )
+            if st.session_state.get("section_parallel", False):
+                # Sections are critiqued concurrently, there is no single stream
+                result = processor.analyze_sections(
+                    resume_content, job_desc, resume_filename=resume_filename
+                )
+            else:
+                stream = processor.analyze_stream(
+                    resume=resume_content,
+                    job_desc=job_desc,
+                    mode="full",
+                    resume_filename=resume_filename,
+                )
+                while True:
+                    try:
+                        chunk = next(stream)
+                    except StopIteration as stop:
+                        result = stop.value
+                        break
+                    for key, value in parser.feed(chunk):
+                        if key == "score":
+                            with score_slot.container():
+                                render_score(value)
+                        elif key == "missing_keywords" and value:
+                            merged = merge_missing(keywords.missing, value)
+                            keywords_slot.markdown(
+                                "**Missing Keywords:** "
+                                + " ".join(f"`{k}`" for k in merged)
+                            )
+            score_slot.empty()
+            keywords_slot.empty()
+            # The result holds the local missing terms next to the model's
             data = extract_json(result["content"])
 
             st.session_state.update(
@@ -128,6 +209,18 @@ def run_analysis(
                     "updated_typst": resume_content,
                     "editor_textarea": resume_content,
                     "resume_filename": resume_filename,
+                    "reused_similarity": result.get("near_duplicate"),
+                    # Rescores of edits only send what changed from here
+                    "rescore_base": RescoreBase(
+                        resume_content,
+                        job_desc,
+                        json.dumps(
+                            {
+                                "score": data.get("score", 0),
+                                "missing_keywords": data.get("missing_keywords", []),
+                            }
+                        ),
+                    ),
                 }
             )
         except Exception as e:
@@ -138,12 +231,13 @@ def run_analysis(
 def run_rescore(resume_content: str, job_desc: str):
     with st.spinner("Re-evaluating score..."):
         try:
-            result = Processor(build_provider(get_api_key())).analyze(
+            result, base = build_processor(mode="score").rescore(
                 resume=resume_content,
                 job_desc=job_desc,
-                mode="score",
+                base=st.session_state.get("rescore_base"),
                 resume_filename=st.session_state.get("resume_filename"),
             )
+            st.session_state.rescore_base = base
             data = extract_json(result["content"])
             st.session_state.new_score = int(data.get("score", 0))
             st.session_state.main_fixes = data.get("main_fixes", "")
@@ -152,9 +246,141 @@ def run_rescore(resume_content: str, job_desc: str):
             st.error(f"Scoring failed: {e}")
 
 
+def split_job_descriptions(text: str) -> list[str]:
+    """Split pasted job descriptions on lines containing only '---'."""
+    job_descs, current = [], []
+    for line in text.splitlines():
+        if line.strip() == _JD_SEPARATOR:
+            job_descs.append("\n".join(current).strip())
+            current = []
+        else:
+            current.append(line)
+    job_descs.append("\n".join(current).strip())
+    return [jd for jd in job_descs if jd]
+
+
+def batch_row(item: BatchItem) -> dict:
+    """Turn a batch result into a ranked-table row."""
+    title = next(
+        (line.strip() for line in item["job_desc"].splitlines() if line.strip()), ""
+    )
+    row = {
+        "Score": None,
+        "Job": title[:80],
+        "Summary": "",
+        "Status": "ok",
+        "#": item["index"] + 1,
+    }
+    if item["result"] is None:
+        row["Status"] = f"error: {item['error']}"
+        return row
+    try:
+        data = extract_json(item["result"]["content"])
+        row["Score"] = int(data.get("score", 0))
+    except (ValueError, TypeError) as e:
+        row["Status"] = f"error: {e}"
+        return row
+    if "near_duplicate" in item["result"]:
+        row["Status"] = f"reused ({item['result']['near_duplicate']:.0%} similar)"
+    summary = data.get("main_fixes") or data.get("missing_keywords") or ""
+    row["Summary"] = (
+        summary if isinstance(summary, str) else ", ".join(map(str, summary))
+    )
+    return row
+
+
+def rank_rows(rows: list[dict]) -> list[dict]:
+    """Sort rows by score, best first, failures last."""
+    return sorted(rows, key=lambda r: (r["Score"] is None, -(r["Score"] or 0), r["#"]))
+
+
+def run_batch(
+    resume_content: str,
+    job_descs: list[str],
+    mode: AnalysisMode,
+    max_workers: int,
+    resume_filename: str | None = None,
+    cascade_threshold: int | None = None,
+    pack: bool = False,
+):
+    """Rank job descriptions. With cascade_threshold, every job description is
+    first scored on a fast model and only those scoring at least the threshold
+    get the full analysis. With pack, scores are asked for several job
+    descriptions per call."""
+    processor = build_processor(mode=mode)
+    if pack and mode == "score":
+        items = processor.analyze_packed(
+            resume_content,
+            job_descs,
+            resume_filename=resume_filename,
+            max_workers=max_workers,
+        )
+    elif cascade_threshold is None:
+        items = processor.analyze_many(
+            resume_content,
+            job_descs,
+            mode=mode,
+            resume_filename=resume_filename,
+            max_workers=max_workers,
+        )
+    else:
+        screener = build_processor(mode="score")
+        items = processor.analyze_cascade(
+            resume_content,
+            job_descs,
+            screener,
+            threshold=cascade_threshold,
+            resume_filename=resume_filename,
+            max_workers=max_workers,
+        )
+    progress = st.progress(0.0, text=f"0/{len(job_descs)} analyzed")
+    table = st.empty()
+    rows = []
+    while True:
+        try:
+            item = next(items)
+        except StopIteration as stop:
+            st.session_state["batch_report"] = stop.value
+            break
+        rows = rank_rows([*rows, batch_row(item)])
+        table.dataframe(rows, use_container_width=True, hide_index=True)
+        progress.progress(
+            len(rows) / len(job_descs), text=f"{len(rows)}/{len(job_descs)} analyzed"
+        )
+    progress.empty()
+    table.empty()
+    st.session_state["batch_results"] = rows
+
+
+def display_batch_results():
+    """Render the ranked batch table."""
+    rows = st.session_state.get("batch_results", [])
+    st.markdown("### Ranked Job Descriptions")
+    failed = sum(1 for r in rows if r["Score"] is None)
+    st.caption(f"{len(rows)} job descriptions, {failed} failed")
+    report = st.session_state.get("batch_report")
+    if report:
+        st.caption(
+            f"Cascade: {report['escalated']}/{report['screened']} escalated to the full analysis, "
+            f"{report['full_calls_saved']} full calls and ~{report['tokens_saved']:,} tokens saved "
+            f"({report['tokens_used']:,} used vs ~{report['tokens_full_only']:,} without screening)"
+        )
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+
 def display_results(job_desc: str):
     """Render the main analysis results and editor."""
     st.markdown("---")
+    similarity = st.session_state.get("reused_similarity")
+    if similarity is not None:
+        col_notice, col_fresh = st.columns([4, 1])
+        col_notice.info(f"Reused the analysis of a {similarity:.0%} similar posting.")
+        col_fresh.button(
+            "Analyze fresh",
+            use_container_width=True,
+            on_click=st.session_state.update,
+            kwargs={"analyze_fresh": True},
+        )
     col_metrics, col_improv = st.columns([2, 3], gap="large")
 
     with col_metrics:
@@ -218,10 +444,23 @@ def display_results(job_desc: str):
                 run_rescore(edited_typst, job_desc)
 
     with col_preview:
-        st.markdown("**PDF Preview**")
+        col_title, col_mode = st.columns([1, 1])
+        with col_title:
+            st.markdown("**PDF Preview**")
+        with col_mode:
+            preview_mode = st.radio(
+                "Preview mode",
+                options=["Pages", "PDF"],
+                horizontal=True,
+                label_visibility="collapsed",
+                key="preview_mode",
+            )
         pdf_bytes = compile_typst(edited_typst)
         if pdf_bytes:
-            display_pdf(pdf_bytes)
+            if preview_mode == "Pages":
+                display_pages(edited_typst)
+            else:
+                display_pdf(pdf_bytes)
 
     st.markdown("---")
     col_score_bot, col_fixes_bot = st.columns(2, gap="medium")
@@ -299,26 +538,76 @@ def settings_dialog() -> None:
         placeholder="sk-...",
         value=st.session_state.get("api_key", ""),
     )
+    with st.expander("Failover"):
+        st.caption(
+            "Slow or failing calls are retried on this provider, the first answer wins."
+        )
+        backup_options = [_NO_BACKUP, *PROVIDERS]
+        backup_provider = st.selectbox(
+            "Backup provider",
+            options=backup_options,
+            index=backup_options.index(
+                st.session_state.get("backup_provider_name", _NO_BACKUP)
+            ),
+        )
+        backup_model = None
+        backup_key = ""
+        if backup_provider != _NO_BACKUP:
+            backup_models = PROVIDERS[backup_provider].models
+            backup_model = st.selectbox(
+                "Backup model",
+                options=backup_models,
+                index=backup_models.index(st.session_state["backup_model"])
+                if st.session_state.get("backup_model") in backup_models
+                else 0,
+            )
+            backup_key = st.text_input(
+                "Backup API Key",
+                type="password",
+                placeholder="Leave empty to use the configured secret",
+                value=st.session_state.get("backup_api_key", ""),
+            )
+    plain_text = st.checkbox(
+        "Send resume as plain text",
+        value=st.session_state.get("resume_format", "text") == "text",
+        help="Strips Typst settings, styling and markup before sending, fewer input tokens.",
+    )
+    section_parallel = st.checkbox(
+        "Analyze resume sections in parallel",
+        value=st.session_state.get("section_parallel", False),
+        help="Critiques each section in its own request, faster on long resumes. Results appear at once instead of streaming.",
+    )
     col_save, col_clear = st.columns(2)
     with col_save:
         if st.button("Save", type="primary", use_container_width=True):
             if key.strip():
+                st.session_state["resume_format"] = "text" if plain_text else "typst"
+                st.session_state["section_parallel"] = section_parallel
                 st.session_state["api_key"] = key.strip()
                 st.session_state["provider_name"] = provider_name
                 st.session_state["model"] = model
+                warm_up(provider_name, key.strip(), config.base_url)
+                if backup_model is None:
+                    for k in ("backup_provider_name", "backup_model", "backup_api_key"):
+                        st.session_state.pop(k, None)
+                else:
+                    st.session_state["backup_provider_name"] = backup_provider
+                    st.session_state["backup_model"] = backup_model
+                    st.session_state["backup_api_key"] = backup_key.strip()
                 st.rerun()
             else:
                 st.warning("Please enter a key.")
     with col_clear:
         if st.button("Clear", use_container_width=True):
-            for k in ("api_key", "provider_name", "model"):
+            for k in _SETTINGS_KEYS:
                 st.session_state.pop(k, None)
             st.rerun()
 
 
-def get_api_key() -> str | None:
+def get_api_key(backup: bool = False) -> str | None:
     """Resolve API key from secrets, env, or session state."""
-    provider_name = st.session_state.get("provider_name", DEFAULT_PROVIDER)
+    prefix = "backup_" if backup else ""
+    provider_name = st.session_state.get(f"{prefix}provider_name", DEFAULT_PROVIDER)
     secret_key = f"{provider_name.upper()}_API_KEY"
     try:
         return st.secrets[secret_key]
@@ -328,15 +617,46 @@ def get_api_key() -> str | None:
     key = os.getenv(secret_key)
     if key:
         return key
-    return st.session_state.get("api_key") or None
+    return st.session_state.get(f"{prefix}api_key") or None
 
 
-def build_provider(api_key: str | None):
+def build_provider(api_key: str | None, mode: AnalysisMode = "full"):
     if api_key is None:
         raise ValueError("No API key configured.")
     provider_name = st.session_state.get("provider_name", DEFAULT_PROVIDER)
-    model = st.session_state.get("model", DEFAULT_MODEL)
-    return create_provider(provider_name=provider_name, api_key=api_key, model=model)
+    model = get_router().route(
+        provider_name, st.session_state.get("model", DEFAULT_MODEL), mode
+    )
+    provider = create_provider(
+        provider_name=provider_name, api_key=api_key, model=model
+    )
+
+    backup_provider_name = st.session_state.get("backup_provider_name")
+    backup_model = st.session_state.get("backup_model")
+    if backup_provider_name is None or backup_model is None:
+        return provider
+    backup_key = get_api_key(backup=True)
+    if backup_key is None:
+        _app_logger.warning("No API key for the backup provider, failover disabled")
+        return provider
+    backup = create_provider(
+        provider_name=backup_provider_name,
+        api_key=backup_key,
+        model=backup_model,
+    )
+    return HedgedProvider(provider, backup)
+
+
+def build_processor(mode: AnalysisMode = "full", fresh: bool = False) -> Processor:
+    """fresh skips near-duplicate postings, the result is still cached."""
+    return Processor(
+        build_provider(get_api_key(), mode=mode),
+        cache=get_result_cache(),
+        near_duplicates=None if fresh else get_near_duplicate_index(),
+        resume_format=st.session_state.get("resume_format", "text"),
+        input_budget=DEFAULT_INPUT_BUDGET,
+        prompts=st.session_state.get("prompts"),
+    )
 
 
 def main():
@@ -345,6 +665,8 @@ def main():
 
     if "started" not in st.session_state:
         _app_logger.info("New session started")
+        # Read once per session, prompt edits show up in new sessions
+        st.session_state.prompts = preload_prompts()
         st.session_state.started = True
 
     if "analyzed" not in st.session_state:
@@ -399,29 +721,95 @@ def main():
             on_change=reset_analysis,
         )
 
-        job_desc = st.text_area(
-            "Job Description",
-            height=300,
-            placeholder="Paste the full job description here...",
-            help="The AI will compare your resume against these requirements.",
-            on_change=reset_analysis,
+        batch_mode = (
+            st.radio(
+                "Mode",
+                options=["Single JD", "Batch"],
+                horizontal=True,
+                help="Batch ranks one resume against many job descriptions.",
+            )
+            == "Batch"
         )
 
-        if st.button("Launch Analysis", use_container_width=True, type="primary"):
-            if not job_desc.strip():
-                st.sidebar.warning("Please paste a job description to proceed.")
-            else:
-                reset_analysis()
-                if selected_resume_name in uploaded_resumes:
-                    resume_content = uploaded_resumes[selected_resume_name]
+        if selected_resume_name in uploaded_resumes:
+            resume_content = uploaded_resumes[selected_resume_name]
+        else:
+            resume_content = load_resume(resumes_dict[selected_resume_name])
+
+        if batch_mode:
+            batch_text = st.text_area(
+                "Job Descriptions",
+                height=300,
+                placeholder=f"Paste job descriptions, separated by a line with {_JD_SEPARATOR}",
+                key="batch_text",
+            )
+            batch_depth = st.selectbox("Analysis", options=list(_BATCH_DEPTHS))
+            cascade_threshold = None
+            if _BATCH_DEPTHS[batch_depth] == "full" and st.checkbox(
+                "Screen with a fast model first",
+                help="Only job descriptions scoring at least the threshold get the full analysis.",
+            ):
+                cascade_threshold = st.slider("Escalation threshold", 0, 100, 70)
+            pack = _BATCH_DEPTHS[batch_depth] == "score" and st.checkbox(
+                "Score several job descriptions per call",
+                value=True,
+                help="Sends the resume once for up to 10 job descriptions, far fewer input tokens.",
+            )
+            max_workers = st.slider("Parallel requests", 1, 16, 4)
+            launch_batch = st.button(
+                "Rank Job Descriptions", use_container_width=True, type="primary"
+            )
+        else:
+            job_desc = st.text_area(
+                "Job Description",
+                height=300,
+                placeholder="Paste the full job description here...",
+                help="The AI will compare your resume against these requirements.",
+                on_change=reset_analysis,
+            )
+
+            if st.button("Launch Analysis", use_container_width=True, type="primary"):
+                if not job_desc.strip():
+                    st.sidebar.warning("Please paste a job description to proceed.")
                 else:
-                    resume_content = load_resume(resumes_dict[selected_resume_name])
-                if resume_content:
-                    run_analysis(
-                        resume_content, job_desc, resume_filename=selected_resume_name
-                    )
+                    reset_analysis()
+                    if resume_content:
+                        run_analysis(
+                            resume_content,
+                            job_desc,
+                            resume_filename=selected_resume_name,
+                        )
+            elif st.session_state.pop("analyze_fresh", False) and resume_content:
+                reset_analysis()
+                run_analysis(
+                    resume_content,
+                    job_desc,
+                    resume_filename=selected_resume_name,
+                    fresh=True,
+                )
 
-    if st.session_state.analyzed:
+    if batch_mode:
+        if launch_batch:
+            job_descs = split_job_descriptions(batch_text)
+            if not job_descs:
+                st.sidebar.warning("Please paste at least one job description.")
+            else:
+                run_batch(
+                    resume_content,
+                    job_descs,
+                    mode=_BATCH_DEPTHS[batch_depth],
+                    max_workers=max_workers,
+                    resume_filename=selected_resume_name,
+                    cascade_threshold=cascade_threshold,
+                    pack=pack,
+                )
+        if st.session_state.get("batch_results"):
+            display_batch_results()
+        else:
+            st.info(
+                f"👈 Paste job descriptions separated by `{_JD_SEPARATOR}` and click **Rank Job Descriptions**."
+            )
+    elif st.session_state.analyzed:
         display_results(job_desc)
     else:
         st.info(
@@ -0,0 +1,292 @@
+"""Score every resume in a directory against a file of job descriptions.
+
+Usage:
+    python -m src.cli --jobs jobs.jsonl --output results.jsonl [--resumes data/personal]
+
+Results are appended to the output file as each call completes. Re-running the
+same command skips (resume, job) pairs that already succeeded, so an interrupted
+run resumes where it stopped without paying for finished calls again.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TextIO
+
+from dotenv import load_dotenv
+
+from src.json_stream import extract_json
+from src.loader import get_resumes, load_resume, preload_prompts
+from src.near_duplicates import NearDuplicateIndex
+from src.processor import (
+    DEFAULT_INPUT_BUDGET,
+    AnalysisMode,
+    BatchItem,
+    Processor,
+    ResumeFormat,
+)
+from src.providers import DEFAULT_MODEL, DEFAULT_PROVIDER, PROVIDERS, create_provider
+from src.ranker import JobIndex
+from src.result_cache import ResultCache
+
+_OUTPUT_FIELDS = ["resume", "job_id", "score", "status", "error", "content"]
+_JOB_TEXT_FIELDS = ("job_desc", "text", "description")
+
+
+def job_id_for(text: str) -> str:
+    """Stable id for a job description without one, independent of file order."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def read_jobs(path: Path) -> list[tuple[str, str]]:
+    """Read (job_id, job_desc) pairs from a JSONL or CSV file.
+
+    Each record needs the text in a job_desc, text or description field; an id
+    field is optional.
+    """
+    with path.open(encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    for i, record in enumerate(records, start=1):
+        text = next((record[k] for k in _JOB_TEXT_FIELDS if record.get(k)), None)
+        if not text:
+            raise ValueError(f"Job record {i} in {path} has no job description text")
+        job_id = str(record.get("id") or job_id_for(text))
+        jobs.append((job_id, text))
+    return jobs
+
+
+def read_checkpoint(path: Path) -> set[tuple[str, str]]:
+    """(resume, job_id) pairs already scored successfully in an output file."""
+    if not path.exists():
+        return set()
+    with path.open(encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = []
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # partial last line from an interrupted run
+    return {(r["resume"], r["job_id"]) for r in rows if r.get("status") == "ok"}
+
+
+class ResultWriter:
+    """Append result rows to a JSONL or CSV file, flushing after each row."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        is_new = not path.exists() or path.stat().st_size == 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: TextIO = path.open("a", encoding="utf-8", newline="")
+        self._csv: csv.DictWriter | None = None
+        if path.suffix == ".csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=_OUTPUT_FIELDS)
+            if is_new:
+                self._csv.writeheader()
+        elif not is_new and not path.read_bytes().endswith(b"\n"):
+            # Terminate a line cut short by an interrupted run
+            self._file.write("\n")
+
+    def write(self, row: dict) -> None:
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def to_row(resume_name: str, job_id: str, item: BatchItem) -> dict:
+    row = {
+        "resume": resume_name,
+        "job_id": job_id,
+        "score": None,
+        "status": "ok",
+        "error": None,
+        "content": None,
+    }
+    if item["result"] is None:
+        row.update(status="error", error=item["error"])
+        return row
+    row["content"] = item["result"]["content"]
+    try:
+        row["score"] = int(extract_json(item["result"]["content"]).get("score", 0))
+    except (ValueError, TypeError) as e:
+        row.update(status="error", error=str(e))
+    return row
+
+
+def score_matrix(
+    processor: Processor,
+    resumes: dict[str, str],
+    jobs: list[tuple[str, str]],
+    mode: AnalysisMode,
+    done: set[tuple[str, str]],
+    max_workers: int,
+    index: JobIndex | None = None,
+    top_k: int | None = None,
+    pack: bool = False,
+) -> Iterator[dict]:
+    """Yield result rows for every (resume, job) pair not already in done.
+
+    With an index and top_k, only each resume's top_k jobs by local BM25 ranking
+    are sent. With pack, score mode asks for several jobs per call.
+    """
+    for resume_name, resume_path in sorted(resumes.items()):
+        resume = load_resume(resume_path)
+        shortlist = None
+        if index is not None and top_k is not None:
+            ranked = index.rank(resume, top_k, [job_id for job_id, _ in jobs])
+            shortlist = {job_id for job_id, _ in ranked}
+        pending = [
+            (job_id, text)
+            for job_id, text in jobs
+            if (resume_name, job_id) not in done
+            and (shortlist is None or job_id in shortlist)
+        ]
+        if not pending:
+            continue
+        job_descs = [text for _, text in pending]
+        if pack and mode == "score":
+            items = processor.analyze_packed(
+                resume, job_descs, resume_filename=resume_name, max_workers=max_workers
+            )
+        else:
+            items = processor.analyze_many(
+                resume,
+                job_descs,
+                mode=mode,
+                resume_filename=resume_name,
+                max_workers=max_workers,
+            )
+        for item in items:
+            yield to_row(resume_name, pending[item["index"]][0], item)
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Score resumes against job descriptions without the UI.",
+    )
+    parser.add_argument("--resumes", type=Path, default=Path("data/personal"))
+    parser.add_argument("--jobs", type=Path, required=True, help=".jsonl or .csv")
+    parser.add_argument("--output", type=Path, required=True, help=".jsonl or .csv")
+    parser.add_argument("--mode", choices=["score", "full"], default="score")
+    parser.add_argument("--provider", choices=list(PROVIDERS), default=DEFAULT_PROVIDER)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument(
+        "--resume-format",
+        choices=["text", "typst"],
+        default="text",
+        help="send resumes as plain text (fewer tokens) or Typst source",
+    )
+    parser.add_argument(
+        "--input-budget",
+        type=int,
+        default=DEFAULT_INPUT_BUDGET,
+        help="estimated input tokens per call, job descriptions are trimmed to fit",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        help="only send each resume's K best jobs by local BM25 ranking",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="score mode: send the resume once for several jobs per call",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s | %(message)s")
+
+    load_dotenv(".env")
+    api_key = os.getenv(f"{args.provider.upper()}_API_KEY")
+    if not api_key:
+        print(f"Missing {args.provider.upper()}_API_KEY", file=sys.stderr)
+        return 2
+    model = args.model or (
+        DEFAULT_MODEL
+        if args.provider == DEFAULT_PROVIDER
+        else PROVIDERS[args.provider].models[0]
+    )
+
+    resumes = get_resumes(args.resumes)
+    if not resumes:
+        print(f"No .typ resumes found in {args.resumes}", file=sys.stderr)
+        return 2
+    mode: AnalysisMode = "full" if args.mode == "full" else "score"
+    resume_format: ResumeFormat = "typst" if args.resume_format == "typst" else "text"
+    jobs = read_jobs(args.jobs)
+    done = read_checkpoint(args.output)
+    total = len(resumes) * len(jobs)
+    print(f"{total} pairs, {len(done)} already done", file=sys.stderr)
+
+    processor = Processor(
+        create_provider(args.provider, api_key, model),
+        cache=None if args.no_cache else ResultCache(),
+        near_duplicates=None if args.no_cache else NearDuplicateIndex(),
+        resume_format=resume_format,
+        input_budget=args.input_budget,
+        prompts=preload_prompts(),
+    )
+    index = None
+    if args.top_k is not None:
+        index = JobIndex.load()
+        if index.add(jobs):
+            index.save()
+        print(
+            f"Sending the {args.top_k} best of {len(jobs)} jobs per resume",
+            file=sys.stderr,
+        )
+    writer = ResultWriter(args.output)
+    failed = 0
+    try:
+        for n, row in enumerate(
+            score_matrix(
+                processor,
+                resumes,
+                jobs,
+                mode,
+                done,
+                args.workers,
+                index,
+                args.top_k,
+                args.pack,
+            ),
+            start=1,
+        ):
+            writer.write(row)
+            failed += row["status"] != "ok"
+            print(
+                f"[{n}] {row['resume']} x {row['job_id']}: {row['score']}",
+                file=sys.stderr,
+            )
+    finally:
+        writer.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import logging
+import re
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Headings of sections about the employer or the process rather than the role,
+# matched on the whole heading: "Benefits" is boilerplate, "Benefits Analyst" isn't
+_LOW_VALUE_TOPIC = (
+    r"(benefits?|perks|what we offer|why (join|work (with|for|at)) us|total rewards"
+    r"|compensation|salary( range)?|pay( range| transparency)?"
+    r"|equal (employment )?opportunit(y|ies)( employer)?|eeo|e-verify"
+    r"|diversity|inclusion|equity|dei|(reasonable )?accommodations?|disability"
+    r"|veterans?|about (us|the company)|who we are|(our )?(story|mission|values)"
+    r"|privacy|how to apply|application process|recruitment fraud"
+    r"|background checks?)"
+)
+_LOW_VALUE_RE = re.compile(
+    rf"^((our|the|company|additional) )?{_LOW_VALUE_TOPIC}"
+    rf"(\s*(,|&|and)\s*{_LOW_VALUE_TOPIC})*"
+    r"( (statement|notice|policy|information))?\s*[?!]?$",
+    re.IGNORECASE,
+)
+# A title-like line: short, no sentence punctuation, optional markdown or colon
+_HEADING_RE = re.compile(r"^\s*(#+\s*)?[A-Z][^.!?]{0,58}:?\s*$")
+_TRUNCATED = "\n[...]"
+
+
+def split_sections(text: str) -> list[str]:
+    """Split a job description at its heading lines, each heading starting a section."""
+    sections: list[list[str]] = [[]]
+    previous_blank = True
+    for line in text.splitlines():
+        if _HEADING_RE.match(line) and previous_blank and any(sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+        previous_blank = not line.strip() or bool(_HEADING_RE.match(line))
+    return ["\n".join(lines).strip() for lines in sections if any(lines)]
+
+
+def _title(section: str) -> str:
+    first_line = section.splitlines()[0].strip(" #:")
+    return first_line[:40]
+
+
+def _is_low_value(section: str) -> bool:
+    return bool(_LOW_VALUE_RE.match(_title(section)))
+
+
+def core_text(job_desc: str) -> str:
+    """The job description without its boilerplate sections. The first section,
+    which carries the job title, is always kept."""
+    sections = split_sections(job_desc)
+    return "\n\n".join(
+        section
+        for i, section in enumerate(sections)
+        if i == 0 or not _is_low_value(section)
+    )
+
+
+def trim_job_description(
+    job_desc: str, max_tokens: int, estimate: Callable[[str], int]
+) -> tuple[str, list[str]]:
+    """Fit a job description in max_tokens, as estimated by estimate.
+
+    Boilerplate sections (benefits, EEO statements, company blurbs...) go first,
+    from the end of the text, the first section excepted. If that isn't enough
+    the remaining text is cut.
+    Returns the trimmed text and the titles of what was removed.
+    """
+    if estimate(job_desc) <= max_tokens:
+        return job_desc, []
+
+    sections = split_sections(job_desc)
+    removed = []
+    for i in reversed(range(1, len(sections))):
+        if _is_low_value(sections[i]):
+            removed.append(_title(sections[i]))
+            del sections[i]
+            if estimate("\n\n".join(sections)) <= max_tokens:
+                break
+    trimmed = "\n\n".join(sections)
+
+    tokens = estimate(trimmed)
+    if tokens > max_tokens:
+        keep = len(trimmed) * max_tokens // tokens - len(_TRUNCATED)
+        cut = trimmed.rfind("\n", 0, keep)
+        trimmed = trimmed[: cut if cut > 0 else keep] + _TRUNCATED
+        removed.append("end of the text")
+    logger.info(f"Trimmed job description to {max_tokens} tokens: {removed}")
+    return trimmed, removed
@@ -0,0 +1,141 @@
+import json
+from typing import Any
+
+
+def extract_json(text: str) -> dict:
+    """Extract JSON from an LLM response text."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end != -1:
+            try:
+                return json.loads(text[start : end + 1])
+            except json.JSONDecodeError:
+                pass
+    raise ValueError("Failed to extract valid JSON from the response.")
+
+
+def extract_json_array(text: str) -> list:
+    """Extract a JSON array from an LLM response text."""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("["), text.rfind("]")
+        if start == -1 or end == -1:
+            raise ValueError("Failed to extract a JSON array from the response.")
+        try:
+            data = json.loads(text[start : end + 1])
+        except json.JSONDecodeError:
+            raise ValueError("Failed to extract a JSON array from the response.")
+    if not isinstance(data, list):
+        raise ValueError("Failed to extract a JSON array from the response.")
+    return data
+
+
+class IncrementalJSONParser:
+    """Parse a streamed JSON object, emitting each top-level key once its value closes.
+
+    Anything before the first "{" (markdown fences, chatter) is skipped. Each
+    character is scanned once, and the buffer only keeps the token in progress.
+    """
+
+    def __init__(self):
+        self.result: dict[str, Any] = {}
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        # key -> colon -> value -> in_value -> comma -> key ...
+        self._state = "key"
+        self._token_start = -1
+        self._key: str | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        """True once the closing brace of the top-level object was seen."""
+        return self._done
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Consume a chunk and return the (key, value) pairs completed by it."""
+        self._buf += chunk
+        buf = self._buf
+        i = self._pos
+        completed: list[tuple[str, Any]] = []
+        while i < len(buf) and not self._done:
+            c = buf[i]
+            if not self._started:
+                self._started = c == "{"
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._state == "key":
+                        self._key = json.loads(buf[self._token_start : i + 1])
+                        self._state = "colon"
+                    elif self._depth == 0:
+                        completed.append(self._emit(buf[self._token_start : i + 1]))
+            elif self._state == "in_value":
+                if self._depth > 0:
+                    if c == '"':
+                        self._in_string = True
+                    elif c in "{[":
+                        self._depth += 1
+                    elif c in "}]":
+                        self._depth -= 1
+                        if self._depth == 0:
+                            completed.append(self._emit(buf[self._token_start : i + 1]))
+                elif c == "," or c == "}" or c.isspace():
+                    # End of a bare number/literal, reprocess c as a delimiter
+                    completed.append(self._emit(buf[self._token_start : i]))
+                    continue
+            elif c.isspace():
+                pass
+            elif self._state == "key":
+                if c == '"':
+                    self._in_string = True
+                    self._token_start = i
+                elif c == "}":
+                    self._done = True
+            elif self._state == "colon":
+                if c == ":":
+                    self._state = "value"
+            elif self._state == "value":
+                self._token_start = i
+                self._state = "in_value"
+                if c == '"':
+                    self._in_string = True
+                elif c in "{[":
+                    self._depth = 1
+            elif self._state == "comma":
+                if c == ",":
+                    self._state = "key"
+                elif c == "}":
+                    self._done = True
+            i += 1
+
+        # Drop everything before the token in progress
+        keep_from = i
+        if self._in_string or self._state == "in_value":
+            keep_from = self._token_start
+        self._buf = buf[keep_from:]
+        self._pos = i - keep_from
+        self._token_start -= keep_from
+        return completed
+
+    def _emit(self, text: str) -> tuple[str, Any]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON value for key '{self._key}'.") from e
+        key = self._key or ""
+        self.result[key] = value
+        self._state = "comma"
+        self._key = None
+        return key, value
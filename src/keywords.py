@@ -0,0 +1,121 @@
+import re
+from collections import deque
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+from src.loader import load_keywords
+
+# Tech terms keep their inner punctuation: C++, C#, .NET, Node.js, P&L. Slashes and
+# hyphens split, "Python/Django" and "Kubernetes-based" mention Python and
+# Kubernetes; terms like CI/CD or scikit-learn then match as token sequences
+_TOKEN_RE = re.compile(r"(?<![a-z0-9])\.?[a-z0-9](?:[a-z0-9+#.&]*[a-z0-9+#])?")
+
+
+def tokenize(text: str) -> tuple[str, ...]:
+    """Lowercased word tokens of text, markup punctuation dropped."""
+    return tuple(_TOKEN_RE.findall(text.lower()))
+
+
+class KeywordIndex:
+    """Aho-Corasick automaton over word tokens.
+
+    Finds every occurrence of every term in one pass over the text, whatever the
+    number of terms. Terms only match on whole tokens.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+        for term in terms:
+            node = 0
+            for token in tokenize(term):
+                next_node = self._goto[node].get(token)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][token] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            if node and term not in self._out[node]:
+                self._out[node].append(term)
+
+        # Breadth-first, so each node's failure link target is already complete
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, tokens: Sequence[str]) -> list[tuple[int, str]]:
+        """(end token position, term) of every match, in text order."""
+        matches = []
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            matches.extend((i, term) for term in self._out[node])
+        return matches
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    # Vocabulary terms of the job description, most frequent first
+    present: tuple[str, ...]
+    missing: tuple[str, ...]
+
+    def to_prompt(self) -> str:
+        """Prompt block with the local results, empty when the JD has no known terms."""
+        if not self.present and not self.missing:
+            return ""
+        return (
+            "KEYWORD CHECK (verbatim matching already done, do not repeat it):\n"
+            f"Present: {', '.join(self.present) or 'none'}\n"
+            f"Missing: {', '.join(self.missing) or 'none'}"
+        )
+
+
+@lru_cache(maxsize=4)
+def _vocabulary_index(terms: tuple[str, ...]) -> KeywordIndex:
+    return KeywordIndex(terms)
+
+
+# The same resume is matched against many job descriptions
+_tokens = lru_cache(maxsize=64)(tokenize)
+
+
+def match_keywords(resume: str, job_desc: str) -> KeywordMatch:
+    """Split the job description's vocabulary terms into present and missing ones."""
+    vocabulary = _vocabulary_index(load_keywords())
+    counts: dict[str, int] = {}
+    first_seen: dict[str, int] = {}
+    for position, term in vocabulary.find(_tokens(job_desc)):
+        counts[term] = counts.get(term, 0) + 1
+        first_seen.setdefault(term, position)
+    terms = sorted(counts, key=lambda t: (-counts[t], first_seen[t]))
+
+    found = {term for _, term in KeywordIndex(terms).find(_tokens(resume))}
+    return KeywordMatch(
+        present=tuple(t for t in terms if t in found),
+        missing=tuple(t for t in terms if t not in found),
+    )
+
+
+def merge_missing(local: Sequence[str], model: Iterable[str]) -> list[str]:
+    """Local missing terms first, then the model's additions that aren't duplicates."""
+    merged = list(local)
+    seen = {tokenize(term) for term in local}
+    for term in model:
+        key = tokenize(str(term))
+        if key not in seen:
+            seen.add(key)
+            merged.append(str(term))
+    return merged
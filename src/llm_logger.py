@@ -1,43 +1,194 @@
 import atexit
 import logging
+import queue
 import sqlite3
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
-atexit.register(lambda: logger.info("App shutting down"))
 
 _DB_PATH = Path("data/logs/history.db")
 
+# Full llm_logs schema; columns missing from older databases are added on startup
+_COLUMNS: list[tuple[str, str]] = [
+    ("ts", "TEXT"),
+    ("feature", "TEXT"),
+    ("resume_filename", "TEXT"),
+    ("provider", "TEXT DEFAULT 'anthropic'"),
+    ("model", "TEXT"),
+    ("input_tokens", "INTEGER"),
+    ("output_tokens", "INTEGER"),
+    ("duration_ms", "INTEGER"),
+    ("status", "TEXT"),
+    ("error_message", "TEXT"),
+    ("cache_status", "TEXT"),
+    ("ttft_ms", "INTEGER"),
+    ("cache_creation_tokens", "INTEGER"),
+    ("cache_read_tokens", "INTEGER"),
+    ("queue_wait_ms", "INTEGER"),
+    ("estimated_input_tokens", "INTEGER"),
+    # Shared by the per-item rows of one packed call
+    ("batch_id", "TEXT"),
+]
 
-def _get_conn() -> sqlite3.Connection:
-    _DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(_DB_PATH)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS llm_logs (
-            id INTEGER PRIMARY KEY,
-            ts TEXT,
-            feature TEXT,
-            resume_filename TEXT,
-            provider TEXT,
-            model TEXT,
-            input_tokens INTEGER,
-            output_tokens INTEGER,
-            duration_ms INTEGER,
-            status TEXT,
-            error_message TEXT
-        )
-    """)
-    try:
-        conn.execute(
-            "ALTER TABLE llm_logs ADD COLUMN provider TEXT DEFAULT 'anthropic'"
-        )
-    except sqlite3.OperationalError:
-        pass  # column already exists
+_QUEUE_SIZE = 1000
+_BATCH_SIZE = 100
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    """Open the log database in WAL mode with an up-to-date schema."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    columns = ", ".join(f"{name} {decl}" for name, decl in _COLUMNS)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS llm_logs (id INTEGER PRIMARY KEY, {columns})"
+    )
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(llm_logs)")}
+    for name, decl in _COLUMNS:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE llm_logs ADD COLUMN {name} {decl}")
     conn.commit()
     return conn
 
 
+class _LogWriter:
+    """Background thread that drains a bounded queue into llm_logs in batches."""
+
+    _STOP = object()
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._conn = _connect(db_path)
+        self._queue: queue.Queue = queue.Queue(maxsize=_QUEUE_SIZE)
+        self._insert_sql = (
+            f"INSERT INTO llm_logs ({', '.join(name for name, _ in _COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in _COLUMNS)})"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="llm-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, row: tuple) -> None:
+        # Blocks when the queue is full, applying backpressure instead of dropping rows
+        self._queue.put(row)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = []
+            stop = item is self._STOP
+            if not stop:
+                batch.append(item)
+            while not stop and len(batch) < _BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                self._conn.close()
+                return
+
+    def _write(self, batch: list[tuple]) -> None:
+        try:
+            self._conn.executemany(self._insert_sql, batch)
+            self._conn.commit()
+        except sqlite3.Error:
+            logger.exception(f"Failed to write {len(batch)} LLM log rows")
+
+    def flush(self) -> None:
+        """Block until every queued row has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+
+_writer: _LogWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _LogWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.db_path != _DB_PATH:
+            if _writer is not None:
+                _writer.close()
+            _writer = _LogWriter(_DB_PATH)
+        return _writer
+
+
+def flush() -> None:
+    """Write out all pending log rows."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def shutdown() -> None:
+    """Flush pending rows, stop the writer thread and close the reader."""
+    global _writer, _reader
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+    with _reader_lock:
+        if _reader is not None:
+            _reader.close()
+            _reader = None
+
+
+_reader: sqlite3.Connection | None = None
+_reader_path: Path | None = None
+_reader_lock = threading.Lock()
+
+
+def read_calls_since(last_id: int, limit: int = 10_000) -> list[dict]:
+    """The latest provider calls logged after row id last_id, at most limit of
+    them, oldest first.
+
+    Cache hits and coalesced waits are left out, they say nothing about the
+    provider. Readers pass the last id they saw to only fetch new rows. When
+    more than limit rows are new, the oldest of them are skipped.
+    """
+    global _reader, _reader_path
+    if not _DB_PATH.exists():
+        return []
+    with _reader_lock:
+        if _reader is None or _reader_path != _DB_PATH:
+            if _reader is not None:
+                _reader.close()
+            _reader = _connect(_DB_PATH)
+            _reader.row_factory = sqlite3.Row
+            _reader_path = _DB_PATH
+        rows = _reader.execute(
+            "SELECT id, feature, provider, model, duration_ms, status, output_tokens, "
+            "batch_id FROM llm_logs WHERE id > ? "
+            "AND (cache_status IS NULL OR cache_status = 'miss') "
+            "ORDER BY id DESC LIMIT ?",
+            (last_id, limit),
+        ).fetchall()
+    return [dict(row) for row in reversed(rows)]
+
+
+def _on_exit() -> None:
+    logger.info("App shutting down")
+    shutdown()
+
+
+atexit.register(_on_exit)
+
+
 def log_llm_call(
     feature: str,
     model: str,
@@ -48,29 +199,34 @@ def log_llm_call(
     input_tokens: int | None = None,
     output_tokens: int | None = None,
     error_message: str | None = None,
+    cache_status: str | None = None,
+    ttft_ms: int | None = None,
+    cache_creation_tokens: int | None = None,
+    cache_read_tokens: int | None = None,
+    queue_wait_ms: int | None = None,
+    estimated_input_tokens: int | None = None,
+    batch_id: str | None = None,
 ) -> None:
-    conn = _get_conn()
-    conn.execute(
-        """
-        INSERT INTO llm_logs
-            (ts, feature, resume_filename, provider, model, input_tokens, output_tokens, duration_ms, status, error_message)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            datetime.now(timezone.utc).isoformat(),
-            feature,
-            resume_filename,
-            provider,
-            model,
-            input_tokens,
-            output_tokens,
-            duration_ms,
-            status,
-            error_message,
-        ),
-    )
-    conn.commit()
-    conn.close()
+    row = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "feature": feature,
+        "resume_filename": resume_filename,
+        "provider": provider,
+        "model": model,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "duration_ms": duration_ms,
+        "status": status,
+        "error_message": error_message,
+        "cache_status": cache_status,
+        "ttft_ms": ttft_ms,
+        "cache_creation_tokens": cache_creation_tokens,
+        "cache_read_tokens": cache_read_tokens,
+        "queue_wait_ms": queue_wait_ms,
+        "estimated_input_tokens": estimated_input_tokens,
+        "batch_id": batch_id,
+    }
+    _get_writer().put(tuple(row[name] for name, _ in _COLUMNS))
     logger.info(
         f"Logged LLM call: provider={provider} model={model} feature={feature} status={status} duration={duration_ms}ms"
     )
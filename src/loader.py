@@ -1,37 +1,130 @@
 import logging
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 
 logger = logging.getLogger(__name__)
 
+_PROMPT_DIR = Path("data") / "prompts"
+_RESUME_DIR = Path("data/personal")
+_KEYWORDS_PATH = Path("data") / "keywords.txt"
 
-def get_resumes() -> dict[str, str]:
+# Prompts only change during development, so stat them at most this often
+_PROMPT_REVALIDATE_S = 2.0
+
+
+@dataclass
+class _CachedFile:
+    signature: tuple[int, int]
+    content: str
+    checked_at: float
+
+
+_file_cache: dict[Path, _CachedFile] = {}
+_dir_cache: dict[Path, tuple[int, dict[str, str]]] = {}
+_lock = threading.Lock()
+
+
+def _signature(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_cached(path: Path, revalidate_after: float) -> str | None:
+    """Read a text file, reusing the cached content while mtime and size match."""
+    path = path.absolute()
+    now = time.monotonic()
+    with _lock:
+        entry = _file_cache.get(path)
+    if entry is not None and now - entry.checked_at < revalidate_after:
+        return entry.content
+
+    signature = _signature(path)
+    if signature is None:
+        with _lock:
+            _file_cache.pop(path, None)
+        return None
+    if entry is None or entry.signature != signature:
+        entry = _CachedFile(signature, path.read_text(encoding="utf-8"), now)
+    else:
+        entry.checked_at = now
+    with _lock:
+        _file_cache[path] = entry
+    return entry.content
+
+
+def get_resumes(resume_dir: Path = _RESUME_DIR) -> dict[str, str]:
     """Returns a mapping of resume names to their file paths."""
-    resume_dir = Path("data/personal")
-    if not resume_dir.exists():
+    try:
+        dir_mtime = resume_dir.stat().st_mtime_ns
+    except FileNotFoundError:
         return {}
 
+    # Adding, removing or renaming a file bumps the directory mtime
+    cache_key = resume_dir.absolute()
+    with _lock:
+        cached = _dir_cache.get(cache_key)
+    if cached is not None and cached[0] == dir_mtime:
+        return dict(cached[1])
+
     resumes = {}
     for f in resume_dir.glob("*.typ"):
         name = f.stem.replace("_", " ").replace("-", " ").title()
         resumes[name] = str(f)
-    return resumes
+    with _lock:
+        _dir_cache[cache_key] = (dir_mtime, resumes)
+    return dict(resumes)
 
 
 def load_resume(file_path: str) -> str:
     """Reads the content of a Typst resume file."""
-    path = Path(file_path)
-    if not path.exists():
+    content = _read_cached(Path(file_path), revalidate_after=0)
+    if content is None:
         logger.error(f"Resume file not found: {file_path}")
         raise FileNotFoundError(f"Resume file not found at {file_path}")
 
-    return path.read_text(encoding="utf-8")
+    return content
 
 
 def load_prompt(prompt_name: str) -> str:
     """Reads a prompt template from the data/prompts directory."""
-    path = Path("data") / "prompts" / f"{prompt_name}.txt"
-    if not path.exists():
+    content = _read_cached(
+        _PROMPT_DIR / f"{prompt_name}.txt", revalidate_after=_PROMPT_REVALIDATE_S
+    )
+    if content is None:
         logger.warning(f"Prompt file not found: {prompt_name}")
         return ""
 
-    return path.read_text(encoding="utf-8")
+    return content
+
+
+def load_keywords() -> tuple[str, ...]:
+    """Reads the keyword vocabulary, one term per line, '#' starts a comment."""
+    content = _read_cached(_KEYWORDS_PATH, revalidate_after=_PROMPT_REVALIDATE_S)
+    if content is None:
+        logger.warning(f"Keyword file not found: {_KEYWORDS_PATH}")
+        return ()
+
+    return tuple(
+        dict.fromkeys(
+            line.strip()
+            for line in content.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        )
+    )
+
+
+def preload_prompts() -> MappingProxyType[str, str]:
+    """Load every prompt file into the cache and return a read-only name -> text bundle."""
+    return MappingProxyType(
+        {
+            path.stem: load_prompt(path.stem)
+            for path in sorted(_PROMPT_DIR.glob("*.txt"))
+        }
+    )
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.job_description import core_text
+from src.keywords import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Next to llm_logs, the fingerprints describe the calls logged there
+_DB_PATH = Path("data/logs/history.db")
+
+_DEFAULT_THRESHOLD = 0.8
+_DEFAULT_MAX_ENTRIES = 2000
+_DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+_SHINGLE_SIZE = 3
+# Below this many shingles there is too little role-specific text to compare,
+# mostly-boilerplate postings would all look alike
+_MIN_SHINGLES = 8
+# 16 bands of 4 hashes: pairs above ~0.6 similarity share a bucket almost surely
+_BANDS = 16
+_ROWS = 4
+_NUM_HASHES = _BANDS * _ROWS
+_MERSENNE_PRIME = (1 << 61) - 1
+# Tracking links differ on every board
+_URL_RE = re.compile(r"\S+://\S+|www\.\S+")
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def _coefficients() -> list[tuple[int, int]]:
+    # Derived from fixed seeds, signatures must stay comparable across runs
+    return [
+        (
+            _hash64(f"a{i}".encode()) % (_MERSENNE_PRIME - 1) + 1,
+            _hash64(f"b{i}".encode()) % _MERSENNE_PRIME,
+        )
+        for i in range(_NUM_HASHES)
+    ]
+
+
+_COEFFICIENTS = _coefficients()
+
+
+def shingles(text: str) -> set[int]:
+    """Hashed word 3-grams of text without its boilerplate sections and links.
+
+    Shingles don't cross lines, so reordered bullets keep the same set.
+    """
+    hashes = set()
+    for line in _URL_RE.sub(" ", core_text(text)).splitlines():
+        tokens = tokenize(line)
+        if not tokens:
+            continue
+        # Lines shorter than a shingle count as one
+        for i in range(max(1, len(tokens) - _SHINGLE_SIZE + 1)):
+            hashes.add(_hash64(" ".join(tokens[i : i + _SHINGLE_SIZE]).encode()))
+    return hashes
+
+
+def minhash(text: str) -> list[int] | None:
+    """MinHash signature of text, comparable with similarity(). None when text has
+    too few shingles to tell it apart from other job descriptions."""
+    hashes = shingles(text)
+    if len(hashes) < _MIN_SHINGLES:
+        return None
+    return [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _COEFFICIENTS
+    ]
+
+
+def similarity(left: list[int], right: list[int]) -> float:
+    """Estimated Jaccard similarity of the shingles behind two signatures."""
+    return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+def _buckets(context_key: str, signature: list[int]) -> list[int]:
+    """LSH buckets of a signature, one per band, scoped to the context."""
+    buckets = []
+    for band in range(_BANDS):
+        rows = signature[band * _ROWS : (band + 1) * _ROWS]
+        data = f"{context_key}:{band}:{rows}".encode()
+        # Signed, SQLite integers are 64-bit signed
+        buckets.append(_hash64(data) - (1 << 63))
+    return buckets
+
+
+@dataclass(frozen=True)
+class NearDuplicate:
+    similarity: float
+    content: str
+    tokens: dict[str, int]
+
+
+class NearDuplicateIndex:
+    """MinHash fingerprints of analyzed job descriptions and their results.
+
+    Reposts of a role differ by footers, bullet order or the company blurb, and
+    still score above threshold against the original. Lookups go through LSH
+    buckets, only the few candidates sharing a bucket are compared. Results are
+    only shared within one context: the same resume, prompts, provider and model.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | None = None,
+        threshold: float = _DEFAULT_THRESHOLD,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = _DEFAULT_TTL_SECONDS,
+    ):
+        self.db_path = db_path or _DB_PATH
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jd_fingerprints (
+                    id INTEGER PRIMARY KEY,
+                    context_key TEXT,
+                    signature BLOB,
+                    content TEXT,
+                    tokens TEXT,
+                    created_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jd_buckets (
+                    bucket INTEGER,
+                    fingerprint_id INTEGER
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jd_buckets ON jd_buckets (bucket)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def find(self, context_key: str, job_desc: str) -> NearDuplicate | None:
+        """Most similar stored result above threshold, or None."""
+        signature = minhash(job_desc)
+        if signature is None:
+            return None
+        buckets = _buckets(context_key, signature)
+        with self._lock:
+            rows = (
+                self._get_conn()
+                .execute(
+                    f"""
+                    SELECT signature, content, tokens FROM jd_fingerprints
+                    WHERE context_key = ? AND created_at >= ? AND id IN (
+                        SELECT fingerprint_id FROM jd_buckets
+                        WHERE bucket IN ({", ".join("?" for _ in buckets)})
+                    )
+                    """,
+                    (context_key, time.time() - self.ttl_seconds, *buckets),
+                )
+                .fetchall()
+            )
+        best: NearDuplicate | None = None
+        for blob, content, tokens in rows:
+            score = similarity(signature, array("Q", blob).tolist())
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = NearDuplicate(score, content, json.loads(tokens))
+        return best
+
+    def add(
+        self, context_key: str, job_desc: str, content: str, tokens: dict[str, int]
+    ) -> None:
+        """Store a result, then evict expired and oldest entries. Job descriptions
+        too short to fingerprint are not stored."""
+        signature = minhash(job_desc)
+        if signature is None:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.execute(
+                """
+                INSERT INTO jd_fingerprints (context_key, signature, content, tokens, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    context_key,
+                    array("Q", signature).tobytes(),
+                    content,
+                    json.dumps(tokens),
+                    now,
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO jd_buckets (bucket, fingerprint_id) VALUES (?, ?)",
+                [
+                    (bucket, cursor.lastrowid)
+                    for bucket in _buckets(context_key, signature)
+                ],
+            )
+            conn.execute(
+                """
+                DELETE FROM jd_fingerprints WHERE created_at < ? OR id NOT IN (
+                    SELECT id FROM jd_fingerprints ORDER BY id DESC LIMIT ?
+                )
+                """,
+                (now - self.ttl_seconds, self.max_entries),
+            )
+            conn.execute(
+                """
+                DELETE FROM jd_buckets
+                WHERE fingerprint_id NOT IN (SELECT id FROM jd_fingerprints)
+                """
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("DELETE FROM jd_fingerprints")
+            conn.execute("DELETE FROM jd_buckets")
+            conn.commit()
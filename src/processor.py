@@ -1,34 +1,266 @@
+import asyncio
+import json
 import logging
 import time
-from typing import Literal, TypedDict
+import uuid
+import weakref
+from collections.abc import Generator, Iterator, Mapping, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Literal, NotRequired, TypedDict
 
-from src.loader import load_prompt
+from src.job_description import trim_job_description
+from src.json_stream import extract_json, extract_json_array
+from src.keywords import KeywordMatch, match_keywords, merge_missing
 from src.llm_logger import log_llm_call
-from src.providers.base import BaseProvider
+from src.loader import load_prompt
+from src.near_duplicates import NearDuplicateIndex
+from src.providers.base import BaseProvider, served_by
+from src.providers.rate_limit import RateLimiter, get_rate_limiter
+from src.providers.registry import PROVIDERS, ProviderConfig
+from src.providers.tokens import estimate_input_tokens
+from src.result_cache import ResultCache, cache_key
+from src.single_flight import SingleFlight
+from src.typst_sections import Change, changed_ratio, diff_sections, split_sections
+from src.typst_text import reduce_typst
 
 logger = logging.getLogger(__name__)
 
 AnalysisMode = Literal["full", "score"]
+# "text" sends the resume reduced to plain text instead of its Typst source
+ResumeFormat = Literal["typst", "text"]
+# Labels the resume in the message, the system prompts serve both formats
+_FORMAT_LABELS: dict[ResumeFormat, str] = {
+    "typst": "Typst source",
+    "text": "plain text",
+}
 
-_PROMPTS: dict[AnalysisMode, tuple[str, str]] = {
+# Requests of the section-parallel full analysis, see Processor.analyze_sections
+_SectionMode = Literal["overview", "section"]
+
+_PROMPTS: dict[AnalysisMode | _SectionMode, tuple[str, str]] = {
     "full": ("instruction_prompt", "template_prompt"),
     "score": ("score_instruction_prompt", "score_template_prompt"),
+    "overview": ("overview_instruction_prompt", "overview_template_prompt"),
+    "section": ("section_instruction_prompt", "section_template_prompt"),
 }
 
-_MAX_TOKENS: dict[AnalysisMode, int] = {
+_MAX_TOKENS: dict[AnalysisMode | _SectionMode, int] = {
     "full": 1500,
     "score": 400,
+    "overview": 400,
+    "section": 600,
 }
 
+_DEFAULT_MAX_CONCURRENCY = 8
+_DEFAULT_BATCH_WORKERS = 4
+_DEFAULT_ESCALATION_THRESHOLD = 70
+# Below this many headed sections, splitting the full analysis isn't worth it
+_MIN_SECTIONS = 2
+# Estimated input tokens per call in the app and CLI, resume and prompts included
+DEFAULT_INPUT_BUDGET = 8_000
+# Floor of the job description's share of the input budget, whatever the resume
+_MIN_JD_TOKENS = 256
+
+_DELTA_PROMPTS = ("delta_score_instruction_prompt", "delta_score_template_prompt")
+# Beyond this share of the resume edited, or this many delta rescores in a row,
+# rescores send the whole resume again
+_MAX_DELTA_RATIO = 0.5
+_MAX_DELTA_CHAIN = 3
+
+_PACKED_PROMPTS = ("packed_score_instruction_prompt", "packed_score_template_prompt")
+# Job descriptions per packed call at most, the model's attention to each one
+# degrades in larger packs
+_MAX_PACK_SIZE = 10
+
+# Process-wide, so identical calls from different sessions share one provider call
+_in_flight = SingleFlight()
+
 
 class AnalysisResult(TypedDict):
     content: str
     tokens: dict[str, int]
+    # Similarity of the earlier job description whose result was reused
+    near_duplicate: NotRequired[float]
+    # Served from the cache, a near-duplicate or an identical call in flight,
+    # the tokens were spent by an earlier call
+    reused: NotRequired[bool]
+
+
+class BatchItem(TypedDict):
+    index: int
+    job_desc: str
+    result: AnalysisResult | None
+    error: str | None
+
+
+class CascadeItem(BatchItem):
+    # Score of the screening pass, None when screening failed
+    screen_score: int | None
+    escalated: bool
+
+
+class CascadeReport(TypedDict):
+    screened: int
+    escalated: int
+    full_calls_saved: int
+    tokens_used: int
+    # Estimate for running the full analysis on every job description instead
+    tokens_full_only: int
+    tokens_saved: int
+
+
+def _total_tokens(result: AnalysisResult) -> int:
+    return result["tokens"]["input"] + result["tokens"]["output"]
+
+
+def _spent_tokens(result: AnalysisResult) -> int:
+    """Tokens this result cost, none when it was reused."""
+    return 0 if result.get("reused") else _total_tokens(result)
+
+
+def _reduced(source: str) -> str:
+    return reduce_typst(source).strip() if source else ""
+
+
+def _split_tokens(total: int, weights: Sequence[float]) -> list[int]:
+    """Split total in proportion to weights, the parts summing to total."""
+    scale = sum(weights) or 1
+    shares = [total * weight / scale for weight in weights]
+    parts = [int(share) for share in shares]
+    # Largest remainders get the units lost to rounding down
+    by_remainder = sorted(range(len(shares)), key=lambda i: parts[i] - shares[i])
+    for i in by_remainder[: total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+
+@contextmanager
+def _batch_pool(max_workers: int) -> Generator[ThreadPoolExecutor]:
+    """Thread pool of a batch generator. When the generator is closed early or its
+    consumer raises, queued calls are cancelled instead of still being paid for."""
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        yield pool
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+
+def _score_of(result: AnalysisResult | None) -> int | None:
+    if result is None:
+        return None
+    try:
+        return int(extract_json(result["content"]).get("score", 0))
+    except (ValueError, TypeError):
+        return None
+
+
+@dataclass(frozen=True)
+class RescoreBase:
+    """The last resume scored against a job description and its result, which
+    the next rescore only sends the changes from."""
+
+    resume: str
+    job_desc: str
+    content: str
+    # Delta rescores since the resume was last sent whole
+    deltas: int = 0
+
+
+@dataclass(frozen=True)
+class _Request:
+    # "delta" for rescores sending the changes since a RescoreBase
+    mode: AnalysisMode | _SectionMode | Literal["delta"]
+    system: str
+    # Stable, cacheable part of the user message, sent ahead of user
+    user_prefix: str
+    user: str
+    max_tokens: int
+    resume_filename: str | None
+    # Identifies identical requests, for the result cache and in-flight coalescing
+    key: str
+    # Same as key without the job description, near-duplicates are matched within it
+    context_key: str
+    job_desc: str
+    # Pre-flight input estimate, logged next to the actual count for calibration
+    estimated_tokens: int
+    # Missing terms found locally, the model is only asked for the rest
+    missing_keywords: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class _PackItem:
+    index: int
+    # The single score request, whose cache key the result is stored under
+    request: _Request
+    # Estimate of the item's own part of the packed message
+    estimated_tokens: int
+
+
+@dataclass(frozen=True)
+class _Pack:
+    """Score requests of several job descriptions against one resume, as one call."""
+
+    system: str
+    user_prefix: str
+    user: str
+    max_tokens: int
+    estimated_tokens: int
+    # Shared estimate of the system prompt and resume
+    shared_tokens: int
+    # Groups the per-item llm_logs rows of the call
+    batch_id: str
+    items: tuple[_PackItem, ...]
+
+
+@dataclass
+class _CallStats:
+    """Timings of one provider call, filled in as it progresses."""
+
+    queue_wait_ms: int = 0
+    ttft_ms: int | None = None
+    start: float = field(default_factory=time.monotonic)
+
+    def started(self, queue_wait_s: float) -> None:
+        """Record the rate limit wait and restart the clock for the call itself."""
+        self.queue_wait_ms = int(queue_wait_s * 1000)
+        self.start = time.monotonic()
+        served_by.set(None)
 
 
 class Processor:
-    def __init__(self, provider: BaseProvider):
+    def __init__(
+        self,
+        provider: BaseProvider,
+        cache: ResultCache | None = None,
+        max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+        rate_limiter: RateLimiter | None = None,
+        resume_format: ResumeFormat = "typst",
+        input_budget: int | None = None,
+        near_duplicates: NearDuplicateIndex | None = None,
+        prompts: Mapping[str, str] | None = None,
+    ):
         self.provider = provider
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.resume_format = resume_format
+        # Estimated input tokens per call, job descriptions are trimmed to fit
+        self.input_budget = input_budget
+        # Reuses results of reposted job descriptions, see NearDuplicateIndex
+        self.near_duplicates = near_duplicates
+        # Preloaded name -> text bundle, see preload_prompts. Prompts missing from
+        # it, or all of them without a bundle, are read through load_prompt
+        self.prompts = prompts
+        # Shared with every other Processor of the same provider by default
+        self.rate_limiter = rate_limiter or get_rate_limiter(provider.provider_name)
+        # One semaphore per event loop, asyncio primitives can't cross loops
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
 
     def analyze(
         self,
@@ -38,46 +270,843 @@ class Processor:
         resume_filename: str | None = None,
     ) -> AnalysisResult:
         """Analyze a resume against a job description. mode='full' for full analysis, 'score' for score + quick fixes."""
-        sys_prompt_name, tpl_prompt_name = _PROMPTS[mode]
-        sys_prompt = load_prompt(sys_prompt_name)
-        tpl_prompt = load_prompt(tpl_prompt_name)
+        return self._analyze(self._prepare(resume, job_desc, mode, resume_filename))
 
-        if not sys_prompt or not tpl_prompt:
-            raise ValueError(f"Missing prompt files for mode '{mode}'.")
+    def rescore(
+        self,
+        resume: str,
+        job_desc: str,
+        base: RescoreBase | None = None,
+        resume_filename: str | None = None,
+    ) -> tuple[AnalysisResult, RescoreBase]:
+        """Score an edited resume, sending only the entries changed since base.
+
+        The whole resume is scored instead without a base for this job
+        description, when the changes cover too much of the resume, or after a
+        few delta rescores in a row. Returns the result and the base for the
+        next rescore.
+        """
+        if (
+            base is not None
+            and base.job_desc == job_desc
+            and base.deltas < _MAX_DELTA_CHAIN
+        ):
+            changes = diff_sections(base.resume, resume)
+            if not changes:
+                return {
+                    "content": base.content,
+                    "tokens": {"input": 0, "output": 0},
+                }, base
+            ratio = changed_ratio(changes, base.resume, resume)
+            if ratio <= _MAX_DELTA_RATIO:
+                request = self._prepare_delta(
+                    resume, job_desc, base, changes, resume_filename
+                )
+                result = self._analyze(request)
+                return result, replace(
+                    base,
+                    resume=resume,
+                    content=result["content"],
+                    deltas=base.deltas + 1,
+                )
+            logger.info(f"Resume {ratio:.0%} changed, rescoring it whole")
+        result = self.analyze(resume, job_desc, "score", resume_filename)
+        return result, RescoreBase(resume, job_desc, result["content"])
+
+    def _analyze(self, request: _Request) -> AnalysisResult:
+        cached = self._from_cache(request)
+        if cached is not None:
+            return cached
+
+        flight, leader = _in_flight.claim(request.key)
+        if not leader:
+            return self._join(request, flight)
+        with _in_flight.lead(request.key, flight):
+            result = self._call(request)
+            flight.set_result(result)
+        return result
 
-        user_content = f"{tpl_prompt}\n\nRESUME:\n{resume}\n\nJD:\n{job_desc}"
+    async def aanalyze(
+        self,
+        resume: str,
+        job_desc: str,
+        mode: AnalysisMode = "full",
+        resume_filename: str | None = None,
+    ) -> AnalysisResult:
+        """Async variant of analyze, at most max_concurrency calls in flight per loop."""
+        request = self._prepare(resume, job_desc, mode, resume_filename)
+        cached = self._from_cache(request)
+        if cached is not None:
+            return cached
 
+        flight, leader = _in_flight.claim(request.key)
+        if not leader:
+            return await self._ajoin(request, flight)
+        with _in_flight.lead(request.key, flight):
+            result = await self._acall(request)
+            flight.set_result(result)
+        return result
+
+    def analyze_stream(
+        self,
+        resume: str,
+        job_desc: str,
+        mode: AnalysisMode = "full",
+        resume_filename: str | None = None,
+    ) -> Generator[str, None, AnalysisResult]:
+        """Stream the analysis as text chunks, returning the full result at the end."""
+        request = self._prepare(resume, job_desc, mode, resume_filename)
+        cached = self._from_cache(request)
+        if cached is not None:
+            yield cached["content"]
+            return cached
+
+        flight, leader = _in_flight.claim(request.key)
+        if not leader:
+            # The identical call already streams elsewhere, wait for its full text
+            result = self._join(request, flight)
+            yield result["content"]
+            return result
+        with _in_flight.lead(request.key, flight):
+            result = yield from self._stream(request)
+            flight.set_result(result)
+        return result
+
+    def analyze_sections(
+        self,
+        resume: str,
+        job_desc: str,
+        resume_filename: str | None = None,
+    ) -> AnalysisResult:
+        """Full analysis with each headed section of the resume critiqued concurrently.
+
+        An overview request scores the whole resume while one request per section
+        suggests its improvements, so latency is that of the slowest request
+        instead of one long completion. Unchanged sections come from the result
+        cache. A failed section only loses its improvements. Resumes with fewer
+        than two headed sections get the regular full analysis.
+        """
+        sections = [section for section in split_sections(resume) if section.title]
+        if len(sections) < _MIN_SECTIONS:
+            return self.analyze(resume, job_desc, "full", resume_filename)
+
+        overview = self._prepare(resume, job_desc, "overview", resume_filename)
+        critiques = [
+            self._prepare(section.source, job_desc, "section", resume_filename)
+            for section in sections
+        ]
+        workers = min(len(critiques) + 1, self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            overview_future = pool.submit(self._analyze, overview)
+            critique_futures = [pool.submit(self._analyze, r) for r in critiques]
+            result = overview_future.result()
+            data = extract_json(result["content"])
+            tokens = dict(result["tokens"])
+            improvements = []
+            for section, future in zip(sections, critique_futures):
+                try:
+                    critique = future.result()
+                    improvements.extend(
+                        extract_json(critique["content"]).get("improvements", [])
+                    )
+                except Exception as e:
+                    logger.warning(f"Critique of section '{section.title}' failed: {e}")
+                    continue
+                for name, count in critique["tokens"].items():
+                    tokens[name] = tokens.get(name, 0) + count
+
+        data["improvements"] = improvements
+        return {"content": json.dumps(data, ensure_ascii=False), "tokens": tokens}
+
+    def analyze_many(
+        self,
+        resume: str,
+        job_descs: list[str],
+        mode: AnalysisMode = "full",
+        resume_filename: str | None = None,
+        max_workers: int = _DEFAULT_BATCH_WORKERS,
+    ) -> Generator[BatchItem]:
+        """Analyze one resume against many job descriptions concurrently.
+
+        Yields one item per job description in completion order. A failed call
+        is reported in its item's error instead of aborting the batch.
+        """
+        with _batch_pool(max_workers) as pool:
+            futures = {
+                pool.submit(self.analyze, resume, job_desc, mode, resume_filename): i
+                for i, job_desc in enumerate(job_descs)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    yield {
+                        "index": i,
+                        "job_desc": job_descs[i],
+                        "result": future.result(),
+                        "error": None,
+                    }
+                except Exception as e:
+                    yield {
+                        "index": i,
+                        "job_desc": job_descs[i],
+                        "result": None,
+                        "error": str(e),
+                    }
+
+    def analyze_cascade(
+        self,
+        resume: str,
+        job_descs: list[str],
+        screener: "Processor",
+        threshold: int = _DEFAULT_ESCALATION_THRESHOLD,
+        resume_filename: str | None = None,
+        max_workers: int = _DEFAULT_BATCH_WORKERS,
+    ) -> Generator[CascadeItem, None, CascadeReport]:
+        """Screen job descriptions in score mode with screener, typically on a cheap
+        model, and run the full analysis only on those scoring at least threshold.
+
+        Yields one item per job description, with the full result when escalated
+        and the screening result otherwise, and returns what the cascade saved.
+        """
+        tokens_used = 0
+        full_tokens = []
+        skipped_estimates = []
+        with _batch_pool(max_workers) as pool:
+            escalations: dict[Future, tuple[BatchItem, int]] = {}
+            screenings = screener.analyze_many(
+                resume, job_descs, "score", resume_filename, max_workers
+            )
+            # Closed with the cascade, its queued screenings are cancelled too
+            with closing(screenings):
+                for item in screenings:
+                    if item["result"] is not None:
+                        tokens_used += _spent_tokens(item["result"])
+                    score = _score_of(item["result"])
+                    if score is not None and score >= threshold:
+                        future = pool.submit(
+                            self.analyze,
+                            resume,
+                            item["job_desc"],
+                            "full",
+                            resume_filename,
+                        )
+                        escalations[future] = (item, score)
+                        continue
+                    if score is not None:
+                        # Only a successful screening below threshold saves a call
+                        request = self._prepare(resume, item["job_desc"], "full", None)
+                        skipped_estimates.append(request.estimated_tokens)
+                    yield {**item, "screen_score": score, "escalated": False}
+
+            for future in as_completed(escalations):
+                item, score = escalations[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield {
+                        **item,
+                        "result": None,
+                        "error": str(e),
+                        "screen_score": score,
+                        "escalated": True,
+                    }
+                    continue
+                if not result.get("reused"):
+                    tokens_used += _total_tokens(result)
+                    full_tokens.append(_total_tokens(result))
+                yield {
+                    **item,
+                    "result": result,
+                    "error": None,
+                    "screen_score": score,
+                    "escalated": True,
+                }
+
+        # Skipped full calls cost what the escalated ones did, or input plus the
+        # whole output budget when nothing was escalated
+        if full_tokens:
+            skipped = len(skipped_estimates) * sum(full_tokens) // len(full_tokens)
+        else:
+            skipped = (
+                sum(skipped_estimates) + len(skipped_estimates) * _MAX_TOKENS["full"]
+            )
+        tokens_full_only = sum(full_tokens) + skipped
+        report: CascadeReport = {
+            "screened": len(job_descs),
+            "escalated": len(escalations),
+            "full_calls_saved": len(skipped_estimates),
+            "tokens_used": tokens_used,
+            "tokens_full_only": tokens_full_only,
+            "tokens_saved": tokens_full_only - tokens_used,
+        }
+        logger.info(f"Cascade finished: {report}")
+        return report
+
+    def analyze_packed(
+        self,
+        resume: str,
+        job_descs: list[str],
+        resume_filename: str | None = None,
+        max_workers: int = _DEFAULT_BATCH_WORKERS,
+    ) -> Iterator[BatchItem]:
+        """Score one resume against many job descriptions, several per call.
+
+        The system prompt and the resume are sent once per pack instead of once
+        per job description. Packs are as large as the model's context window,
+        output cap and tokens per minute allow. Yields one score item per job
+        description in completion order, like analyze_many, each with its share
+        of the call's tokens. Jobs missing from an answer are scored on their own.
+        """
+        pending = []
+        for i, job_desc in enumerate(job_descs):
+            request = self._prepare(resume, job_desc, "score", resume_filename)
+            cached = self._from_cache(request)
+            if cached is None:
+                pending.append((i, request))
+            else:
+                yield {
+                    "index": i,
+                    "job_desc": job_desc,
+                    "result": cached,
+                    "error": None,
+                }
+
+        with _batch_pool(max_workers) as pool:
+            futures = {
+                pool.submit(self._call_pack, pack): pack
+                for pack in self._packs(resume, pending)
+            }
+            for future in as_completed(futures):
+                try:
+                    answered = future.result()
+                except Exception as e:
+                    for item in futures[future].items:
+                        yield {
+                            "index": item.index,
+                            "job_desc": job_descs[item.index],
+                            "result": None,
+                            "error": str(e),
+                        }
+                    continue
+                for item in futures[future].items:
+                    result = answered.get(item.index)
+                    if result is not None:
+                        yield {
+                            "index": item.index,
+                            "job_desc": job_descs[item.index],
+                            "result": result,
+                            "error": None,
+                        }
+                        continue
+                    try:
+                        result = self.analyze(
+                            resume, job_descs[item.index], "score", resume_filename
+                        )
+                    except Exception as e:
+                        yield {
+                            "index": item.index,
+                            "job_desc": job_descs[item.index],
+                            "result": None,
+                            "error": str(e),
+                        }
+                        continue
+                    yield {
+                        "index": item.index,
+                        "job_desc": job_descs[item.index],
+                        "result": result,
+                        "error": None,
+                    }
+
+    def _packs(self, resume: str, pending: list[tuple[int, _Request]]) -> list[_Pack]:
+        """Group score requests into packs that fit the model's limits."""
+        if not pending:
+            return []
+        system, tpl_prompt = (self._prompt(name) for name in _PACKED_PROMPTS)
+        if not system or not tpl_prompt:
+            raise ValueError("Missing prompt files for packed scoring.")
+        if self.resume_format == "text":
+            resume = reduce_typst(resume)
+        label = _FORMAT_LABELS[self.resume_format]
+        user_prefix = f"{tpl_prompt}\n\nRESUME ({label}):\n{resume}\n\n"
+
+        config = PROVIDERS.get(self.provider.provider_name) or ProviderConfig(
+            base_url=None, models=[]
+        )
+        item_output = _MAX_TOKENS["score"]
+        max_items = max(1, min(_MAX_PACK_SIZE, config.max_output_tokens // item_output))
+        input_cap = config.context_window - max_items * item_output
+        if config.tpm is not None:
+            input_cap = min(input_cap, config.tpm)
+
+        estimate = partial(estimate_input_tokens, self.provider.provider_name)
+        shared_tokens = estimate(system, user_prefix)
+        groups: list[list[_PackItem]] = [[]]
+        tokens = shared_tokens
+        for i, request in pending:
+            item = _PackItem(i, request, estimate(request.user))
+            if groups[-1] and (
+                len(groups[-1]) == max_items
+                or tokens + item.estimated_tokens > input_cap
+            ):
+                groups.append([])
+                tokens = shared_tokens
+            groups[-1].append(item)
+            tokens += item.estimated_tokens
+
+        packs = []
+        for group in groups:
+            user = "\n\n".join(
+                f"JOB {n}\n{item.request.user}" for n, item in enumerate(group, 1)
+            )
+            packs.append(
+                _Pack(
+                    system=system,
+                    user_prefix=user_prefix,
+                    user=user,
+                    max_tokens=item_output * len(group),
+                    estimated_tokens=estimate(system, user_prefix, user),
+                    shared_tokens=shared_tokens,
+                    batch_id=uuid.uuid4().hex,
+                    items=tuple(group),
+                )
+            )
         logger.info(
-            f"Starting LLM call: provider={self.provider.provider_name} model={self.provider.model} mode={mode} resume={resume_filename}"
+            f"Packed {len(pending)} job descriptions into {len(packs)} calls: max {max_items} per call"
         )
-        start = time.monotonic()
+        return packs
+
+    def _call_pack(self, pack: _Pack) -> dict[int, AnalysisResult]:
+        """Send a pack, log and store one result per job description answered.
+
+        Returns the results by job description index, without those the model
+        left out.
+        """
+        logger.info(
+            f"Starting packed LLM call: provider={self.provider.provider_name} model={self.provider.model} jobs={len(pack.items)} batch={pack.batch_id}"
+        )
+        stats = _CallStats()
+        stats.started(self.rate_limiter.acquire(pack.estimated_tokens))
         try:
             text, tokens = self.provider.complete(
-                sys_prompt, user_content, _MAX_TOKENS[mode]
+                pack.system, pack.user, pack.max_tokens, user_prefix=pack.user_prefix
             )
-            duration_ms = int((time.monotonic() - start) * 1000)
-            log_llm_call(
-                feature=mode,
-                model=self.provider.model,
-                duration_ms=duration_ms,
-                status="success",
-                provider=self.provider.provider_name,
-                resume_filename=resume_filename,
-                input_tokens=tokens["input"],
-                output_tokens=tokens["output"],
+        except Exception as e:
+            for item in pack.items:
+                self._log_pack_item(pack, item, stats, {}, error=str(e))
+            logger.error(f"Packed LLM call failed: {e}", exc_info=True)
+            raise
+
+        answers: dict[int, str] = {}
+        try:
+            for answer in extract_json_array(text):
+                if isinstance(answer, dict) and isinstance(answer.get("job"), int):
+                    number = answer.pop("job")
+                    answers[number] = json.dumps(answer, ensure_ascii=False)
+        except ValueError as e:
+            logger.warning(f"Unparsable packed response, batch={pack.batch_id}: {e}")
+
+        # The shared prompt and resume are split evenly, each job pays for its own
+        # text, and output is split by the length of each answer
+        contents = [answers.get(n) for n in range(1, len(pack.items) + 1)]
+        input_weights = [
+            pack.shared_tokens / len(pack.items) + item.estimated_tokens
+            for item in pack.items
+        ]
+        output_weights = [len(content or "") for content in contents]
+        shares: list[dict[str, int]] = [{} for _ in pack.items]
+        for name, total in tokens.items():
+            weights = output_weights if name == "output" else input_weights
+            for share, part in zip(shares, _split_tokens(total, weights)):
+                share[name] = part
+
+        results: dict[int, AnalysisResult] = {}
+        for item, content, share in zip(pack.items, contents, shares):
+            if content is None:
+                self._log_pack_item(
+                    pack, item, stats, share, error="Missing from the packed response"
+                )
+                continue
+            self._log_pack_item(pack, item, stats, share)
+            content = self._with_local_keywords(item.request, content)
+            self._store(item.request, content, share)
+            results[item.index] = {"content": content, "tokens": share}
+        return results
+
+    def _call(self, request: _Request) -> AnalysisResult:
+        self._log_start(request)
+        stats = _CallStats()
+        stats.started(self.rate_limiter.acquire(request.estimated_tokens))
+        try:
+            text, tokens = self.provider.complete(
+                request.system,
+                request.user,
+                request.max_tokens,
+                user_prefix=request.user_prefix,
             )
         except Exception as e:
-            duration_ms = int((time.monotonic() - start) * 1000)
-            log_llm_call(
-                feature=mode,
-                model=self.provider.model,
-                duration_ms=duration_ms,
-                status="error",
-                provider=self.provider.provider_name,
-                resume_filename=resume_filename,
-                error_message=str(e),
+            self._log_error(request, stats, e)
+            raise
+        return self._finish(request, stats, text, tokens)
+
+    async def _acall(self, request: _Request) -> AnalysisResult:
+        async with self._semaphore():
+            self._log_start(request)
+            stats = _CallStats()
+            stats.started(await self.rate_limiter.aacquire(request.estimated_tokens))
+            try:
+                text, tokens = await self.provider.acomplete(
+                    request.system,
+                    request.user,
+                    request.max_tokens,
+                    user_prefix=request.user_prefix,
+                )
+            except Exception as e:
+                self._log_error(request, stats, e)
+                raise
+        return self._finish(request, stats, text, tokens)
+
+    def _stream(self, request: _Request) -> Generator[str, None, AnalysisResult]:
+        self._log_start(request)
+        stats = _CallStats()
+        stats.started(self.rate_limiter.acquire(request.estimated_tokens))
+        chunks = []
+        try:
+            stream = self.provider.stream(
+                request.system,
+                request.user,
+                request.max_tokens,
+                user_prefix=request.user_prefix,
             )
-            logger.error(f"LLM call failed: {e}", exc_info=True)
+            while True:
+                try:
+                    chunk = next(stream)
+                except StopIteration as stop:
+                    tokens = stop.value
+                    break
+                if stats.ttft_ms is None:
+                    stats.ttft_ms = int((time.monotonic() - stats.start) * 1000)
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self._log_error(request, stats, e)
+            raise
+        return self._finish(request, stats, "".join(chunks), tokens)
+
+    def _join(self, request: _Request, flight: Future) -> AnalysisResult:
+        """Wait for the identical call already in flight and share its result."""
+        start = time.monotonic()
+        try:
+            result = flight.result()
+        except Exception as e:
+            self._log_coalesced(request, start, error=e)
+            raise
+        self._log_coalesced(request, start)
+        return {**result, "reused": True}
+
+    async def _ajoin(self, request: _Request, flight: Future) -> AnalysisResult:
+        start = time.monotonic()
+        try:
+            result = await asyncio.wrap_future(flight)
+        except Exception as e:
+            self._log_coalesced(request, start, error=e)
             raise
+        self._log_coalesced(request, start)
+        return {**result, "reused": True}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _prompt(self, name: str) -> str:
+        if self.prompts is not None and name in self.prompts:
+            return self.prompts[name]
+        return load_prompt(name)
+
+    def _prepare(
+        self,
+        resume: str,
+        job_desc: str,
+        mode: AnalysisMode | _SectionMode,
+        resume_filename: str | None,
+    ) -> _Request:
+        sys_prompt_name, tpl_prompt_name = _PROMPTS[mode]
+        sys_prompt = self._prompt(sys_prompt_name)
+        tpl_prompt = self._prompt(tpl_prompt_name)
+
+        if not sys_prompt or not tpl_prompt:
+            raise ValueError(f"Missing prompt files for mode '{mode}'.")
+
+        if self.resume_format == "text":
+            resume = reduce_typst(resume)
+        label = _FORMAT_LABELS[self.resume_format]
+        user_prefix = f"{tpl_prompt}\n\nRESUME ({label}):\n{resume}\n\n"
+        job_desc = self._fit_job_desc(job_desc, sys_prompt, user_prefix)
+        keywords = match_keywords(resume, job_desc)
+        user = f"JD:\n{job_desc}" + self._keyword_check(keywords)
+        estimate = partial(estimate_input_tokens, self.provider.provider_name)
+        context = (
+            self.provider.provider_name,
+            self.provider.model,
+            mode,
+            sys_prompt,
+            tpl_prompt,
+            resume,
+        )
+        return _Request(
+            mode=mode,
+            system=sys_prompt,
+            user_prefix=user_prefix,
+            user=user,
+            max_tokens=_MAX_TOKENS[mode],
+            resume_filename=resume_filename,
+            key=cache_key(*context, user),
+            context_key=cache_key(*context),
+            job_desc=job_desc,
+            estimated_tokens=estimate(sys_prompt, user_prefix, user),
+            missing_keywords=keywords.missing,
+        )
 
+    def _prepare_delta(
+        self,
+        resume: str,
+        job_desc: str,
+        base: RescoreBase,
+        changes: list[Change],
+        resume_filename: str | None,
+    ) -> _Request:
+        sys_prompt, tpl_prompt = (self._prompt(name) for name in _DELTA_PROMPTS)
+        if not sys_prompt or not tpl_prompt:
+            raise ValueError("Missing prompt files for delta rescoring.")
+
+        if self.resume_format == "text":
+            resume = reduce_typst(resume)
+            changes = [
+                replace(
+                    change, before=_reduced(change.before), after=_reduced(change.after)
+                )
+                for change in changes
+            ]
+        diff = "\n\n".join(change.to_prompt() for change in changes)
+        label = _FORMAT_LABELS[self.resume_format]
+        prior = f"PREVIOUS RESULT:\n{base.content}\n\nCHANGES ({label}):\n{diff}"
+        user_prefix = f"{tpl_prompt}\n\n"
+        job_desc = self._fit_job_desc(job_desc, sys_prompt, user_prefix, prior)
+        keywords = match_keywords(resume, job_desc)
+        user = f"JD:\n{job_desc}\n\n{prior}" + self._keyword_check(keywords)
+        estimate = partial(estimate_input_tokens, self.provider.provider_name)
+        context = (
+            self.provider.provider_name,
+            self.provider.model,
+            "delta",
+            sys_prompt,
+            tpl_prompt,
+            base.content,
+            diff,
+        )
+        return _Request(
+            mode="delta",
+            system=sys_prompt,
+            user_prefix=user_prefix,
+            user=user,
+            max_tokens=_MAX_TOKENS["score"],
+            resume_filename=resume_filename,
+            key=cache_key(*context, user),
+            context_key=cache_key(*context),
+            job_desc=job_desc,
+            estimated_tokens=estimate(sys_prompt, user_prefix, user),
+            missing_keywords=keywords.missing,
+        )
+
+    def _fit_job_desc(self, job_desc: str, *fixed_parts: str) -> str:
+        """Trim job_desc to what the input budget leaves after the rest of the input."""
+        if self.input_budget is None:
+            return job_desc
+        estimate = partial(estimate_input_tokens, self.provider.provider_name)
+        jd_budget = self.input_budget - estimate(*fixed_parts)
+        job_desc, _ = trim_job_description(
+            job_desc, max(jd_budget, _MIN_JD_TOKENS), estimate
+        )
+        return job_desc
+
+    @staticmethod
+    def _keyword_check(keywords: KeywordMatch) -> str:
+        # Verbatim keyword matching is done locally, the model adds the judgement
+        keyword_check = keywords.to_prompt()
+        return f"\n\n{keyword_check}" if keyword_check else ""
+
+    @staticmethod
+    def _with_local_keywords(request: _Request, text: str) -> str:
+        """The model's answer with the locally found missing terms merged into its
+        missing_keywords, which the model was told to leave them out of."""
+        if not request.missing_keywords:
+            return text
+        try:
+            data = extract_json(text)
+        except ValueError:
+            return text
+        if not isinstance(data.get("missing_keywords"), list):
+            return text
+        data["missing_keywords"] = merge_missing(
+            request.missing_keywords, data["missing_keywords"]
+        )
+        return json.dumps(data, ensure_ascii=False)
+
+    def _from_cache(self, request: _Request) -> AnalysisResult | None:
+        """Stored result of the identical request, or of a near-duplicate job description."""
+        start = time.monotonic()
+        if self.cache is not None:
+            cached = self.cache.get(request.key)
+            if cached is not None:
+                text, tokens = cached
+                self._log_reuse(request, start, "hit")
+                logger.info(
+                    f"Cache hit: mode={request.mode} resume={request.resume_filename}"
+                )
+                return {"content": text, "tokens": tokens, "reused": True}
+        if self.near_duplicates is not None:
+            match = self.near_duplicates.find(request.context_key, request.job_desc)
+            if match is not None:
+                self._log_reuse(request, start, "near_duplicate")
+                logger.info(
+                    f"Near-duplicate job description ({match.similarity:.0%} similar): mode={request.mode} resume={request.resume_filename}"
+                )
+                # The neighbour's answer, with this job description's local terms
+                return {
+                    "content": self._with_local_keywords(request, match.content),
+                    "tokens": match.tokens,
+                    "near_duplicate": match.similarity,
+                    "reused": True,
+                }
+        return None
+
+    def _log_reuse(self, request: _Request, start: float, cache_status: str) -> None:
+        log_llm_call(
+            feature=request.mode,
+            model=self.provider.model,
+            duration_ms=int((time.monotonic() - start) * 1000),
+            status="success",
+            provider=self.provider.provider_name,
+            resume_filename=request.resume_filename,
+            input_tokens=0,
+            output_tokens=0,
+            cache_status=cache_status,
+        )
+
+    def _served_by(self) -> tuple[str, str]:
+        """Provider and model that answered, which differ behind a failover provider."""
+        return served_by.get() or (self.provider.provider_name, self.provider.model)
+
+    def _log_coalesced(
+        self, request: _Request, start: float, error: Exception | None = None
+    ) -> None:
+        log_llm_call(
+            feature=request.mode,
+            model=self.provider.model,
+            duration_ms=int((time.monotonic() - start) * 1000),
+            status="success" if error is None else "error",
+            provider=self.provider.provider_name,
+            resume_filename=request.resume_filename,
+            input_tokens=0,
+            output_tokens=0,
+            error_message=None if error is None else str(error),
+            cache_status="coalesced",
+        )
+        logger.info(
+            f"Coalesced with in-flight call: mode={request.mode} resume={request.resume_filename}"
+        )
+
+    def _log_start(self, request: _Request) -> None:
+        logger.info(
+            f"Starting LLM call: provider={self.provider.provider_name} model={self.provider.model} mode={request.mode} resume={request.resume_filename}"
+        )
+
+    def _log_error(
+        self,
+        request: _Request,
+        stats: _CallStats,
+        error: Exception,
+    ) -> None:
+        provider_name, model = self._served_by()
+        log_llm_call(
+            feature=request.mode,
+            model=model,
+            duration_ms=int((time.monotonic() - stats.start) * 1000),
+            status="error",
+            provider=provider_name,
+            resume_filename=request.resume_filename,
+            error_message=str(error),
+            cache_status=None if self.cache is None else "miss",
+            ttft_ms=stats.ttft_ms,
+            queue_wait_ms=stats.queue_wait_ms,
+            estimated_input_tokens=request.estimated_tokens,
+        )
+        logger.error(f"LLM call failed: {error}", exc_info=True)
+
+    def _finish(
+        self,
+        request: _Request,
+        stats: _CallStats,
+        text: str,
+        tokens: dict[str, int],
+    ) -> AnalysisResult:
+        provider_name, model = self._served_by()
+        log_llm_call(
+            feature=request.mode,
+            model=model,
+            duration_ms=int((time.monotonic() - stats.start) * 1000),
+            status="success",
+            provider=provider_name,
+            resume_filename=request.resume_filename,
+            input_tokens=tokens["input"],
+            output_tokens=tokens["output"],
+            cache_status=None if self.cache is None else "miss",
+            ttft_ms=stats.ttft_ms,
+            queue_wait_ms=stats.queue_wait_ms,
+            estimated_input_tokens=request.estimated_tokens,
+            cache_creation_tokens=tokens.get("cache_creation"),
+            cache_read_tokens=tokens.get("cache_read"),
+        )
+        text = self._with_local_keywords(request, text)
+        self._store(request, text, tokens)
         return {"content": text, "tokens": tokens}
+
+    def _store(self, request: _Request, text: str, tokens: dict[str, int]) -> None:
+        if self.cache is not None:
+            self.cache.set(request.key, text, tokens)
+        if self.near_duplicates is not None:
+            self.near_duplicates.add(
+                request.context_key, request.job_desc, text, tokens
+            )
+
+    def _log_pack_item(
+        self,
+        pack: _Pack,
+        item: _PackItem,
+        stats: _CallStats,
+        tokens: dict[str, int],
+        error: str | None = None,
+    ) -> None:
+        """One llm_logs row per job description of a packed call."""
+        provider_name, model = self._served_by()
+        log_llm_call(
+            feature="packed_score",
+            model=model,
+            duration_ms=int((time.monotonic() - stats.start) * 1000),
+            status="success" if error is None else "error",
+            provider=provider_name,
+            resume_filename=item.request.resume_filename,
+            input_tokens=tokens.get("input"),
+            output_tokens=tokens.get("output"),
+            error_message=error,
+            cache_status=None if self.cache is None else "miss",
+            queue_wait_ms=stats.queue_wait_ms,
+            estimated_input_tokens=pack.shared_tokens // len(pack.items)
+            + item.estimated_tokens,
+            cache_creation_tokens=tokens.get("cache_creation"),
+            cache_read_tokens=tokens.get("cache_read"),
+            batch_id=pack.batch_id,
+        )
@@ -1,7 +1,10 @@
 from src.providers.anthropic_provider import AnthropicProvider
 from src.providers.base import BaseProvider
+from src.providers.client_pool import warm_up
 from src.providers.factory import create_provider
+from src.providers.hedged import HedgedProvider
 from src.providers.openai_compatible_provider import OpenAICompatibleProvider
+from src.providers.rate_limit import RateLimiter, get_rate_limiter
 from src.providers.registry import (
     DEFAULT_MODEL,
     DEFAULT_PROVIDER,
@@ -13,9 +16,13 @@ __all__ = [
     "AnthropicProvider",
     "BaseProvider",
     "create_provider",
+    "get_rate_limiter",
     "DEFAULT_MODEL",
     "DEFAULT_PROVIDER",
+    "HedgedProvider",
     "OpenAICompatibleProvider",
     "PROVIDERS",
     "ProviderConfig",
+    "RateLimiter",
+    "warm_up",
 ]
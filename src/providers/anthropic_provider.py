@@ -1,14 +1,25 @@
 import os
+from collections.abc import Generator
+from typing import Any
 
-from anthropic import Anthropic
-from anthropic.types import TextBlock
+from anthropic import Anthropic, AsyncAnthropic
+from anthropic.types import Message, TextBlock, Usage
 from dotenv import load_dotenv
 
 from src.providers.base import BaseProvider
+from src.providers.client_pool import get_async_anthropic_client
+
+_CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class AnthropicProvider(BaseProvider):
-    def __init__(self, api_key: str | None = None, model: str = "claude-sonnet-4-6"):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = "claude-sonnet-4-6",
+        prompt_caching: bool = True,
+        client: Anthropic | None = None,
+    ):
         if api_key is None:
             load_dotenv(".env")
             api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -16,18 +27,75 @@ class AnthropicProvider(BaseProvider):
             raise ValueError("Missing ANTHROPIC_API_KEY")
         self.model = model
         self.provider_name = "anthropic"
-        self._client = Anthropic(api_key=api_key)
+        self.prompt_caching = prompt_caching
+        self._api_key = api_key
+        self._client = client or Anthropic(api_key=api_key)
+        # Created on the first acomplete, most callers only use the sync client
+        self._async_client: AsyncAnthropic | None = None
 
     def complete(
-        self, system: str, user: str, max_tokens: int
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
     ) -> tuple[str, dict[str, int]]:
         resp = self._client.messages.create(
-            model=self.model,
-            system=system,
-            max_tokens=max_tokens,
-            messages=[{"role": "user", "content": user}],
+            **self._request(system, user, max_tokens, user_prefix)
+        )
+        return self._parse(resp)
+
+    async def acomplete(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> tuple[str, dict[str, int]]:
+        resp = await self._get_async_client().messages.create(
+            **self._request(system, user, max_tokens, user_prefix)
         )
+        return self._parse(resp)
+
+    def _get_async_client(self) -> AsyncAnthropic:
+        pooled = get_async_anthropic_client(self._api_key)
+        if pooled is not None:
+            return pooled
+        if self._async_client is None:
+            self._async_client = AsyncAnthropic(api_key=self._api_key)
+        return self._async_client
+
+    def stream(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> Generator[str, None, dict[str, int]]:
+        with self._client.messages.stream(
+            **self._request(system, user, max_tokens, user_prefix)
+        ) as stream:
+            yield from stream.text_stream
+            resp = stream.get_final_message()
+        return self._usage(resp.usage)
+
+    def _request(
+        self, system: str, user: str, max_tokens: int, user_prefix: str
+    ) -> dict[str, Any]:
+        """Build messages.create kwargs, with cache breakpoints after the system
+        prompt and after the stable user prefix when prompt caching is on."""
+        if not self.prompt_caching:
+            return {
+                "model": self.model,
+                "system": system,
+                "max_tokens": max_tokens,
+                "messages": [{"role": "user", "content": user_prefix + user}],
+            }
+        content = [{"type": "text", "text": user}]
+        if user_prefix:
+            content.insert(
+                0,
+                {"type": "text", "text": user_prefix, "cache_control": _CACHE_CONTROL},
+            )
+        return {
+            "model": self.model,
+            "system": [
+                {"type": "text", "text": system, "cache_control": _CACHE_CONTROL}
+            ],
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": content}],
+        }
 
+    @classmethod
+    def _parse(cls, resp: Message) -> tuple[str, dict[str, int]]:
         # Extraction of text content
         text = next(
             (block.text for block in resp.content if isinstance(block, TextBlock)),
@@ -35,9 +103,17 @@ class AnthropicProvider(BaseProvider):
         )
         if text is None:
             raise ValueError(f"No text content in response: {resp.content}")
+        return text, cls._usage(resp.usage)
 
-        tokens = {
-            "input": resp.usage.input_tokens,
-            "output": resp.usage.output_tokens,
+    @staticmethod
+    def _usage(usage: Usage) -> dict[str, int]:
+        # input_tokens only counts the uncached part of the prompt, "input" is the
+        # whole prompt like other providers report it, the cached parts included
+        cache_creation = usage.cache_creation_input_tokens or 0
+        cache_read = usage.cache_read_input_tokens or 0
+        return {
+            "input": usage.input_tokens + cache_creation + cache_read,
+            "output": usage.output_tokens,
+            "cache_creation": cache_creation,
+            "cache_read": cache_read,
         }
-        return text, tokens
@@ -1,4 +1,11 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Generator
+from contextvars import ContextVar
+
+# (provider_name, model) that answered the last call in this context. Set by
+# providers that delegate to others, callers fall back to the provider's own.
+served_by: ContextVar[tuple[str, str] | None] = ContextVar("served_by", default=None)
 
 
 class BaseProvider(ABC):
@@ -7,11 +14,41 @@ class BaseProvider(ABC):
 
     @abstractmethod
     def complete(
-        self, system: str, user: str, max_tokens: int
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
     ) -> tuple[str, dict[str, int]]:
         """Send a completion request.
 
+        The user message is user_prefix + user. user_prefix is the part that
+        stays the same across calls, which providers may cache.
+
         Returns:
-            (text, {"input": N, "output": N})
+            (text, {"input": N, "output": N}), plus "cache_creation" and
+            "cache_read" token counts when the provider reports them. "input"
+            counts the whole prompt, cached tokens included
         """
         ...
+
+    async def acomplete(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> tuple[str, dict[str, int]]:
+        """Async variant of complete.
+
+        Providers with a native async client override this; the default runs
+        complete in a worker thread so every provider can be awaited.
+        """
+        return await asyncio.to_thread(
+            self.complete, system, user, max_tokens, user_prefix
+        )
+
+    def stream(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> Generator[str, None, dict[str, int]]:
+        """Stream a completion as text chunks.
+
+        Yields text chunks as they arrive and returns the token usage
+        ({"input": N, "output": N}) once the stream is exhausted. The default
+        yields the whole completion as a single chunk.
+        """
+        text, tokens = self.complete(system, user, max_tokens, user_prefix)
+        yield text
+        return tokens
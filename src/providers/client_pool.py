@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import logging
+import threading
+
+import anthropic
+import httpx
+import openai
+from anthropic import Anthropic, AsyncAnthropic
+from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+_LIMITS = httpx.Limits(
+    max_connections=50, max_keepalive_connections=20, keepalive_expiry=120.0
+)
+_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+_clients: dict[tuple[str, str | None, str], Anthropic | OpenAI] = {}
+_http_clients: dict[tuple[str, str | None, str], httpx.Client] = {}
+# Async clients hold connections bound to the event loop that opened them, so they
+# are only pooled on one long-lived loop, the hedged requests loop. Elsewhere
+# providers keep their own.
+_async_loop: asyncio.AbstractEventLoop | None = None
+_async_clients: dict[tuple[str, str | None, str], AsyncAnthropic | AsyncOpenAI] = {}
+_lock = threading.Lock()
+
+
+def _pool_key(
+    provider_name: str, base_url: str | None, api_key: str
+) -> tuple[str, str | None, str]:
+    # Never keep raw API keys as dict keys
+    return provider_name, base_url, hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def _http_client(key: tuple[str, str | None, str]) -> httpx.Client:
+    # Caller holds _lock. The SDK default clients keep their redirect/proxy settings.
+    http_client = _http_clients.get(key)
+    if http_client is None:
+        sdk = anthropic if key[0] == "anthropic" else openai
+        http_client = sdk.DefaultHttpxClient(limits=_LIMITS, timeout=_TIMEOUT)
+        _http_clients[key] = http_client
+    return http_client
+
+
+def get_anthropic_client(api_key: str) -> Anthropic:
+    """Return the process-wide Anthropic client for this API key."""
+    key = _pool_key("anthropic", None, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if not isinstance(client, Anthropic):
+            client = Anthropic(api_key=api_key, http_client=_http_client(key))
+            _clients[key] = client
+        return client
+
+
+def get_openai_client(
+    provider_name: str, api_key: str, base_url: str | None = None
+) -> OpenAI:
+    """Return the process-wide OpenAI-compatible client for (provider, base_url, key)."""
+    key = _pool_key(provider_name, base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if not isinstance(client, OpenAI):
+            client = OpenAI(
+                api_key=api_key, base_url=base_url, http_client=_http_client(key)
+            )
+            _clients[key] = client
+        return client
+
+
+def pool_async_clients_on(loop: asyncio.AbstractEventLoop) -> None:
+    """Pool async clients on loop, which must run for the rest of the process."""
+    global _async_loop
+    with _lock:
+        _async_loop = loop
+        _async_clients.clear()
+
+
+def _on_async_loop() -> bool:
+    # Caller holds _lock
+    try:
+        return asyncio.get_running_loop() is _async_loop
+    except RuntimeError:
+        return False
+
+
+def get_async_anthropic_client(api_key: str) -> AsyncAnthropic | None:
+    """Return the pooled async Anthropic client for this API key, or None when not
+    running on the loop async clients are pooled on."""
+    key = _pool_key("anthropic", None, api_key)
+    with _lock:
+        if not _on_async_loop():
+            return None
+        client = _async_clients.get(key)
+        if not isinstance(client, AsyncAnthropic):
+            client = AsyncAnthropic(
+                api_key=api_key,
+                http_client=anthropic.DefaultAsyncHttpxClient(
+                    limits=_LIMITS, timeout=_TIMEOUT
+                ),
+            )
+            _async_clients[key] = client
+        return client
+
+
+def get_async_openai_client(
+    provider_name: str, api_key: str, base_url: str | None = None
+) -> AsyncOpenAI | None:
+    """Return the pooled async OpenAI-compatible client for (provider, base_url, key),
+    or None when not running on the loop async clients are pooled on."""
+    key = _pool_key(provider_name, base_url, api_key)
+    with _lock:
+        if not _on_async_loop():
+            return None
+        client = _async_clients.get(key)
+        if not isinstance(client, AsyncOpenAI):
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=openai.DefaultAsyncHttpxClient(
+                    limits=_LIMITS, timeout=_TIMEOUT
+                ),
+            )
+            _async_clients[key] = client
+        return client
+
+
+def warm_up(provider_name: str, api_key: str, base_url: str | None = None) -> None:
+    """Open a keep-alive connection to the provider in the background.
+
+    The request itself is a bare HEAD whose response is ignored, it only pays
+    the DNS, TCP and TLS setup ahead of the first real call.
+    """
+    if provider_name == "anthropic":
+        base_url = None
+        client = get_anthropic_client(api_key)
+    else:
+        client = get_openai_client(provider_name, api_key, base_url)
+    with _lock:
+        http_client = _http_clients[_pool_key(provider_name, base_url, api_key)]
+
+    def _connect() -> None:
+        try:
+            http_client.head(str(client.base_url))
+        except httpx.HTTPError as e:
+            logger.info(f"Warm-up request to {provider_name} failed: {e}")
+
+    threading.Thread(target=_connect, name="provider-warm-up", daemon=True).start()
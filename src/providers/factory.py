@@ -1,16 +1,20 @@
 from src.providers.anthropic_provider import AnthropicProvider
 from src.providers.base import BaseProvider
+from src.providers.client_pool import get_anthropic_client, get_openai_client
 from src.providers.openai_compatible_provider import OpenAICompatibleProvider
 from src.providers.registry import PROVIDERS
 
 
 def create_provider(provider_name: str, api_key: str, model: str) -> BaseProvider:
     if provider_name == "anthropic":
-        return AnthropicProvider(api_key=api_key, model=model)
+        return AnthropicProvider(
+            api_key=api_key, model=model, client=get_anthropic_client(api_key)
+        )
     config = PROVIDERS[provider_name]
     return OpenAICompatibleProvider(
         api_key=api_key,
         model=model,
         base_url=config.base_url,
         provider_name=provider_name,
+        client=get_openai_client(provider_name, api_key, config.base_url),
     )
@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Coroutine, Generator
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any
+
+import anthropic
+import httpx
+import openai
+
+from src.providers.base import BaseProvider, served_by
+from src.providers.client_pool import pool_async_clients_on
+from src.providers.rate_limit import get_rate_limiter
+from src.providers.tokens import estimate_input_tokens
+
+logger = logging.getLogger(__name__)
+
+# Hedge delay until the primary has enough successful calls for a p95
+_DEFAULT_HEDGE_AFTER_S = 30.0
+_MIN_SAMPLES = 10
+_WINDOW_SIZE = 200
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Server errors, timeouts and connection failures, worth trying elsewhere."""
+    if isinstance(error, (anthropic.APIStatusError, openai.APIStatusError)):
+        return error.status_code >= 500
+    return isinstance(
+        error,
+        (
+            anthropic.APIConnectionError,
+            openai.APIConnectionError,
+            httpx.TransportError,
+            TimeoutError,
+        ),
+    )
+
+
+class LatencyWindow:
+    """Rolling window of call latencies in seconds."""
+
+    def __init__(self, size: int = _WINDOW_SIZE):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """The q-th quantile (0 to 1) of the window, None until it has enough samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+# Providers are rebuilt on every Streamlit run, so latencies live per process
+_windows: dict[tuple[str, str, bool], LatencyWindow] = {}
+_windows_lock = threading.Lock()
+
+
+def latency_window(
+    provider_name: str, model: str, first_chunk: bool = False
+) -> LatencyWindow:
+    """Latencies of whole calls, or of the first chunk of streams."""
+    with _windows_lock:
+        return _windows.setdefault((provider_name, model, first_chunk), LatencyWindow())
+
+
+def _close_when_opened(future: Future) -> None:
+    """Close the stream a losing future opens, once it has."""
+
+    def close(done: Future) -> None:
+        if not done.cancelled() and done.exception() is None:
+            stream, finished, _ = done.result()
+            if not finished:
+                stream.close()
+
+    future.add_done_callback(close)
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def _run(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine on the shared background loop and wait for its result.
+
+    Async clients keep connections bound to their loop, so synchronous calls all
+    race on the same long-lived loop instead of a new one each time, with the
+    pooled clients of that loop.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            pool_async_clients_on(_loop)
+            threading.Thread(
+                target=_loop.run_forever, name="hedged-requests", daemon=True
+            ).start()
+        loop = _loop
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class HedgedProvider(BaseProvider):
+    """Races a secondary provider against the primary when the primary is slow.
+
+    The secondary request starts once the primary has run longer than its observed
+    p95 latency, the first answer wins and the other request is cancelled. Streams
+    race the same way on their first chunk, against the p95 time to first chunk.
+    Server errors, timeouts and connection failures fail over to the other
+    provider, for streams only before their first chunk.
+    """
+
+    def __init__(
+        self,
+        primary: BaseProvider,
+        secondary: BaseProvider,
+        hedge_after_s: float = _DEFAULT_HEDGE_AFTER_S,
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.model = primary.model
+        self.provider_name = primary.provider_name
+        self.default_hedge_after_s = hedge_after_s
+        self._latency = latency_window(primary.provider_name, primary.model)
+        self._first_chunk_latency = latency_window(
+            primary.provider_name, primary.model, first_chunk=True
+        )
+
+    def hedge_after(self, first_chunk: bool = False) -> float:
+        """Seconds to wait on the primary, or on its first chunk, before sending
+        the duplicate."""
+        window = self._first_chunk_latency if first_chunk else self._latency
+        p95 = window.percentile(0.95)
+        return self.default_hedge_after_s if p95 is None else p95
+
+    def complete(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> tuple[str, dict[str, int]]:
+        text, tokens, winner = _run(self._race(system, user, max_tokens, user_prefix))
+        served_by.set((winner.provider_name, winner.model))
+        return text, tokens
+
+    async def acomplete(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> tuple[str, dict[str, int]]:
+        text, tokens, winner = await self._race(system, user, max_tokens, user_prefix)
+        served_by.set((winner.provider_name, winner.model))
+        return text, tokens
+
+    def stream(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> Generator[str, None, dict[str, int]]:
+        # Streams only fail over before their first chunk, text already shown
+        # can't be swapped for another provider's
+        args = (system, user, max_tokens, user_prefix)
+        start = time.monotonic()
+        hedge_after = self.hedge_after(first_chunk=True)
+        primary = self._open(self.primary, args)
+        providers = {primary: self.primary}
+        pending = {primary}
+        error: BaseException | None = None
+
+        def send_secondary() -> None:
+            future = self._open(self.secondary, args, rate_limited=True)
+            providers[future] = self.secondary
+            pending.add(future)
+
+        winner: tuple[BaseProvider, Generator, bool, Any] | None = None
+        try:
+            while pending and winner is None:
+                hedged = len(providers) > 1
+                done, pending = wait(
+                    pending,
+                    timeout=None if hedged else hedge_after,
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    logger.info(
+                        f"{self._name(self.primary)} first chunk slower than {hedge_after:.1f}s, hedging with {self._name(self.secondary)}"
+                    )
+                    send_secondary()
+                    continue
+                for future in done:
+                    e = future.exception()
+                    if e is None:
+                        if winner is None:
+                            winner = (providers[future], *future.result())
+                        else:
+                            _close_when_opened(future)
+                        continue
+                    if not is_retryable(e):
+                        raise e
+                    logger.warning(
+                        f"{self._name(providers[future])} failed, failing over: {e}"
+                    )
+                    error = e
+                    if len(providers) == 1:
+                        send_secondary()
+        finally:
+            for future in pending:
+                _close_when_opened(future)
+            if primary in pending:
+                # Lower bound of the real time to first chunk
+                self._first_chunk_latency.add(time.monotonic() - start)
+        if winner is None:
+            raise error or RuntimeError("No provider answered")
+
+        provider, stream, finished, value = winner
+        served_by.set((provider.provider_name, provider.model))
+        if provider is self.primary:
+            self._first_chunk_latency.add(time.monotonic() - start)
+        if finished:
+            return value
+        yield value
+        tokens = yield from stream
+        if provider is self.primary:
+            self._latency.add(time.monotonic() - start)
+        return tokens
+
+    def _open(
+        self, provider: BaseProvider, args: tuple, rate_limited: bool = False
+    ) -> Future:
+        """Open provider's stream on a thread. The future resolves to (stream,
+        finished, first chunk), or the return value when the stream was empty."""
+        future: Future = Future()
+
+        def run() -> None:
+            try:
+                if rate_limited:
+                    limiter = get_rate_limiter(provider.provider_name)
+                    limiter.acquire(self._estimate(provider, *args))
+                stream = provider.stream(*args)
+                try:
+                    first = next(stream)
+                except StopIteration as stop:
+                    future.set_result((stream, True, stop.value))
+                    return
+                future.set_result((stream, False, first))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hedged-stream", daemon=True).start()
+        return future
+
+    @staticmethod
+    def _estimate(
+        provider: BaseProvider,
+        system: str,
+        user: str,
+        max_tokens: int,
+        user_prefix: str,
+    ) -> int:
+        return estimate_input_tokens(provider.provider_name, system, user_prefix, user)
+
+    async def _race(
+        self, system: str, user: str, max_tokens: int, user_prefix: str
+    ) -> tuple[str, dict[str, int], BaseProvider]:
+        args = (system, user, max_tokens, user_prefix)
+        start = time.monotonic()
+        hedge_after = self.hedge_after()
+        primary = asyncio.ensure_future(self.primary.acomplete(*args))
+        providers = {primary: self.primary}
+        pending = {primary}
+        error: BaseException | None = None
+
+        async def call_secondary() -> tuple[str, dict[str, int]]:
+            # The duplicate counts against the secondary's limits like any call
+            tokens = self._estimate(self.secondary, *args)
+            await get_rate_limiter(self.secondary.provider_name).aacquire(tokens)
+            return await self.secondary.acomplete(*args)
+
+        def send_secondary() -> None:
+            task = asyncio.ensure_future(call_secondary())
+            providers[task] = self.secondary
+            pending.add(task)
+
+        try:
+            while pending:
+                hedged = len(providers) > 1
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if hedged else hedge_after,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    logger.info(
+                        f"{self._name(self.primary)} slower than {hedge_after:.1f}s, hedging with {self._name(self.secondary)}"
+                    )
+                    send_secondary()
+                    continue
+                for task in done:
+                    e = task.exception()
+                    if e is None:
+                        if task is primary:
+                            self._latency.add(time.monotonic() - start)
+                        text, tokens = task.result()
+                        return text, tokens, providers[task]
+                    if not is_retryable(e):
+                        raise e
+                    logger.warning(
+                        f"{self._name(providers[task])} failed, failing over: {e}"
+                    )
+                    error = e
+                    if len(providers) == 1:
+                        send_secondary()
+        finally:
+            for task in pending:
+                task.cancel()
+            if primary in pending:
+                # Lower bound of the real latency, still pushes the p95 up
+                self._latency.add(time.monotonic() - start)
+        raise error or RuntimeError("No provider answered")
+
+    @staticmethod
+    def _name(provider: BaseProvider) -> str:
+        return f"{provider.provider_name}/{provider.model}"
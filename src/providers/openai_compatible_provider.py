@@ -1,6 +1,15 @@
-from openai import OpenAI
+import logging
+from collections.abc import Generator
+
+from openai import AsyncOpenAI, BadRequestError, OpenAI
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessageParam
 
 from src.providers.base import BaseProvider
+from src.providers.client_pool import get_async_openai_client
+from src.providers.tokens import estimate_input_tokens
+
+logger = logging.getLogger(__name__)
 
 
 class OpenAICompatibleProvider(BaseProvider):
@@ -10,29 +19,115 @@ class OpenAICompatibleProvider(BaseProvider):
         model: str,
         base_url: str | None = None,
         provider_name: str = "openai",
+        client: OpenAI | None = None,
     ):
         self.model = model
         self.provider_name = provider_name
-        self._client = OpenAI(api_key=api_key, base_url=base_url)
+        self._api_key = api_key
+        self._base_url = base_url
+        self._client = client or OpenAI(api_key=api_key, base_url=base_url)
+        # Created on the first acomplete, most callers only use the sync client
+        self._async_client: AsyncOpenAI | None = None
 
     def complete(
-        self, system: str, user: str, max_tokens: int
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
     ) -> tuple[str, dict[str, int]]:
         resp = self._client.chat.completions.create(
             model=self.model,
             messages=[
                 {"role": "system", "content": system},
-                {"role": "user", "content": user},
+                {"role": "user", "content": user_prefix + user},
             ],
             max_tokens=max_tokens,
         )
+        return self._parse(resp)
+
+    async def acomplete(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> tuple[str, dict[str, int]]:
+        resp = await self._get_async_client().chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user_prefix + user},
+            ],
+            max_tokens=max_tokens,
+        )
+        return self._parse(resp)
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        pooled = get_async_openai_client(
+            self.provider_name, self._api_key, self._base_url
+        )
+        if pooled is not None:
+            return pooled
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self._api_key, base_url=self._base_url
+            )
+        return self._async_client
+
+    def stream(
+        self, system: str, user: str, max_tokens: int, user_prefix: str = ""
+    ) -> Generator[str, None, dict[str, int]]:
+        messages: list[ChatCompletionMessageParam] = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user_prefix + user},
+        ]
+        try:
+            chunks = self._client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except BadRequestError as e:
+            # Some compatible endpoints reject stream_options
+            if "stream_options" not in str(e):
+                raise
+            chunks = self._client.chat.completions.create(
+                model=self.model, messages=messages, max_tokens=max_tokens, stream=True
+            )
+        usage = None
+        text = []
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                text.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            if chunk.usage is not None:
+                usage = chunk.usage
+        if usage is None:
+            # The completion was already shown, estimate rather than fail it
+            logger.warning(
+                f"No usage data in {self.provider_name} stream, estimating tokens"
+            )
+            return {
+                "input": estimate_input_tokens(
+                    self.provider_name, system, user_prefix, user
+                ),
+                "output": estimate_input_tokens(self.provider_name, "".join(text)),
+            }
+        return self._usage(usage)
+
+    @classmethod
+    def _parse(cls, resp: ChatCompletion) -> tuple[str, dict[str, int]]:
         text = resp.choices[0].message.content
         if text is None:
             raise ValueError(f"No text content in response: {resp}")
         if resp.usage is None:
             raise ValueError(f"No usage data in response: {resp}")
+        return text, cls._usage(resp.usage)
+
+    @staticmethod
+    def _usage(usage: CompletionUsage) -> dict[str, int]:
         tokens = {
-            "input": resp.usage.prompt_tokens,
-            "output": resp.usage.completion_tokens,
+            "input": usage.prompt_tokens,
+            "output": usage.completion_tokens,
         }
-        return text, tokens
+        # OpenAI caches long prompt prefixes automatically, prompt_tokens includes them
+        details = usage.prompt_tokens_details
+        cached = details.cached_tokens if details is not None else None
+        if isinstance(cached, int) and cached > 0:
+            tokens["cache_read"] = cached
+        return tokens
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import threading
+import time
+
+from src.providers.registry import PROVIDERS
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of rejecting callers.
+
+    The level may go negative: each caller takes its share immediately and is told
+    how long to wait for the bucket to refill, so waiters are served in order.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.refill_per_s = per_minute / 60.0
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the bucket and return the seconds until it's covered."""
+        elapsed = max(0.0, now - self._updated)
+        self._level = min(self.capacity, self._level + elapsed * self.refill_per_s)
+        self._updated = max(now, self._updated)
+        # A request bigger than the whole bucket waits for a full bucket, not forever
+        self._level -= min(amount, self.capacity)
+        return max(0.0, -self._level / self.refill_per_s)
+
+
+class RateLimiter:
+    """Keeps the calls to one provider under its requests and tokens per minute."""
+
+    def __init__(self, rpm: int | None = None, tpm: int | None = None):
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and tokens, returning the seconds to wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            delays = [
+                bucket.reserve(amount, now)
+                for bucket, amount in ((self._requests, 1), (self._tokens, tokens))
+                if bucket is not None
+            ]
+        return max(delays, default=0.0)
+
+    def acquire(self, tokens: int) -> float:
+        """Block until the call may be sent, returning the time spent waiting."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self, tokens: int) -> float:
+        """Async variant of acquire."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+_limiters: dict[str, RateLimiter] = {}
+_lock = threading.Lock()
+
+
+def get_rate_limiter(provider_name: str) -> RateLimiter:
+    """Return the process-wide limiter of a provider, shared by every session."""
+    with _lock:
+        limiter = _limiters.get(provider_name)
+        if limiter is None:
+            config = PROVIDERS.get(provider_name)
+            if config is None:
+                logger.warning(f"No rate limits known for provider {provider_name}")
+                limiter = RateLimiter()
+            else:
+                limiter = RateLimiter(config.rpm, config.tpm)
+            _limiters[provider_name] = limiter
+        return limiter
@@ -1,10 +1,21 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass(frozen=True)
 class ProviderConfig:
     base_url: str | None
     models: list[str]
+    # Cheaper, faster models that are good enough for quick scoring
+    fast_models: list[str] = field(default_factory=list)
+    # Requests and input tokens per minute for one API key, None for no limit.
+    # Defaults follow the lowest paid tier of each provider.
+    rpm: int | None = None
+    tpm: int | None = None
+    # Average characters per input token of the provider's tokenizers, for estimates
+    chars_per_token: float = 4.0
+    # Smallest context window and output cap among the provider's models
+    context_window: int = 128_000
+    max_output_tokens: int = 8192
 
 
 DEFAULT_PROVIDER = "anthropic"
@@ -18,6 +29,12 @@ PROVIDERS: dict[str, ProviderConfig] = {
             "claude-opus-4-6",
             "claude-haiku-4-5-20251001",
         ],
+        fast_models=["claude-haiku-4-5-20251001"],
+        rpm=50,
+        tpm=30_000,
+        chars_per_token=3.5,
+        context_window=200_000,
+        max_output_tokens=64_000,
     ),
     "openai": ProviderConfig(
         base_url=None,
@@ -29,10 +46,19 @@ PROVIDERS: dict[str, ProviderConfig] = {
             "o3",
             "o4-mini",
         ],
+        fast_models=["gpt-4.1-mini", "gpt-4o-mini"],
+        rpm=500,
+        tpm=30_000,
+        max_output_tokens=16_384,
     ),
     "mistral": ProviderConfig(
         base_url="https://api.mistral.ai/v1",
         models=["mistral-large-latest", "mistral-medium-latest", "mistral-tiny-latest"],
+        fast_models=["mistral-medium-latest", "mistral-tiny-latest"],
+        rpm=60,
+        tpm=500_000,
+        chars_per_token=3.7,
+        context_window=32_000,
     ),
     "mammouth": ProviderConfig(
         base_url="https://api.mammouth.ai/v1",
@@ -46,6 +72,7 @@ PROVIDERS: dict[str, ProviderConfig] = {
             "mistral-large-3",
             "deepseek-v3.2",
         ],
+        fast_models=["gemini-2.5-flash", "gpt-4.1-mini"],
     ),
     "openrouter": ProviderConfig(
         base_url="https://openrouter.ai/api/v1",
@@ -59,5 +86,11 @@ PROVIDERS: dict[str, ProviderConfig] = {
             "openai/gpt-4.1-mini-2025-04-14",
             "x-ai/grok-4-fast",
         ],
+        fast_models=[
+            "google/gemini-2.5-flash",
+            "openai/gpt-4.1-mini-2025-04-14",
+            "x-ai/grok-4-fast",
+        ],
+        rpm=60,
     ),
 }
@@ -0,0 +1,20 @@
+from src.providers.registry import PROVIDERS
+
+# Characters per token of English prose and markup when nothing better is known
+_DEFAULT_CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(
+    *parts: str, chars_per_token: float = _DEFAULT_CHARS_PER_TOKEN
+) -> int:
+    """Cheap guess of the tokens of a prompt, before sending it."""
+    return int(sum(len(part) for part in parts) / chars_per_token) + 1
+
+
+def estimate_input_tokens(provider_name: str, *parts: str) -> int:
+    """estimate_tokens with the tokenizer density of the provider's models."""
+    config = PROVIDERS.get(provider_name)
+    chars_per_token = (
+        _DEFAULT_CHARS_PER_TOKEN if config is None else config.chars_per_token
+    )
+    return estimate_tokens(*parts, chars_per_token=chars_per_token)
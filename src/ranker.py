@@ -0,0 +1,156 @@
+import logging
+import threading
+from collections import Counter
+from collections.abc import Collection, Iterable
+from pathlib import Path
+
+import numpy as np
+
+from src.keywords import tokenize
+from src.typst_text import reduce_typst
+
+logger = logging.getLogger(__name__)
+
+_INDEX_PATH = Path("data/logs/job_index.npz")
+
+# Usual BM25 parameters: term frequency saturation and length normalization
+_K1 = 1.5
+_B = 0.75
+
+
+class JobIndex:
+    """BM25 index of job descriptions, to shortlist them for a resume locally.
+
+    Postings are kept as flat NumPy arrays (job row, term column, frequency), so
+    scoring a resume against thousands of job descriptions is a handful of
+    vectorized operations. Job descriptions are added by id, already indexed ids
+    are skipped, and the index is saved to disk between runs.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or _INDEX_PATH
+        self._ids: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._vocab: dict[str, int] = {}
+        self._rows = np.empty(0, dtype=np.int32)
+        self._cols = np.empty(0, dtype=np.int32)
+        self._tfs = np.empty(0, dtype=np.float32)
+        self._lengths = np.empty(0, dtype=np.float32)
+        # Document frequency per term, recomputed after additions
+        self._df: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, job_id: object) -> bool:
+        return job_id in self._positions
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "JobIndex":
+        """The index saved at path, or an empty one."""
+        index = cls(path)
+        if not index.path.exists():
+            return index
+        with np.load(index.path) as data:
+            index._ids = data["ids"].tolist()
+            index._vocab = {term: i for i, term in enumerate(data["vocab"].tolist())}
+            index._rows = data["rows"]
+            index._cols = data["cols"]
+            index._tfs = data["tfs"]
+            index._lengths = data["lengths"]
+        index._positions = {job_id: i for i, job_id in enumerate(index._ids)}
+        logger.info(f"Loaded job index: {len(index)} job descriptions")
+        return index
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with self._lock, tmp_path.open("wb") as f:
+            np.savez(
+                f,
+                ids=np.array(self._ids, dtype=str),
+                vocab=np.array(list(self._vocab), dtype=str),
+                rows=self._rows,
+                cols=self._cols,
+                tfs=self._tfs,
+                lengths=self._lengths,
+            )
+        tmp_path.replace(self.path)
+
+    def add(self, jobs: Iterable[tuple[str, str]]) -> int:
+        """Index (job_id, job_desc) pairs not indexed yet, returns how many were."""
+        rows, cols, tfs, lengths = [], [], [], []
+        with self._lock:
+            for job_id, job_desc in jobs:
+                if job_id in self._positions:
+                    continue
+                row = len(self._ids)
+                self._positions[job_id] = row
+                self._ids.append(job_id)
+                counts = Counter(tokenize(job_desc))
+                for term, count in counts.items():
+                    rows.append(row)
+                    cols.append(self._vocab.setdefault(term, len(self._vocab)))
+                    tfs.append(count)
+                lengths.append(counts.total())
+            if not lengths:
+                return 0
+            self._rows = np.concatenate([self._rows, np.array(rows, dtype=np.int32)])
+            self._cols = np.concatenate([self._cols, np.array(cols, dtype=np.int32)])
+            self._tfs = np.concatenate([self._tfs, np.array(tfs, dtype=np.float32)])
+            self._lengths = np.concatenate(
+                [self._lengths, np.array(lengths, dtype=np.float32)]
+            )
+            self._df = None
+        return len(lengths)
+
+    def scores(self, resume: str) -> np.ndarray:
+        """BM25 score of every indexed job description, in insertion order, with
+        the resume's distinct terms as the query."""
+        with self._lock:
+            n = len(self._ids)
+            terms = [
+                self._vocab[t]
+                for t in set(tokenize(reduce_typst(resume)))
+                if t in self._vocab
+            ]
+            if self._df is None:
+                self._df = np.bincount(self._cols, minlength=len(self._vocab))
+            df = self._df
+            rows, cols, tfs, lengths = self._rows, self._cols, self._tfs, self._lengths
+        if not n or not terms:
+            return np.zeros(n, dtype=np.float32)
+
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = _K1 * (1 - _B + _B * lengths / lengths.mean())
+        hit = np.isin(cols, np.array(terms, dtype=np.int32))
+        rows, cols, tfs = rows[hit], cols[hit], tfs[hit]
+        weights = idf[cols] * tfs * (_K1 + 1) / (tfs + norm[rows])
+        return np.bincount(rows, weights=weights, minlength=n)
+
+    def rank(
+        self,
+        resume: str,
+        top_k: int | None = None,
+        job_ids: Collection[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """(job_id, score) of the best top_k job descriptions for resume, best first.
+
+        job_ids restricts the ranking to those job descriptions, all by default.
+        """
+        scores = self.scores(resume)
+        if job_ids is None:
+            candidates = np.arange(len(scores))
+        else:
+            candidates = np.array(
+                [self._positions[i] for i in job_ids if i in self._positions],
+                dtype=np.int64,
+            )
+        candidate_scores = scores[candidates]
+        if top_k is not None and top_k < len(candidates):
+            best = np.argpartition(-candidate_scores, top_k)[:top_k]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-candidate_scores[best], kind="stable")]
+        return [(self._ids[candidates[i]], float(candidate_scores[i])) for i in best]
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_DB_PATH = Path("data/logs/cache.db")
+
+_DEFAULT_MAX_ENTRIES = 500
+_DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def cache_key(*parts: str) -> str:
+    """Hash the request parts into a stable cache key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") never collide
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Persistent LLM result cache with TTL and LRU size eviction."""
+
+    def __init__(
+        self,
+        db_path: Path | None = None,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = _DEFAULT_TTL_SECONDS,
+    ):
+        self.db_path = db_path or _DB_PATH
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    content TEXT,
+                    tokens TEXT,
+                    created_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> tuple[str, dict[str, int]] | None:
+        """Return (content, tokens) for a fresh entry, or None."""
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT content, tokens, created_at FROM results WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            content, tokens, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return content, json.loads(tokens)
+
+    def set(self, key: str, content: str, tokens: dict[str, int]) -> None:
+        """Store a result, then evict expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO results (key, content, tokens, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, content, json.dumps(tokens), now, now),
+            )
+            conn.execute(
+                "DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            conn.execute(
+                """
+                DELETE FROM results WHERE key NOT IN (
+                    SELECT key FROM results ORDER BY accessed_at DESC LIMIT ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute("DELETE FROM results")
+            conn.commit()
@@ -0,0 +1,176 @@
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from src.llm_logger import read_calls_since
+from src.processor import AnalysisMode
+from src.providers.registry import PROVIDERS
+
+logger = logging.getLogger(__name__)
+
+# Calls kept per (provider, model, mode); older ones stop counting
+_WINDOW_SIZE = 100
+# Samples needed before a model's stats are trusted
+_MIN_SAMPLES = 5
+_MAX_ERROR_RATE = 0.2
+_REFRESH_INTERVAL_S = 30.0
+# Share of calls sent to another candidate, so unmeasured models collect samples
+# and excluded ones get a chance to recover
+_EXPLORE_RATE = 0.05
+# Models this much slower than the fastest count as fast, throughput decides
+_LATENCY_TOLERANCE = 0.1
+# Features logged by calls a routed processor makes, counted toward its mode:
+# rescores send deltas and batches pack score requests
+_FEATURE_MODES: dict[str, AnalysisMode] = {"delta": "score", "packed_score": "score"}
+
+
+@dataclass
+class ModelStats:
+    """Rolling latency, error and throughput figures of one model for one mode."""
+
+    durations_ms: deque[int] = field(default_factory=lambda: deque(maxlen=_WINDOW_SIZE))
+    errors: deque[bool] = field(default_factory=lambda: deque(maxlen=_WINDOW_SIZE))
+    tokens_per_s: deque[float] = field(
+        default_factory=lambda: deque(maxlen=_WINDOW_SIZE)
+    )
+
+    def add(self, duration_ms: int | None, ok: bool, output_tokens: int | None) -> None:
+        self.errors.append(not ok)
+        if ok and duration_ms:
+            self.durations_ms.append(duration_ms)
+            if output_tokens:
+                self.tokens_per_s.append(output_tokens / (duration_ms / 1000))
+
+    @property
+    def samples(self) -> int:
+        return len(self.errors)
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+    @property
+    def median_ms(self) -> float | None:
+        return statistics.median(self.durations_ms) if self.durations_ms else None
+
+    @property
+    def median_tokens_per_s(self) -> float | None:
+        return statistics.median(self.tokens_per_s) if self.tokens_per_s else None
+
+    @property
+    def healthy(self) -> bool:
+        return self.error_rate <= _MAX_ERROR_RATE
+
+
+class Router:
+    """Picks the model to use per analysis mode from the latencies in llm_logs.
+
+    'full' always uses the configured model. 'score' may use any of the provider's
+    fast models or the configured one, whichever healthy model has been fastest,
+    the one with the best throughput among those about as fast. A small share of
+    calls goes to another candidate instead, which keeps every model measured.
+    Delta rescores and packed scores count as 'score' calls. Stats are refreshed
+    from rows logged since the last read, never a full scan.
+    """
+
+    def __init__(
+        self,
+        refresh_interval_s: float = _REFRESH_INTERVAL_S,
+        explore_rate: float = _EXPLORE_RATE,
+        rng: random.Random | None = None,
+    ):
+        self.refresh_interval_s = refresh_interval_s
+        self.explore_rate = explore_rate
+        self._rng = rng or random.Random()
+        self._stats: dict[tuple[str, str, str], ModelStats] = {}
+        self._last_id = 0
+        self._refreshed_at: float | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Fold the calls logged since the previous refresh into the stats."""
+        with self._lock:
+            rows = read_calls_since(self._last_id)
+            packs: dict[str, dict] = {}
+            for row in rows:
+                self._last_id = row["id"]
+                if row["batch_id"] is None:
+                    self._add(row)
+                    continue
+                # A packed call logs a row per job description but is one call
+                pack = packs.setdefault(row["batch_id"], dict(row, output_tokens=0))
+                pack["output_tokens"] += row["output_tokens"] or 0
+                if row["status"] == "success":
+                    pack["status"] = "success"
+            for pack in packs.values():
+                self._add(pack)
+            self._refreshed_at = time.monotonic()
+
+    def _add(self, row: dict) -> None:
+        feature = _FEATURE_MODES.get(row["feature"], row["feature"])
+        stats = self._stats.setdefault(
+            (row["provider"], row["model"], feature), ModelStats()
+        )
+        stats.add(row["duration_ms"], row["status"] == "success", row["output_tokens"])
+
+    def stats(self, provider_name: str, model: str, mode: AnalysisMode) -> ModelStats:
+        return self._stats.get((provider_name, model, mode), ModelStats())
+
+    def route(self, provider_name: str, model: str, mode: AnalysisMode) -> str:
+        """Model of provider_name to use for mode, given the configured model."""
+        if mode == "full":
+            return model
+        if (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_interval_s
+        ):
+            self.refresh()
+
+        fast_models = PROVIDERS[provider_name].fast_models
+        # Without data, prefer the provider's first fast model
+        candidates = list(dict.fromkeys([*fast_models, model]))
+        measured = []
+        unmeasured = []
+        for candidate in candidates:
+            stats = self.stats(provider_name, candidate, mode)
+            if stats.samples < _MIN_SAMPLES:
+                unmeasured.append(candidate)
+            elif stats.healthy and stats.median_ms is not None:
+                measured.append(
+                    (stats.median_ms, stats.median_tokens_per_s or 0.0, candidate)
+                )
+        if measured:
+            fastest = min(ms for ms, _, _ in measured)
+            chosen = max(
+                (tps, candidate)
+                for ms, tps, candidate in measured
+                if ms <= fastest * (1 + _LATENCY_TOLERANCE)
+            )[1]
+        elif unmeasured:
+            chosen = unmeasured[0]
+        else:
+            chosen = model
+        others = [candidate for candidate in candidates if candidate != chosen]
+        if others and self._rng.random() < self.explore_rate:
+            chosen = self._rng.choice(others)
+            logger.info(f"Exploring {provider_name}/{chosen} for {mode}")
+        if chosen != model:
+            logger.info(f"Routing {mode} from {model} to {provider_name}/{chosen}")
+        return chosen
+
+
+_router: Router | None = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> Router:
+    """Return the process-wide router, shared by every session."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = Router()
+        return _router
@@ -0,0 +1,52 @@
+import threading
+from collections.abc import Generator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any
+
+
+class SingleFlight:
+    """Tracks in-flight calls by key so identical concurrent calls run only once.
+
+    The first caller for a key becomes the leader and runs the call, later callers
+    wait on the leader's future. The futures are thread-safe, so callers may come
+    from different sessions, threads or event loops.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, Future[Any]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key: str) -> tuple[Future[Any], bool]:
+        """Return the future for key and whether the caller leads the call."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    @contextmanager
+    def lead(self, key: str, future: Future[Any]) -> Generator[None]:
+        """Scope of the leader's call. The leader sets the result on success, a
+        failure or early exit is passed on to the waiters."""
+        try:
+            yield
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+            # Cancelled or closed early, waiters must not hang or see GeneratorExit
+            if not future.done():
+                future.set_exception(
+                    RuntimeError("In-flight call ended without result")
+                )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._calls)
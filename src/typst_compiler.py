@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import typst
+
+logger = logging.getLogger(__name__)
+
+_MAX_CACHE_BYTES = 64 * 1024 * 1024
+_MAX_INDEXED_DOCUMENTS = 256
+_PREVIEW_PPI = 144.0
+# Broken sources are usually being edited, keep their errors only briefly
+_FAILURE_TTL_S = 30.0
+_MAX_FAILURES = 256
+# Errors that depend on the network or the package cache, not on the source
+_TRANSIENT_ERROR_RE = re.compile(
+    r"download|network|connect|timed? ?out|dns|package", re.IGNORECASE
+)
+
+
+class TypstCompileError(Exception):
+    """Raised when Typst source fails to compile."""
+
+
+class CompileCache:
+    """Thread-safe LRU of compiled outputs, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int = _MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+_cache = CompileCache()
+# Document key -> page keys in _cache, pages shared between documents are stored once
+_page_index: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+_page_index_lock = threading.Lock()
+# Key -> (error message, expiry) of sources that failed to compile
+_failures: OrderedDict[str, tuple[str, float]] = OrderedDict()
+_failures_lock = threading.Lock()
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _raise_cached_failure(key: str) -> None:
+    with _failures_lock:
+        failure = _failures.get(key)
+        if failure is not None and failure[1] <= time.monotonic():
+            del _failures[key]
+            failure = None
+    if failure is not None:
+        raise TypstCompileError(failure[0])
+
+
+def _compile_failed(key: str, error: RuntimeError) -> TypstCompileError:
+    """Remember a compile error for a short while, unless it may be transient."""
+    message = str(error)
+    logger.info(f"Typst compilation failed: {message}")
+    if not _TRANSIENT_ERROR_RE.search(message):
+        with _failures_lock:
+            _failures[key] = (message, time.monotonic() + _FAILURE_TTL_S)
+            _failures.move_to_end(key)
+            while len(_failures) > _MAX_FAILURES:
+                _failures.popitem(last=False)
+    return TypstCompileError(message)
+
+
+def compile_pdf(source: str) -> bytes:
+    """Compile Typst source to PDF bytes, reusing the cached output for unchanged sources.
+
+    The source is passed to typst in memory, so concurrent sessions never share files.
+    """
+    key = source_hash(source)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    _raise_cached_failure(key)
+    try:
+        pdf = typst.compile(source.encode("utf-8"))
+    except RuntimeError as e:
+        raise _compile_failed(key, e) from e
+    _cache.put(key, pdf)
+    return pdf
+
+
+def compile_pages(source: str, ppi: float = _PREVIEW_PPI) -> list[bytes]:
+    """Render Typst source to one PNG per page, cached per page by content hash.
+
+    Unchanged pages come back as the same bytes object, so Streamlit serves them
+    from the same media URL and the browser doesn't download them again.
+    """
+    doc_key = f"png:{ppi}:{source_hash(source)}"
+    with _page_index_lock:
+        page_keys = _page_index.get(doc_key)
+        if page_keys is not None:
+            _page_index.move_to_end(doc_key)
+    if page_keys is not None:
+        pages = [page for key in page_keys if (page := _cache.get(key)) is not None]
+        if len(pages) == len(page_keys):
+            return pages
+
+    _raise_cached_failure(doc_key)
+    try:
+        output = typst.compile(source.encode("utf-8"), format="png", ppi=ppi)
+    except RuntimeError as e:
+        raise _compile_failed(doc_key, e) from e
+
+    rendered = output if isinstance(output, list) else [output]
+    pages = []
+    page_keys = []
+    for page in rendered:
+        key = f"page:{hashlib.sha256(page).hexdigest()}"
+        # Reuse the cached object for pages that didn't change
+        cached = _cache.get(key)
+        if cached is None:
+            cached = page
+            _cache.put(key, page)
+        pages.append(cached)
+        page_keys.append(key)
+    with _page_index_lock:
+        _page_index[doc_key] = tuple(page_keys)
+        while len(_page_index) > _MAX_INDEXED_DOCUMENTS:
+            _page_index.popitem(last=False)
+    return pages
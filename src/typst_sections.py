@@ -0,0 +1,122 @@
+import difflib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.typst_compiler import source_hash
+
+_MAX_CACHED = 64
+
+_HEADING_RE = re.compile(r"^(=+)\s+(.*?)\s*$")
+# A line opening a top-level entry such as #work(...) or #edu(...)
+_ENTRY_RE = re.compile(r"^#(?!(import|include|set|let|show)\b)[A-Za-z_]")
+
+
+@dataclass(frozen=True)
+class Section:
+    # Heading text, empty for the preamble before the first heading
+    title: str
+    # Typst source of the section, heading line included
+    source: str
+
+
+@dataclass(frozen=True)
+class Change:
+    """Entries of a section that differ between two versions of a resume."""
+
+    section: str
+    # Empty when the entries were added
+    before: str
+    # Empty when the entries were removed
+    after: str
+
+    def to_prompt(self) -> str:
+        """The change as a line diff, the entries' unchanged lines kept as context."""
+        lines = difflib.ndiff(self.before.splitlines(), self.after.splitlines())
+        diff = "\n".join(line for line in lines if not line.startswith("? "))
+        return f"SECTION: {self.section or '(header)'}\n{diff}"
+
+
+_cache: OrderedDict[str, tuple[Section, ...]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _split(source: str) -> tuple[Section, ...]:
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    for line in source.splitlines():
+        heading = _HEADING_RE.match(line)
+        if heading is not None:
+            sections.append((heading.group(2), []))
+        sections[-1][1].append(line)
+    return tuple(
+        Section(title, "\n".join(lines))
+        for title, lines in sections
+        if title or any(line.strip() for line in lines)
+    )
+
+
+def split_sections(source: str) -> tuple[Section, ...]:
+    """Split Typst source at its headings, the preamble as a first untitled section.
+    Cached by content hash."""
+    key = source_hash(source)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    sections = _split(source)
+    with _cache_lock:
+        _cache[key] = sections
+        while len(_cache) > _MAX_CACHED:
+            _cache.popitem(last=False)
+    return sections
+
+
+def split_entries(section: Section) -> list[str]:
+    """Split a section at its top-level entries, bullets staying with their entry."""
+    entries: list[list[str]] = [[]]
+    for line in section.source.splitlines():
+        if _ENTRY_RE.match(line) and any(prev.strip() for prev in entries[-1]):
+            entries.append([])
+        entries[-1].append(line)
+    return ["\n".join(lines).strip() for lines in entries if any(lines)]
+
+
+def _keyed(source: str) -> dict[tuple[str, int], Section]:
+    """Sections by title and occurrence, for titles used more than once."""
+    keyed = {}
+    seen: dict[str, int] = {}
+    for section in split_sections(source):
+        n = seen.get(section.title, 0)
+        seen[section.title] = n + 1
+        keyed[(section.title, n)] = section
+    return keyed
+
+
+def diff_sections(old: str, new: str) -> list[Change]:
+    """Entries added, removed or edited between two versions of a Typst resume,
+    grouped by section in the new version's order."""
+    old_sections = _keyed(old)
+    new_sections = _keyed(new)
+    changes = []
+    for key in [*new_sections, *(k for k in old_sections if k not in new_sections)]:
+        old_entries = split_entries(old_sections[key]) if key in old_sections else []
+        new_entries = split_entries(new_sections[key]) if key in new_sections else []
+        matcher = difflib.SequenceMatcher(a=old_entries, b=new_entries, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                changes.append(
+                    Change(
+                        section=key[0],
+                        before="\n\n".join(old_entries[i1:i2]),
+                        after="\n\n".join(new_entries[j1:j2]),
+                    )
+                )
+    return changes
+
+
+def changed_ratio(changes: list[Change], old: str, new: str) -> float:
+    """Share of the resume covered by the changed entries."""
+    changed = sum(max(len(change.before), len(change.after)) for change in changes)
+    return changed / max(1, len(old), len(new))
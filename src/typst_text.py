@@ -0,0 +1,306 @@
+"""Reduce Typst resume source to the plain text and section structure a model needs.
+
+Usage:
+    python -m src.typst_text [resume.typ ...]
+
+Prints the input-token savings for each file, data/examples/*.typ by default.
+"""
+
+import re
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from src.providers.tokens import estimate_tokens
+from src.typst_compiler import source_hash
+
+_MAX_CACHED = 64
+_EXAMPLES_DIR = Path("data") / "examples"
+
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_CALL_RE = re.compile(r"#([A-Za-z_][\w.-]*)")
+_LET_RE = re.compile(r'#let\s+([\w-]+)\s*=\s*"((?:[^"\\]|\\.)*)"\s*$')
+_IDENT_RE = re.compile(r"[A-Za-z_][\w-]*")
+_NESTED_CALL_RE = re.compile(r"([A-Za-z_][\w.-]*)\((.*)\)", re.DOTALL)
+# Arguments about layout and styling, not content
+_STYLE_KEY_PARTS = (
+    "color",
+    "font",
+    "paper",
+    "position",
+    "size",
+    "margin",
+    "spacing",
+    "lang",
+    "leading",
+    "weight",
+    "fill",
+    "stroke",
+    "inset",
+    "width",
+    "height",
+    "align",
+)
+# Statements that only configure the document
+_SKIPPED_STATEMENTS = ("import", "include", "set", "let", "show")
+
+_cache: OrderedDict[str, str] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _string_end(src: str, i: int) -> int:
+    """Index just past the string literal opening at src[i]."""
+    i += 1
+    while i < len(src):
+        if src[i] == "\\":
+            i += 2
+            continue
+        if src[i] == '"':
+            return i + 1
+        i += 1
+    return len(src)
+
+
+def _group_end(src: str, i: int) -> int:
+    """Index just past the bracket group opening at src[i], strings skipped."""
+    depth = 0
+    while i < len(src):
+        char = src[i]
+        if char == '"':
+            i = _string_end(src, i)
+            continue
+        if char in _OPENERS:
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(src)
+
+
+def _statement_end(src: str, i: int) -> int:
+    """End of the code statement starting at src[i]: the end of its line, or later
+    when a bracket group spans several lines."""
+    while i < len(src) and src[i] != "\n":
+        if src[i] == '"':
+            i = _string_end(src, i)
+        elif src[i] in _OPENERS:
+            i = _group_end(src, i)
+        else:
+            i += 1
+    return i
+
+
+def _strip_comments(src: str) -> str:
+    out = []
+    i = 0
+    while i < len(src):
+        if src[i] == '"':
+            end = _string_end(src, i)
+            out.append(src[i:end])
+            i = end
+        elif src.startswith("//", i) and (i == 0 or src[i - 1] != ":"):
+            newline = src.find("\n", i)
+            i = len(src) if newline == -1 else newline
+        elif src.startswith("/*", i):
+            end = src.find("*/", i + 2)
+            i = len(src) if end == -1 else end + 2
+        else:
+            out.append(src[i])
+            i += 1
+    return "".join(out)
+
+
+def _split_args(args: str) -> list[str]:
+    parts = []
+    start = i = 0
+    while i < len(args):
+        if args[i] == '"':
+            i = _string_end(args, i)
+            continue
+        if args[i] in _OPENERS:
+            i = _group_end(args, i)
+            continue
+        if args[i] == ",":
+            parts.append(args[start:i])
+            start = i + 1
+        i += 1
+    parts.append(args[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _value(expr: str, bindings: dict[str, str]) -> str | None:
+    """Text of an argument value, None for anything that isn't content."""
+    if expr.startswith('"'):
+        return re.sub(r"\\(.)", r"\1", expr[1:-1]) or None
+    if expr.startswith("["):
+        return _inline(expr[1:-1], bindings) or None
+    if _IDENT_RE.fullmatch(expr):
+        return bindings.get(expr)
+    call = _NESTED_CALL_RE.fullmatch(expr)
+    if call is not None:
+        # e.g. dates-helper(start-date: "July 2024", end-date: "Present")
+        return " - ".join(_arg_values(call.group(2), bindings)) or None
+    return None
+
+
+def _arg_values(args: str, bindings: dict[str, str]) -> list[str]:
+    values = []
+    for arg in _split_args(args):
+        key, sep, expr = arg.partition(":")
+        if sep and _IDENT_RE.fullmatch(key.strip()):
+            if any(part in key for part in _STYLE_KEY_PARTS):
+                continue
+        else:
+            expr = arg
+        value = _value(expr.strip(), bindings)
+        if value is not None:
+            values.append(value)
+    return values
+
+
+def _call(src: str, i: int, bindings: dict[str, str]) -> tuple[str, int]:
+    """Text of the function call starting with '#' at src[i], and where it ends."""
+    match = _CALL_RE.match(src, i)
+    if match is None:
+        return "#", i + 1
+    end = match.end()
+    name = match.group(1)
+    args = []
+    if end < len(src) and src[end] == "(":
+        args_end = _group_end(src, end)
+        args = _arg_values(src[end + 1 : args_end - 1], bindings)
+        end = args_end
+    content = []
+    while end < len(src) and src[end] == "[":
+        content_end = _group_end(src, end)
+        content.append(_inline(src[end + 1 : content_end - 1], bindings))
+        end = content_end
+    if end == match.end():
+        # A bare reference such as #name
+        return bindings.get(name, ""), end
+    # Content wins over arguments: #link("https://...")[Acme] reads as Acme
+    return " | ".join(part for part in content or args if part), end
+
+
+def _inline(text: str, bindings: dict[str, str]) -> str:
+    """Plain text of a line of markup, inline calls replaced by their content."""
+    out = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "\\":
+            # Escaped character, or a forced line break before whitespace
+            escaped = text[i + 1 : i + 2]
+            out.append("" if escaped.isspace() else escaped)
+            i += 2
+        elif char == "#":
+            value, i = _call(text, i, bindings)
+            out.append(value)
+        elif char in "*~":
+            out.append(" " if char == "~" else "")
+            i += 1
+        elif char == "_" and (i == 0 or not text[i - 1].isalnum()):
+            end = text.find("_", i + 1)
+            if end == -1:
+                out.append(char)
+                i += 1
+            else:
+                out.append(text[i + 1 : end])
+                i = end + 1
+        else:
+            out.append(char)
+            i += 1
+    return re.sub(r"[ \t]+", " ", "".join(out)).strip()
+
+
+def _reduce(source: str) -> str:
+    src = _strip_comments(source)
+    bindings: dict[str, str] = {}
+    lines: list[str] = []
+    i = 0
+    while i < len(src):
+        line_end = src.find("\n", i)
+        if line_end == -1:
+            line_end = len(src)
+        line = src[i:line_end]
+        stripped = line.lstrip()
+        if not stripped.startswith("#"):
+            lines.append(_inline(line, bindings))
+            i = line_end + 1
+            continue
+
+        start = i + len(line) - len(stripped)
+        keyword = _IDENT_RE.match(stripped, 1)
+        if keyword is not None and keyword.group() in _SKIPPED_STATEMENTS:
+            end = _statement_end(src, start)
+            statement = src[start:end]
+            let = _LET_RE.match(statement)
+            if let is not None:
+                bindings[let.group(1)] = let.group(2)
+            elif keyword.group() == "show" and ".with(" in statement:
+                # #show: template.with(author: ..., email: ...) carries the header
+                args = statement[statement.index(".with(") + len(".with") :]
+                lines.append(" | ".join(_arg_values(args[1:-1], bindings)))
+            i = end + 1
+            continue
+
+        # A line of content starting with a call, which may span several lines
+        end = _statement_end(src, start)
+        lines.append(_inline(src[start:end], bindings))
+        i = end + 1
+
+    text = "\n".join(lines)
+    return re.sub(r"\n{3,}", "\n\n", text).strip() + "\n"
+
+
+def reduce_typst(source: str) -> str:
+    """Plain text and headings of a Typst resume, without imports, settings,
+    styling arguments and markup. Cached by content hash."""
+    key = source_hash(source)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    reduced = _reduce(source)
+    with _cache_lock:
+        _cache[key] = reduced
+        while len(_cache) > _MAX_CACHED:
+            _cache.popitem(last=False)
+    return reduced
+
+
+def savings_report(paths: list[Path]) -> list[dict]:
+    """Estimated input tokens of each resume as Typst and as reduced text."""
+    rows = []
+    for path in paths:
+        source = path.read_text(encoding="utf-8")
+        typst_tokens = estimate_tokens(source)
+        text_tokens = estimate_tokens(reduce_typst(source))
+        rows.append(
+            {
+                "resume": path.name,
+                "typst_tokens": typst_tokens,
+                "text_tokens": text_tokens,
+                "saved_pct": round(100 * (1 - text_tokens / typst_tokens), 1),
+            }
+        )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    paths = [Path(arg) for arg in args] or sorted(_EXAMPLES_DIR.glob("*.typ"))
+    for row in savings_report(paths):
+        print(
+            f"{row['resume']}: {row['typst_tokens']} -> {row['text_tokens']} "
+            f"estimated input tokens ({row['saved_pct']}% saved)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from anthropic.types import TextBlock
+
+from src.providers.anthropic_provider import AnthropicProvider
+
+
+@pytest.fixture
+def mock_anthropic_client():
+    with patch("src.providers.anthropic_provider.Anthropic") as mock_cls:
+        mock_client = MagicMock()
+        mock_cls.return_value = mock_client
+        yield mock_client
+
+
+def _make_response(text: str, cache_creation: int | None = None, cache_read=None):
+    resp = MagicMock()
+    resp.content = [TextBlock(type="text", text=text)]
+    resp.usage.input_tokens = 20
+    resp.usage.output_tokens = 5
+    resp.usage.cache_creation_input_tokens = cache_creation
+    resp.usage.cache_read_input_tokens = cache_read
+    return resp
+
+
+def test_complete_marks_system_and_prefix_as_cacheable(mock_anthropic_client):
+    mock_anthropic_client.messages.create.return_value = _make_response("ok")
+    provider = AnthropicProvider(api_key="sk-test")
+    provider.complete("sys", "JD: x", 100, user_prefix="RESUME: y")
+    kwargs = mock_anthropic_client.messages.create.call_args.kwargs
+    assert kwargs["system"][0]["cache_control"] == {"type": "ephemeral"}
+    prefix_block, user_block = kwargs["messages"][0]["content"]
+    assert prefix_block == {
+        "type": "text",
+        "text": "RESUME: y",
+        "cache_control": {"type": "ephemeral"},
+    }
+    assert user_block == {"type": "text", "text": "JD: x"}
+
+
+def test_complete_reports_cache_tokens(mock_anthropic_client):
+    mock_anthropic_client.messages.create.return_value = _make_response(
+        "ok", cache_creation=0, cache_read=1200
+    )
+    provider = AnthropicProvider(api_key="sk-test")
+    text, tokens = provider.complete("sys", "user", 100, user_prefix="prefix")
+    assert text == "ok"
+    assert tokens == {
+        "input": 1220,
+        "output": 5,
+        "cache_creation": 0,
+        "cache_read": 1200,
+    }
+
+
+def test_complete_without_prompt_caching_sends_plain_strings(mock_anthropic_client):
+    mock_anthropic_client.messages.create.return_value = _make_response("ok")
+    provider = AnthropicProvider(api_key="sk-test", prompt_caching=False)
+    provider.complete("sys", "JD: x", 100, user_prefix="RESUME: y\n\n")
+    kwargs = mock_anthropic_client.messages.create.call_args.kwargs
+    assert kwargs["system"] == "sys"
+    assert kwargs["messages"][0]["content"] == "RESUME: y\n\nJD: x"
+
+
+def test_missing_api_key_raises(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    with (
+        patch("src.providers.anthropic_provider.load_dotenv"),
+        pytest.raises(ValueError, match="Missing ANTHROPIC_API_KEY"),
+    ):
+        AnthropicProvider()
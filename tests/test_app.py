@@ -9,7 +9,16 @@ sys.modules.setdefault("streamlit", MagicMock())
 sys.modules.setdefault("typst", MagicMock())
 Path("data/logs").mkdir(parents=True, exist_ok=True)
 
-from app import extract_json, get_api_key  # noqa: E402
+from app import (  # noqa: E402
+    batch_row,
+    build_provider,
+    extract_json,
+    get_api_key,
+    rank_rows,
+    split_job_descriptions,
+)
+from src.processor import BatchItem  # noqa: E402
+from src.providers import HedgedProvider  # noqa: E402
 
 
 @pytest.fixture(autouse=True)
@@ -65,3 +74,82 @@ def test_get_api_key_returns_none_when_nothing_configured(monkeypatch):
     monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
     with patch("app.load_dotenv"):
         assert get_api_key() is None
+
+
+def test_build_provider_hedges_with_configured_backup(monkeypatch):
+    st = sys.modules["streamlit"]
+    st.secrets.__getitem__.side_effect = KeyError
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    state = {
+        "backup_provider_name": "openrouter",
+        "backup_model": "google/gemini-2.5-flash",
+        "backup_api_key": "sk-backup",
+    }
+    st.session_state.get.side_effect = lambda key, default=None: state.get(key, default)
+    with patch("app.load_dotenv"):
+        provider = build_provider("sk-primary")
+    assert isinstance(provider, HedgedProvider)
+    assert provider.provider_name == "anthropic"
+    assert provider.secondary.provider_name == "openrouter"
+
+
+def test_build_provider_without_backup_is_plain():
+    assert not isinstance(build_provider("sk-primary"), HedgedProvider)
+
+
+# batch mode
+
+
+def test_split_job_descriptions_on_separator_lines():
+    text = "Backend Engineer\nPython\n---\n\n  ---  \nData Scientist\n---\n"
+    assert split_job_descriptions(text) == [
+        "Backend Engineer\nPython",
+        "Data Scientist",
+    ]
+
+
+def test_batch_row_parses_score_and_title():
+    item: BatchItem = {
+        "index": 2,
+        "job_desc": "\nSenior Quant\nC++ required",
+        "result": {
+            "content": '{"score": 74, "main_fixes": "Add C++"}',
+            "tokens": {"input": 1, "output": 1},
+        },
+        "error": None,
+    }
+    row = batch_row(item)
+    assert row["Score"] == 74
+    assert row["Job"] == "Senior Quant"
+    assert row["Summary"] == "Add C++"
+    assert row["#"] == 3
+
+
+def test_batch_row_reports_errors():
+    item: BatchItem = {"index": 0, "job_desc": "JD", "result": None, "error": "timeout"}
+    row = batch_row(item)
+    assert row["Score"] is None
+    assert row["Status"] == "error: timeout"
+
+
+def test_rank_rows_puts_best_first_and_failures_last():
+    rows = [
+        {"Score": None, "#": 1},
+        {"Score": 60, "#": 2},
+        {"Score": 90, "#": 3},
+    ]
+    assert [r["#"] for r in rank_rows(rows)] == [3, 2, 1]
+
+
+def test_batch_row_flags_reused_near_duplicates():
+    item: BatchItem = {
+        "index": 0,
+        "job_desc": "Senior Quant",
+        "result": {
+            "content": '{"score": 74}',
+            "tokens": {"input": 0, "output": 0},
+            "near_duplicate": 0.92,
+        },
+        "error": None,
+    }
+    assert batch_row(item)["Status"] == "reused (92% similar)"
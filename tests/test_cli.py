@@ -0,0 +1,119 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from src.cli import ResultWriter, main, read_checkpoint, read_jobs, score_matrix
+from src.ranker import JobIndex
+
+
+def test_read_jobs_from_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "jobs.jsonl"
+    jsonl.write_text('{"id": "a", "job_desc": "Python dev"}\n\n{"text": "Go dev"}\n')
+    jobs = read_jobs(jsonl)
+    assert jobs[0] == ("a", "Python dev")
+    assert jobs[1][1] == "Go dev"
+    assert len(jobs[1][0]) == 12  # generated id
+
+    csv_path = tmp_path / "jobs.csv"
+    csv_path.write_text('id,description\nb,"Rust dev, remote"\n')
+    assert read_jobs(csv_path) == [("b", "Rust dev, remote")]
+
+
+def test_checkpoint_keeps_only_successful_rows(tmp_path):
+    out = tmp_path / "out.jsonl"
+    writer = ResultWriter(out)
+    writer.write({"resume": "R", "job_id": "1", "status": "ok"})
+    writer.write({"resume": "R", "job_id": "2", "status": "error"})
+    writer.close()
+    with out.open("a") as f:
+        f.write('{"resume": "R", "job_id": "3", "sta')  # interrupted write
+    assert read_checkpoint(out) == {("R", "1")}
+    writer = ResultWriter(out)
+    writer.write({"resume": "R", "job_id": "3", "status": "ok"})
+    writer.close()
+    assert read_checkpoint(out) == {("R", "1"), ("R", "3")}
+
+
+def test_checkpoint_round_trips_csv(tmp_path):
+    out = tmp_path / "out.csv"
+    for job_id in ("1", "2"):
+        writer = ResultWriter(out)
+        writer.write({"resume": "R", "job_id": job_id, "status": "ok"})
+        writer.close()
+    assert out.read_text().count("resume,job_id") == 1
+    assert read_checkpoint(out) == {("R", "1"), ("R", "2")}
+
+
+def test_score_matrix_skips_done_pairs(tmp_path):
+    resume = tmp_path / "cv.typ"
+    resume.write_text("= CV")
+    processor = MagicMock()
+    processor.analyze_many.side_effect = lambda resume, job_descs, **kw: [
+        {
+            "index": i,
+            "job_desc": jd,
+            "result": {"content": '{"score": 70}', "tokens": {}},
+            "error": None,
+        }
+        for i, jd in enumerate(job_descs)
+    ]
+    rows = list(
+        score_matrix(
+            processor,
+            {"Cv": str(resume)},
+            [("1", "JD one"), ("2", "JD two")],
+            "score",
+            done={("Cv", "1")},
+            max_workers=2,
+        )
+    )
+    assert rows == [
+        {
+            "resume": "Cv",
+            "job_id": "2",
+            "score": 70,
+            "status": "ok",
+            "error": None,
+            "content": '{"score": 70}',
+        }
+    ]
+    assert processor.analyze_many.call_args.args[1] == ["JD two"]
+
+
+def test_main_fails_without_api_key(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text(json.dumps({"job_desc": "x"}))
+    with patch("src.cli.load_dotenv"):
+        code = main(["--jobs", str(jobs), "--output", str(tmp_path / "o.jsonl")])
+    assert code == 2
+    assert "ANTHROPIC_API_KEY" in capsys.readouterr().err
+
+
+def test_score_matrix_sends_only_top_k_ranked_jobs(tmp_path):
+    resume = tmp_path / "cv.typ"
+    resume.write_text("= CV\nPython, Kubernetes and SQL")
+    jobs = [
+        ("1", "Pastry chef, croissants"),
+        ("2", "Python and Kubernetes engineer"),
+        ("3", "Accountant, SQL reporting"),
+    ]
+    index = JobIndex(tmp_path / "index.npz")
+    index.add(jobs)
+    processor = MagicMock()
+    processor.analyze_many.return_value = []
+    list(
+        score_matrix(
+            processor,
+            {"Cv": str(resume)},
+            jobs,
+            "score",
+            done=set(),
+            max_workers=2,
+            index=index,
+            top_k=2,
+        )
+    )
+    assert processor.analyze_many.call_args.args[1] == [
+        "Python and Kubernetes engineer",
+        "Accountant, SQL reporting",
+    ]
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.providers import client_pool
+from src.providers.factory import create_provider
+from src.providers.openai_compatible_provider import OpenAICompatibleProvider
+
+
+@pytest.fixture(autouse=True)
+def empty_pool():
+    with (
+        patch.dict(client_pool._clients, clear=True),
+        patch.dict(client_pool._http_clients, clear=True),
+        patch.dict(client_pool._async_clients, clear=True),
+    ):
+        yield
+
+
+def test_same_key_reuses_client():
+    first = client_pool.get_anthropic_client("sk-a")
+    assert client_pool.get_anthropic_client("sk-a") is first
+    assert client_pool.get_anthropic_client("sk-b") is not first
+
+
+def test_openai_clients_are_keyed_by_base_url():
+    mistral = client_pool.get_openai_client("mistral", "k", "https://a.example/v1")
+    other = client_pool.get_openai_client("mistral", "k", "https://b.example/v1")
+    assert mistral is not other
+    assert client_pool.get_openai_client("mistral", "k", "https://a.example/v1") is (
+        mistral
+    )
+
+
+def test_pool_does_not_store_raw_api_keys():
+    client_pool.get_openai_client("openai", "sk-secret")
+    assert all("sk-secret" not in key for key in client_pool._clients)
+
+
+def test_create_provider_shares_client_across_models():
+    first = create_provider("openrouter", "sk-or", "google/gemini-2.5-pro")
+    second = create_provider("openrouter", "sk-or", "x-ai/grok-4-fast")
+    assert isinstance(first, OpenAICompatibleProvider)
+    assert isinstance(second, OpenAICompatibleProvider)
+    assert first._client is second._client
+    assert first.model != second.model
+
+
+def test_warm_up_sends_head_to_provider_base_url():
+    with patch("httpx.Client.head") as mock_head:
+        client_pool.warm_up("mistral", "k", "https://api.mistral.ai/v1")
+        for thread in threading.enumerate():
+            if thread.name == "provider-warm-up":
+                thread.join()
+    mock_head.assert_called_once_with("https://api.mistral.ai/v1/")
+
+
+def test_async_clients_are_pooled_only_on_the_pooled_loop():
+    async def get_clients():
+        return (
+            client_pool.get_async_openai_client("openai", "sk-a"),
+            client_pool.get_async_openai_client("openai", "sk-a"),
+        )
+
+    loop = asyncio.new_event_loop()
+    try:
+        with patch("src.providers.client_pool._async_loop", loop):
+            first, second = loop.run_until_complete(get_clients())
+            assert asyncio.run(get_clients()) == (None, None)
+    finally:
+        loop.close()
+    assert first is not None
+    assert first is second
+
+
+def test_providers_share_the_pooled_async_client():
+    loop = asyncio.new_event_loop()
+    first = create_provider("openai", "sk-a", "gpt-4o")
+    second = create_provider("openai", "sk-a", "gpt-4o-mini")
+    assert isinstance(first, OpenAICompatibleProvider)
+    assert isinstance(second, OpenAICompatibleProvider)
+
+    async def get_clients():
+        return first._get_async_client(), second._get_async_client()
+
+    try:
+        with patch("src.providers.client_pool._async_loop", loop):
+            pooled = loop.run_until_complete(get_clients())
+    finally:
+        loop.close()
+    assert pooled[0] is pooled[1]
@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections.abc import Generator
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import openai
+import pytest
+
+from src.providers.base import BaseProvider, served_by
+from src.providers.hedged import (
+    HedgedProvider,
+    LatencyWindow,
+    is_retryable,
+    latency_window,
+)
+
+
+class FakeProvider(BaseProvider):
+    def __init__(self, name: str, delay: float = 0.0, error: Exception | None = None):
+        self.provider_name = name
+        self.model = f"{name}-model"
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    def complete(self, system, user, max_tokens, user_prefix=""):
+        raise NotImplementedError
+
+    async def acomplete(self, system, user, max_tokens, user_prefix=""):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return f"from {self.provider_name}", {"input": 10, "output": 5}
+
+    def stream(
+        self, system, user, max_tokens, user_prefix=""
+    ) -> Generator[str, None, dict[str, int]]:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        try:
+            yield f"from {self.provider_name}"
+        except GeneratorExit:
+            self.cancelled = True
+            raise
+        return {"input": 10, "output": 5}
+
+
+def _server_error() -> openai.InternalServerError:
+    request = httpx.Request("POST", "https://api.example.com")
+    return openai.InternalServerError(
+        "overloaded", response=httpx.Response(503, request=request), body=None
+    )
+
+
+def _bad_request() -> openai.BadRequestError:
+    request = httpx.Request("POST", "https://api.example.com")
+    return openai.BadRequestError(
+        "bad", response=httpx.Response(400, request=request), body=None
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_latency_windows(monkeypatch):
+    monkeypatch.setattr("src.providers.hedged._windows", {})
+
+
+def test_is_retryable_only_for_server_errors_and_timeouts():
+    assert is_retryable(_server_error())
+    assert is_retryable(TimeoutError())
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert not is_retryable(_bad_request())
+    assert not is_retryable(ValueError("no text"))
+
+
+def test_latency_window_needs_enough_samples():
+    window = LatencyWindow()
+    for i in range(9):
+        window.add(float(i))
+    assert window.percentile(0.95) is None
+    for i in range(9, 100):
+        window.add(float(i))
+    assert window.percentile(0.95) == 95.0
+
+
+def test_fast_primary_wins_without_hedging():
+    primary, secondary = FakeProvider("primary"), FakeProvider("secondary")
+    provider = HedgedProvider(primary, secondary, hedge_after_s=1.0)
+    text, tokens = asyncio.run(provider.acomplete("sys", "user", 100))
+    assert text == "from primary"
+    assert secondary.calls == 0
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary = FakeProvider("primary", delay=5.0)
+    secondary = FakeProvider("secondary", delay=0.01)
+    provider = HedgedProvider(primary, secondary, hedge_after_s=0.05)
+    text, _ = provider.complete("sys", "user", 100)
+    assert text == "from secondary"
+    assert served_by.get() == ("secondary", "secondary-model")
+    assert primary.cancelled
+
+
+def test_hedge_delay_follows_observed_p95():
+    window = latency_window("primary", "primary-model")
+    for _ in range(20):
+        window.add(0.2)
+    provider = HedgedProvider(
+        FakeProvider("primary"), FakeProvider("secondary"), hedge_after_s=30.0
+    )
+    assert provider.hedge_after() == 0.2
+
+
+def test_server_error_fails_over_immediately():
+    primary = FakeProvider("primary", error=_server_error())
+    secondary = FakeProvider("secondary")
+    provider = HedgedProvider(primary, secondary, hedge_after_s=30.0)
+    text, _ = asyncio.run(provider.acomplete("sys", "user", 100))
+    assert text == "from secondary"
+
+
+def test_client_error_is_not_retried():
+    primary = FakeProvider("primary", error=_bad_request())
+    secondary = FakeProvider("secondary")
+    provider = HedgedProvider(primary, secondary)
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(provider.acomplete("sys", "user", 100))
+    assert secondary.calls == 0
+
+
+def test_both_failing_raises_last_error():
+    provider = HedgedProvider(
+        FakeProvider("primary", error=_server_error()),
+        FakeProvider("secondary", error=TimeoutError("slow")),
+    )
+    with pytest.raises(TimeoutError):
+        asyncio.run(provider.acomplete("sys", "user", 100))
+
+
+def test_stream_fails_over_before_first_chunk():
+    provider = HedgedProvider(
+        FakeProvider("primary", error=_server_error()), FakeProvider("secondary")
+    )
+    stream = provider.stream("sys", "user", 100)
+    assert list(stream) == ["from secondary"]
+    assert served_by.get() == ("secondary", "secondary-model")
+
+
+def test_stream_hedges_a_slow_first_chunk():
+    primary = FakeProvider("primary", delay=0.5)
+    secondary = FakeProvider("secondary", delay=0.01)
+    provider = HedgedProvider(primary, secondary, hedge_after_s=0.05)
+    stream = provider.stream("sys", "user", 100)
+    assert list(stream) == ["from secondary"]
+    assert served_by.get() == ("secondary", "secondary-model")
+    # The primary's stream is closed once its first chunk arrives
+    time.sleep(0.6)
+    assert primary.cancelled
+
+
+def test_stream_keeps_a_fast_primary_and_records_its_latency():
+    primary = FakeProvider("primary", delay=0.01)
+    secondary = FakeProvider("secondary")
+    provider = HedgedProvider(primary, secondary, hedge_after_s=1.0)
+    assert list(provider.stream("sys", "user", 100)) == ["from primary"]
+    assert served_by.get() == ("primary", "primary-model")
+    assert secondary.calls == 0
+    assert len(latency_window("primary", "primary-model")._samples) == 1
+    first_chunk = latency_window("primary", "primary-model", first_chunk=True)
+    assert len(first_chunk._samples) == 1
+
+
+def test_hedge_waits_for_the_secondary_rate_limiter():
+    primary = FakeProvider("primary", delay=5.0)
+    secondary = FakeProvider("secondary", delay=0.01)
+    provider = HedgedProvider(primary, secondary, hedge_after_s=0.05)
+    with patch("src.providers.hedged.get_rate_limiter") as mock_get:
+        mock_get.return_value.aacquire = AsyncMock(return_value=0.0)
+        asyncio.run(provider.acomplete("sys", "user", 100, user_prefix="RESUME"))
+    mock_get.assert_called_once_with("secondary")
+    mock_get.return_value.aacquire.assert_awaited_once()
@@ -0,0 +1,82 @@
+from src.job_description import core_text, split_sections, trim_job_description
+from src.providers.tokens import estimate_tokens
+
+_JD = """Senior Python Engineer
+
+About us
+We are a fast-growing fintech with offices in 12 countries.
+
+Responsibilities:
+- Build services in Python
+- Own Kubernetes deployments
+
+Requirements
+- 5+ years of Python
+- AWS
+
+What we offer
+- Health insurance
+- Free lunch
+
+We are an equal opportunity employer and value diversity."""
+
+
+def test_split_sections_starts_a_section_at_each_heading():
+    sections = split_sections(_JD)
+    assert [s.splitlines()[0] for s in sections] == [
+        "Senior Python Engineer",
+        "About us",
+        "Responsibilities:",
+        "Requirements",
+        "What we offer",
+    ]
+    assert sections[-1].endswith("value diversity.")
+
+
+def test_trim_returns_text_within_budget_unchanged():
+    assert trim_job_description(_JD, 1000, estimate_tokens) == (_JD, [])
+
+
+def test_trim_drops_boilerplate_sections_from_the_end_first():
+    budget = estimate_tokens(_JD) - 10
+    trimmed, removed = trim_job_description(_JD, budget, estimate_tokens)
+    assert removed == ["What we offer"]
+    assert "Free lunch" not in trimmed
+    assert "About us" in trimmed
+    assert estimate_tokens(trimmed) <= budget
+
+
+def test_trim_keeps_requirements_and_drops_all_boilerplate():
+    trimmed, removed = trim_job_description(_JD, 45, estimate_tokens)
+    assert removed == ["What we offer", "About us"]
+    assert "5+ years of Python" in trimmed
+    assert "Build services in Python" in trimmed
+
+
+def test_trim_cuts_the_text_when_boilerplate_is_not_enough():
+    trimmed, removed = trim_job_description(_JD, 20, estimate_tokens)
+    assert removed[-1] == "end of the text"
+    assert trimmed.startswith("Senior Python Engineer")
+    assert trimmed.endswith("[...]")
+    assert estimate_tokens(trimmed) <= 20
+
+
+def test_core_text_keeps_roles_named_after_boilerplate_topics():
+    job_desc = """Benefits Analyst
+
+Privacy Engineer duties
+- Review data flows
+
+Benefits
+- Health insurance"""
+    core = core_text(job_desc)
+    assert core.startswith("Benefits Analyst")
+    assert "Privacy Engineer duties" in core
+    assert "Health insurance" not in core
+
+
+def test_trim_never_drops_the_first_section():
+    job_desc = "About us\nPrivacy Engineer at a fintech.\n\nPerks & Benefits\n- Gym"
+    trimmed, removed = trim_job_description(job_desc, 8, estimate_tokens)
+    assert removed[0] == "Perks & Benefits"
+    assert trimmed.startswith("About us")
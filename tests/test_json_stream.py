@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from src.json_stream import IncrementalJSONParser, extract_json_array
+
+_RESPONSE = {
+    "score": 78,
+    "missing_keywords": ["Kubernetes", 'gRPC "v2"'],
+    "hard_filter_risk": {"level": "medium", "reasoning": "No {cloud} cert"},
+    "improvements": [{"section": "Skills", "comment": "Add Kubernetes, [k8s]"}],
+}
+
+
+def test_parser_emits_keys_in_order_char_by_char():
+    parser = IncrementalJSONParser()
+    emitted = []
+    for c in json.dumps(_RESPONSE, indent=2):
+        emitted.extend(parser.feed(c))
+    assert [k for k, _ in emitted] == list(_RESPONSE)
+    assert parser.result == _RESPONSE
+    assert parser.done
+
+
+def test_parser_emits_score_before_rest_arrives():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"score": 9') == []
+    assert parser.feed('1, "missing_keywords": ["Go"') == [("score", 91)]
+    assert parser.feed("]") == [("missing_keywords", ["Go"])]
+    assert not parser.done
+
+
+def test_parser_skips_markdown_fence_and_chatter():
+    parser = IncrementalJSONParser()
+    text = 'Here you go:\n```json\n{"score": 70, "improvements": []}\n```'
+    emitted = parser.feed(text[:25]) + parser.feed(text[25:])
+    assert emitted == [("score", 70), ("improvements", [])]
+    assert parser.done
+
+
+def test_parser_buffer_only_holds_current_token():
+    parser = IncrementalJSONParser()
+    parser.feed('{"score": 70, "missing_keywords": ["a", ')
+    assert parser._buf == '["a", '
+
+
+def test_parser_raises_on_invalid_value():
+    parser = IncrementalJSONParser()
+    with pytest.raises(ValueError, match="score"):
+        parser.feed('{"score": 7x, ')
+
+
+def test_extract_json_array_skips_surrounding_text():
+    assert extract_json_array('Here:\n```json\n[{"job": 1}]\n```') == [{"job": 1}]
+    with pytest.raises(ValueError):
+        extract_json_array('{"score": 80}')
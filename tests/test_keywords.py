@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from src.keywords import KeywordIndex, match_keywords, merge_missing, tokenize
+
+
+def test_tokenize_keeps_tech_punctuation():
+    assert tokenize('Node.js, C++, C# & .NET. #work(title: "P&L")') == (
+        "node.js",
+        "c++",
+        "c#",
+        ".net",
+        "work",
+        "title",
+        "p&l",
+    )
+
+
+def test_tokenize_splits_slashes_and_hyphens():
+    assert tokenize("Python/Django, AWS/GCP, Kubernetes-based CI/CD") == (
+        "python",
+        "django",
+        "aws",
+        "gcp",
+        "kubernetes",
+        "based",
+        "ci",
+        "cd",
+    )
+
+
+def test_match_keywords_finds_terms_in_slashed_and_hyphenated_words():
+    vocabulary = ("Python", "AWS", "Kubernetes", "CI/CD", "scikit-learn", "C++")
+    job_desc = "Python, AWS, Kubernetes, CI/CD, scikit-learn and C++"
+    resume = "Python/Django on AWS/GCP, Kubernetes-based CI/CD, scikit-learn, C++"
+    with patch("src.keywords.load_keywords", return_value=vocabulary):
+        match = match_keywords(resume, job_desc)
+    assert match.missing == ()
+    assert set(match.present) == set(vocabulary)
+
+
+def test_index_finds_overlapping_multi_word_terms():
+    index = KeywordIndex(["machine learning", "learning", "deep learning"])
+    tokens = tokenize("Deep learning and machine learning")
+    assert index.find(tokens) == [
+        (1, "deep learning"),
+        (1, "learning"),
+        (4, "machine learning"),
+        (4, "learning"),
+    ]
+
+
+def test_index_matches_whole_tokens_only():
+    index = KeywordIndex(["Java"])
+    assert index.find(tokenize("JavaScript and Java")) == [(2, "Java")]
+
+
+def test_match_keywords_orders_missing_by_frequency():
+    vocabulary = ("Python", "Docker", "Kubernetes", "AWS")
+    job_desc = "AWS, Kubernetes and Python. Kubernetes on AWS, Kubernetes again."
+    with patch("src.keywords.load_keywords", return_value=vocabulary):
+        match = match_keywords("Python developer", job_desc)
+    assert match.present == ("Python",)
+    assert match.missing == ("Kubernetes", "AWS")
+    assert "Missing: Kubernetes, AWS" in match.to_prompt()
+
+
+def test_match_keywords_without_known_terms_has_no_prompt():
+    with patch("src.keywords.load_keywords", return_value=("Python",)):
+        assert match_keywords("resume", "Sales role").to_prompt() == ""
+
+
+def test_merge_missing_keeps_local_terms_first():
+    assert merge_missing(["Kubernetes", "AWS"], ["aws", "Terraform"]) == [
+        "Kubernetes",
+        "AWS",
+        "Terraform",
+    ]
@@ -1,7 +1,7 @@
 import sqlite3
 from unittest.mock import patch
 
-from src.llm_logger import log_llm_call
+from src.llm_logger import flush, log_llm_call, read_calls_since
 
 
 def test_log_inserts_row(tmp_path):
@@ -17,6 +17,7 @@ def test_log_inserts_row(tmp_path):
             input_tokens=100,
             output_tokens=50,
         )
+        flush()
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     rows = conn.execute("SELECT * FROM llm_logs").fetchall()
@@ -37,6 +38,7 @@ def test_log_handles_none_fields(tmp_path):
             status="error",
             error_message="timeout",
         )
+        flush()
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     rows = conn.execute("SELECT * FROM llm_logs").fetchall()
@@ -44,3 +46,77 @@ def test_log_handles_none_fields(tmp_path):
     assert len(rows) == 1
     assert rows[0]["error_message"] == "timeout"
     assert rows[0]["provider"] == "anthropic"  # default
+
+
+def test_log_records_cache_status(tmp_path):
+    db_path = tmp_path / "logs" / "history.db"
+    with patch("src.llm_logger._DB_PATH", db_path):
+        log_llm_call(
+            feature="full",
+            model="claude-sonnet-4-6",
+            duration_ms=3,
+            status="success",
+            cache_status="hit",
+        )
+        flush()
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT * FROM llm_logs").fetchone()
+    conn.close()
+    assert row["cache_status"] == "hit"
+
+
+def test_log_batches_many_rows(tmp_path):
+    db_path = tmp_path / "logs" / "history.db"
+    with patch("src.llm_logger._DB_PATH", db_path):
+        for i in range(250):
+            log_llm_call(feature="score", model="m", duration_ms=i, status="success")
+        flush()
+    conn = sqlite3.connect(db_path)
+    count = conn.execute("SELECT COUNT(*) FROM llm_logs").fetchone()[0]
+    conn.close()
+    assert count == 250
+
+
+def test_log_migrates_old_schema(tmp_path):
+    db_path = tmp_path / "logs" / "history.db"
+    db_path.parent.mkdir(parents=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE llm_logs (id INTEGER PRIMARY KEY, ts TEXT, feature TEXT, "
+        "resume_filename TEXT, model TEXT, input_tokens INTEGER, "
+        "output_tokens INTEGER, duration_ms INTEGER, status TEXT, "
+        "error_message TEXT)"
+    )
+    conn.commit()
+    conn.close()
+    with patch("src.llm_logger._DB_PATH", db_path):
+        log_llm_call(feature="full", model="m", duration_ms=1, status="success")
+        flush()
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT * FROM llm_logs").fetchone()
+    conn.close()
+    assert row["provider"] == "anthropic"
+    assert row["cache_status"] is None
+
+
+def test_read_calls_since_skips_cache_hits_and_old_rows(tmp_path):
+    db_path = tmp_path / "logs" / "history.db"
+    with patch("src.llm_logger._DB_PATH", db_path):
+        assert read_calls_since(0) == []
+        for cache_status in (None, "miss", "hit", "coalesced", "miss"):
+            log_llm_call(
+                feature="score",
+                model="claude-haiku-4-5-20251001",
+                duration_ms=800,
+                status="success",
+                cache_status=cache_status,
+            )
+        flush()
+        rows = read_calls_since(0)
+        assert [row["id"] for row in rows] == [1, 2, 5]
+        assert [row["id"] for row in read_calls_since(2)] == [5]
+        # Newest rows first when there are more than limit
+        assert [row["id"] for row in read_calls_since(0, limit=2)] == [2, 5]
+    assert rows[0]["model"] == "claude-haiku-4-5-20251001"
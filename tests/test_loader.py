@@ -1,6 +1,15 @@
+import os
+from unittest.mock import patch
+
 import pytest
 
-from src.loader import get_resumes, load_prompt, load_resume
+from src.loader import (
+    get_resumes,
+    load_keywords,
+    load_prompt,
+    load_resume,
+    preload_prompts,
+)
 
 
 def test_get_resumes_missing_dir(tmp_path, monkeypatch):
@@ -50,3 +59,56 @@ def test_load_prompt_returns_content(tmp_path, monkeypatch):
     prompts.mkdir(parents=True)
     (prompts / "my_prompt.txt").write_text("you are helpful")
     assert load_prompt("my_prompt") == "you are helpful"
+
+
+def test_load_prompt_reads_file_once_while_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    prompts = tmp_path / "data" / "prompts"
+    prompts.mkdir(parents=True)
+    (prompts / "cached.txt").write_text("v1")
+    monkeypatch.setattr("src.loader._PROMPT_REVALIDATE_S", 0)
+    assert load_prompt("cached") == "v1"
+    with patch("pathlib.Path.read_text") as mock_read:
+        assert load_prompt("cached") == "v1"
+    mock_read.assert_not_called()
+
+
+def test_load_prompt_picks_up_edits(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    prompts = tmp_path / "data" / "prompts"
+    prompts.mkdir(parents=True)
+    prompt = prompts / "edited.txt"
+    prompt.write_text("v1")
+    monkeypatch.setattr("src.loader._PROMPT_REVALIDATE_S", 0)
+    assert load_prompt("edited") == "v1"
+    prompt.write_text("version 2")
+    assert load_prompt("edited") == "version 2"
+
+
+def test_get_resumes_sees_new_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    personal = tmp_path / "data" / "personal"
+    personal.mkdir(parents=True)
+    (personal / "first.typ").write_text("content")
+    assert list(get_resumes()) == ["First"]
+    (personal / "second.typ").write_text("content")
+    os.utime(personal, ns=(0, personal.stat().st_mtime_ns + 1_000_000))
+    assert sorted(get_resumes()) == ["First", "Second"]
+
+
+def test_preload_prompts_returns_read_only_bundle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    prompts = tmp_path / "data" / "prompts"
+    prompts.mkdir(parents=True)
+    (prompts / "a.txt").write_text("A")
+    bundle = preload_prompts()
+    assert bundle == {"a": "A"}
+    with pytest.raises(TypeError):
+        bundle["a"] = "B"  # ty: ignore[invalid-assignment]
+
+
+def test_load_keywords_skips_comments_and_duplicates(tmp_path):
+    path = tmp_path / "keywords.txt"
+    path.write_text("# Languages\nPython\n\n  SQL  \nPython\n", encoding="utf-8")
+    with patch("src.loader._KEYWORDS_PATH", path):
+        assert load_keywords() == ("Python", "SQL")
@@ -0,0 +1,103 @@
+from src.near_duplicates import NearDuplicateIndex, minhash, similarity
+
+_JD = """Senior Python Engineer
+
+About us
+We are Acme, a fast-growing fintech with offices in 12 countries.
+
+Responsibilities:
+- Build backend services in Python and FastAPI for our payments platform
+- Own Kubernetes deployments and observability with Prometheus and Grafana
+- Mentor junior engineers and review code across teams
+- Work with product managers to scope new features for merchants
+
+Requirements
+- 5+ years of Python experience building production systems
+- Experience with AWS, Terraform and PostgreSQL at scale
+"""
+
+# Another board: new blurb, reordered bullets, tracking footer
+_REPOST = (
+    _JD.replace(
+        "We are Acme, a fast-growing fintech with offices in 12 countries.",
+        "Acme Corp builds the future of payments for everyone.",
+    ).replace(
+        "- Mentor junior engineers and review code across teams\n"
+        "- Work with product managers to scope new features for merchants",
+        "- Work with product managers to scope new features for merchants\n"
+        "- Mentor junior engineers and review code across teams",
+    )
+    + "\nApply at https://jobs.example.com/?utm_source=board\n"
+)
+
+_OTHER = """Data Scientist
+
+- Machine learning and statistics for pricing
+- SQL, dbt and Tableau dashboards
+- A/B testing with product teams
+"""
+
+
+def _signature(text: str) -> list[int]:
+    signature = minhash(text)
+    assert signature is not None
+    return signature
+
+
+def test_similarity_is_high_for_reposts_and_low_for_other_jobs():
+    signature = _signature(_JD)
+    assert similarity(signature, _signature(_JD)) == 1.0
+    assert similarity(signature, _signature(_REPOST)) >= 0.8
+    assert similarity(signature, _signature(_OTHER)) < 0.2
+
+
+_BOILERPLATE = """
+Benefits
+- Health, dental and vision insurance from day one
+- 401(k) matching and a yearly learning budget
+
+Equal Opportunity Employer
+We welcome applicants of every background and do not discriminate.
+"""
+
+
+def test_mostly_boilerplate_postings_are_not_fingerprinted(tmp_path):
+    index = NearDuplicateIndex(db_path=tmp_path / "history.db")
+    benefits_analyst = "Benefits Analyst\nRemote\n" + _BOILERPLATE
+    inclusion_lead = "Diversity and Inclusion Lead\nHybrid\n" + _BOILERPLATE
+    assert minhash(benefits_analyst) is None
+    index.add("ctx", benefits_analyst, "result", {"input": 10, "output": 5})
+    assert index.find("ctx", inclusion_lead) is None
+    assert index.find("ctx", benefits_analyst) is None
+
+
+def test_find_returns_stored_result_of_a_repost(tmp_path):
+    index = NearDuplicateIndex(db_path=tmp_path / "history.db")
+    index.add("ctx", _JD, "result", {"input": 10, "output": 5})
+    match = index.find("ctx", _REPOST)
+    assert match is not None
+    assert match.content == "result"
+    assert match.tokens == {"input": 10, "output": 5}
+    assert match.similarity >= 0.8
+
+
+def test_find_ignores_other_jobs_and_other_contexts(tmp_path):
+    index = NearDuplicateIndex(db_path=tmp_path / "history.db")
+    index.add("ctx", _JD, "result", {"input": 10, "output": 5})
+    assert index.find("ctx", _OTHER) is None
+    assert index.find("other resume", _JD) is None
+
+
+def test_find_ignores_expired_entries(tmp_path):
+    index = NearDuplicateIndex(db_path=tmp_path / "history.db", ttl_seconds=-1)
+    index.add("ctx", _JD, "result", {"input": 10, "output": 5})
+    assert index.find("ctx", _JD) is None
+
+
+def test_add_evicts_oldest_entries(tmp_path):
+    index = NearDuplicateIndex(db_path=tmp_path / "history.db", max_entries=1)
+    index.add("ctx", _JD, "old", {"input": 1, "output": 1})
+    index.add("ctx", _OTHER, "new", {"input": 1, "output": 1})
+    assert index.find("ctx", _JD) is None
+    match = index.find("ctx", _OTHER)
+    assert match is not None and match.content == "new"
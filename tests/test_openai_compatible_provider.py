@@ -1,5 +1,8 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+import openai
 import pytest
 
 from src.providers.openai_compatible_provider import OpenAICompatibleProvider
@@ -60,3 +63,99 @@ def test_complete_raises_on_none_content(mock_openai_client):
     provider = OpenAICompatibleProvider(api_key="sk-test", model="gpt-4o")
     with pytest.raises(ValueError, match="No text content"):
         provider.complete("sys", "user", 100)
+
+
+def test_acomplete_uses_async_client(mock_openai_client):
+    with patch("src.providers.openai_compatible_provider.AsyncOpenAI") as mock_cls:
+        async_client = MagicMock()
+        async_client.chat.completions.create = AsyncMock(
+            return_value=_make_response("async hello")
+        )
+        mock_cls.return_value = async_client
+        provider = OpenAICompatibleProvider(api_key="sk-test", model="gpt-4o")
+        text, tokens = asyncio.run(provider.acomplete("sys", "user", 100))
+    assert text == "async hello"
+    assert tokens == {"input": 10, "output": 5}
+    mock_openai_client.chat.completions.create.assert_not_called()
+
+
+def test_async_client_is_created_on_first_acomplete(mock_openai_client):
+    with patch("src.providers.openai_compatible_provider.AsyncOpenAI") as mock_cls:
+        mock_cls.return_value.chat.completions.create = AsyncMock(
+            return_value=_make_response("async hello")
+        )
+        provider = OpenAICompatibleProvider(api_key="sk-test", model="gpt-4o")
+        mock_cls.assert_not_called()
+        asyncio.run(provider.acomplete("sys", "user", 100))
+        asyncio.run(provider.acomplete("sys", "user", 100))
+    mock_cls.assert_called_once_with(api_key="sk-test", base_url=None)
+
+
+def _make_chunk(content: str | None, usage=None):
+    chunk = MagicMock()
+    chunk.choices = [] if content is None else [MagicMock()]
+    if content is not None:
+        chunk.choices[0].delta.content = content
+    chunk.usage = usage
+    return chunk
+
+
+def _drain(gen):
+    chunks = []
+    while True:
+        try:
+            chunks.append(next(gen))
+        except StopIteration as stop:
+            return chunks, stop.value
+
+
+def test_stream_yields_chunks_and_returns_usage(mock_openai_client):
+    usage = MagicMock(prompt_tokens=12, completion_tokens=3)
+    mock_openai_client.chat.completions.create.return_value = iter(
+        [_make_chunk("hel"), _make_chunk("lo"), _make_chunk(None, usage=usage)]
+    )
+    provider = OpenAICompatibleProvider(api_key="sk-test", model="gpt-4o")
+    chunks, tokens = _drain(provider.stream("sys", "user", 100))
+    assert chunks == ["hel", "lo"]
+    assert tokens == {"input": 12, "output": 3}
+    assert mock_openai_client.chat.completions.create.call_args.kwargs["stream"]
+
+
+def test_stream_without_usage_chunk_estimates_tokens(mock_openai_client):
+    mock_openai_client.chat.completions.create.return_value = iter(
+        [_make_chunk("hel"), _make_chunk("lo")]
+    )
+    provider = OpenAICompatibleProvider(api_key="sk-test", model="gpt-4o")
+    chunks, tokens = _drain(provider.stream("sys", "user " * 40, 100))
+    assert chunks == ["hel", "lo"]
+    assert tokens["input"] > 40
+    assert tokens["output"] >= 1
+
+
+def test_stream_retries_without_rejected_stream_options(mock_openai_client):
+    request = httpx.Request("POST", "https://api.example.com")
+    rejected = openai.BadRequestError(
+        "Unrecognized request argument: stream_options",
+        response=httpx.Response(400, request=request),
+        body=None,
+    )
+    mock_openai_client.chat.completions.create.side_effect = [
+        rejected,
+        iter([_make_chunk("ok")]),
+    ]
+    provider = OpenAICompatibleProvider(api_key="sk-test", model="gpt-4o")
+    chunks, _ = _drain(provider.stream("sys", "user", 100))
+    assert chunks == ["ok"]
+    retry = mock_openai_client.chat.completions.create.call_args.kwargs
+    assert "stream_options" not in retry
+
+
+def test_complete_reports_cached_prompt_tokens(mock_openai_client):
+    resp = _make_response("hello", input_tokens=2000)
+    resp.usage.prompt_tokens_details.cached_tokens = 1536
+    mock_openai_client.chat.completions.create.return_value = resp
+    provider = OpenAICompatibleProvider(api_key="sk-test", model="gpt-4o")
+    _, tokens = provider.complete("sys", "user", 100, user_prefix="prefix ")
+    assert tokens == {"input": 2000, "output": 5, "cache_read": 1536}
+    messages = mock_openai_client.chat.completions.create.call_args.kwargs["messages"]
+    assert messages[1]["content"] == "prefix user"
@@ -1,17 +1,45 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
-from unittest.mock import MagicMock, patch
 
-from src.processor import Processor
+from src.near_duplicates import NearDuplicateIndex
+from src.processor import (
+    AnalysisResult,
+    BatchItem,
+    Processor,
+    RescoreBase,
+    _in_flight,
+)
+from src.providers.base import served_by
+from src.providers.rate_limit import RateLimiter
+from src.result_cache import ResultCache
 from tests.conftest import SAMPLE_JD, SAMPLE_RESUME
 
 _MOCK_RESPONSE = '{"score": 85, "missing_keywords": [], "improvements": [], "hard_filter_risk": "low"}'
 
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters():
+    # Limiters are process-wide, don't let earlier tests drain the buckets
+    with patch.dict("src.providers.rate_limit._limiters", clear=True):
+        yield
+
+
 @pytest.fixture
 def mock_provider():
     provider = MagicMock()
     provider.model = "claude-sonnet-4-6"
+    provider.provider_name = "anthropic"
     provider.complete.return_value = (_MOCK_RESPONSE, {"input": 100, "output": 50})
+    provider.acomplete = AsyncMock(
+        return_value=(_MOCK_RESPONSE, {"input": 100, "output": 50})
+    )
     return provider
 
 
@@ -67,9 +95,721 @@ def test_analyze_score_mode_uses_score_prompts(mock_provider):
     assert "score_template_prompt" in called_with
 
 
+def test_analyze_serves_prompts_from_preloaded_bundle(mock_provider):
+    prompts = {
+        "score_instruction_prompt": "bundled system",
+        "score_template_prompt": "bundled template",
+    }
+    with (
+        patch("src.processor.log_llm_call"),
+        patch("src.processor.load_prompt") as mock_load,
+    ):
+        Processor(mock_provider, prompts=prompts).analyze(
+            resume=SAMPLE_RESUME, job_desc=SAMPLE_JD, mode="score"
+        )
+    mock_load.assert_not_called()
+    assert "bundled system" in mock_provider.complete.call_args.args
+
+
 def test_analyze_score_mode_uses_400_max_tokens(mock_provider, mock_prompts):
     with patch("src.processor.log_llm_call"):
         Processor(mock_provider).analyze(
             resume=SAMPLE_RESUME, job_desc=SAMPLE_JD, mode="score"
         )
     assert mock_provider.complete.call_args.args[2] == 400
+
+
+def test_analyze_serves_repeat_calls_from_cache(mock_provider, mock_prompts, tmp_path):
+    cache = ResultCache(db_path=tmp_path / "cache.db")
+    processor = Processor(mock_provider, cache=cache)
+    with patch("src.processor.log_llm_call") as mock_log:
+        first = processor.analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+        second = processor.analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+    assert second == {**first, "reused": True}
+    mock_provider.complete.assert_called_once()
+    statuses = [c.kwargs["cache_status"] for c in mock_log.call_args_list]
+    assert statuses == ["miss", "hit"]
+
+
+def test_analyze_cache_key_includes_mode(mock_provider, mock_prompts, tmp_path):
+    processor = Processor(mock_provider, cache=ResultCache(db_path=tmp_path / "c.db"))
+    with patch("src.processor.log_llm_call"):
+        processor.analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD, mode="full")
+        processor.analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD, mode="score")
+    assert mock_provider.complete.call_count == 2
+
+
+def test_aanalyze_returns_result_and_logs(mock_provider, mock_prompts):
+    with patch("src.processor.log_llm_call") as mock_log:
+        result = asyncio.run(
+            Processor(mock_provider).aanalyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+        )
+    assert result["content"] == _MOCK_RESPONSE
+    mock_provider.acomplete.assert_awaited_once()
+    mock_provider.complete.assert_not_called()
+    assert mock_log.call_args.kwargs["status"] == "success"
+
+
+def test_aanalyze_bounds_concurrency(mock_provider, mock_prompts):
+    in_flight = 0
+    peak = 0
+
+    async def slow_complete(system, user, max_tokens, user_prefix=""):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _MOCK_RESPONSE, {"input": 1, "output": 1}
+
+    mock_provider.acomplete = slow_complete
+    processor = Processor(mock_provider, max_concurrency=2)
+
+    async def run_all():
+        return await asyncio.gather(
+            *(processor.aanalyze(SAMPLE_RESUME, f"JD {i}") for i in range(6))
+        )
+
+    with patch("src.processor.log_llm_call"):
+        results = asyncio.run(run_all())
+    assert len(results) == 6
+    assert peak == 2
+
+
+def test_aanalyze_logs_error_and_reraises(mock_provider, mock_prompts):
+    mock_provider.acomplete.side_effect = Exception("API error")
+    with (
+        patch("src.processor.log_llm_call") as mock_log,
+        pytest.raises(Exception, match="API error"),
+    ):
+        asyncio.run(
+            Processor(mock_provider).aanalyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+        )
+    assert mock_log.call_args.kwargs["status"] == "error"
+
+
+def test_analyze_stream_yields_chunks_and_logs_ttft(mock_provider, mock_prompts):
+    def fake_stream(system, user, max_tokens, user_prefix=""):
+        yield '{"score": '
+        yield "85}"
+        return {"input": 100, "output": 50}
+
+    mock_provider.stream = fake_stream
+    with patch("src.processor.log_llm_call") as mock_log:
+        stream = Processor(mock_provider).analyze_stream(
+            resume=SAMPLE_RESUME, job_desc=SAMPLE_JD
+        )
+        chunks = list(stream)
+    assert "".join(chunks) == '{"score": 85}'
+    kwargs = mock_log.call_args.kwargs
+    assert kwargs["status"] == "success"
+    assert kwargs["output_tokens"] == 50
+    assert kwargs["ttft_ms"] is not None
+
+
+def test_analyze_sends_resume_as_cacheable_prefix(mock_provider, mock_prompts):
+    with patch("src.processor.log_llm_call"):
+        Processor(mock_provider).analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+    call = mock_provider.complete.call_args
+    assert SAMPLE_RESUME in call.kwargs["user_prefix"]
+    assert SAMPLE_JD not in call.kwargs["user_prefix"]
+    assert call.args[1].startswith(f"JD:\n{SAMPLE_JD}\n\nKEYWORD CHECK")
+
+
+def test_analyze_logs_prompt_cache_tokens(mock_provider, mock_prompts):
+    mock_provider.complete.return_value = (
+        _MOCK_RESPONSE,
+        {"input": 10, "output": 50, "cache_creation": 0, "cache_read": 900},
+    )
+    with patch("src.processor.log_llm_call") as mock_log:
+        Processor(mock_provider).analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+    assert mock_log.call_args.kwargs["cache_read_tokens"] == 900
+    assert mock_log.call_args.kwargs["cache_creation_tokens"] == 0
+
+
+def test_analyze_many_isolates_failures(mock_provider, mock_prompts):
+    def complete(system, user, max_tokens, user_prefix=""):
+        if "broken" in user:
+            raise Exception("API error")
+        return _MOCK_RESPONSE, {"input": 100, "output": 50}
+
+    mock_provider.complete.side_effect = complete
+    job_descs = ["JD one", "broken JD", "JD three"]
+    with patch("src.processor.log_llm_call") as mock_log:
+        items = list(
+            Processor(mock_provider).analyze_many(
+                SAMPLE_RESUME, job_descs, mode="score", max_workers=2
+            )
+        )
+    by_index = {item["index"]: item for item in items}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[1]["error"] == "API error"
+    assert by_index[1]["result"] is None
+    result = by_index[0]["result"]
+    assert result is not None
+    assert result["content"] == _MOCK_RESPONSE
+    assert mock_log.call_count == 3
+
+
+def _slow_provider(mock_provider: MagicMock) -> MagicMock:
+    def complete(system, user, max_tokens, user_prefix=""):
+        time.sleep(0.02)
+        return _MOCK_RESPONSE, {"input": 100, "output": 50}
+
+    mock_provider.complete.side_effect = complete
+    return mock_provider
+
+
+def test_closing_analyze_many_cancels_queued_calls(mock_provider, mock_prompts):
+    provider = _slow_provider(mock_provider)
+    job_descs = [f"JD {i}" for i in range(40)]
+    with patch("src.processor.log_llm_call"):
+        items = Processor(provider).analyze_many(
+            SAMPLE_RESUME, job_descs, mode="score", max_workers=2
+        )
+        next(items)
+        items.close()
+        time.sleep(0.1)
+    # The first result and the calls already running, not the queued ones
+    assert provider.complete.call_count <= 4
+
+
+def test_closing_analyze_cascade_cancels_queued_screenings(mock_provider, mock_prompts):
+    screen_provider = _slow_provider(MagicMock(provider_name="openai", model="mini"))
+    job_descs = [f"JD {i}" for i in range(40)]
+    with patch("src.processor.log_llm_call"):
+        cascade = Processor(mock_provider).analyze_cascade(
+            SAMPLE_RESUME,
+            job_descs,
+            Processor(screen_provider),
+            threshold=101,
+            max_workers=2,
+        )
+        next(cascade)
+        cascade.close()
+        time.sleep(0.1)
+    assert screen_provider.complete.call_count <= 4
+    mock_provider.complete.assert_not_called()
+
+
+def test_analyze_waits_for_rate_limiter_and_logs_queue_wait(
+    mock_provider, mock_prompts
+):
+    limiter = RateLimiter(rpm=1)
+    processor = Processor(mock_provider, rate_limiter=limiter)
+    with patch("src.processor.log_llm_call") as mock_log:
+        processor.analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+        assert mock_log.call_args.kwargs["queue_wait_ms"] == 0
+        with patch("src.providers.rate_limit.time.sleep") as mock_sleep:
+            processor.analyze(resume=SAMPLE_RESUME, job_desc="another JD")
+    # One request per minute: the second call queues for about a minute
+    assert mock_sleep.call_args.args[0] == pytest.approx(60, abs=1)
+    assert mock_log.call_args.kwargs["queue_wait_ms"] == pytest.approx(60_000, abs=1000)
+    assert mock_provider.complete.call_count == 2
+
+
+def test_processors_share_the_provider_rate_limiter(mock_provider):
+    assert (
+        Processor(mock_provider).rate_limiter is Processor(mock_provider).rate_limiter
+    )
+
+
+def test_concurrent_identical_analyses_share_one_call(mock_provider, mock_prompts):
+    release = threading.Event()
+    joined = threading.Event()
+    claim = _in_flight.claim
+
+    def complete(system, user, max_tokens, user_prefix=""):
+        release.wait(timeout=5)
+        return _MOCK_RESPONSE, {"input": 100, "output": 50}
+
+    def spy_claim(key):
+        flight, leader = claim(key)
+        if not leader:
+            joined.set()
+        return flight, leader
+
+    mock_provider.complete.side_effect = complete
+    processor = Processor(mock_provider)
+    with (
+        patch("src.processor.log_llm_call") as mock_log,
+        patch.object(_in_flight, "claim", side_effect=spy_claim),
+        ThreadPoolExecutor(max_workers=2) as pool,
+    ):
+        first = pool.submit(processor.analyze, SAMPLE_RESUME, SAMPLE_JD)
+        second = pool.submit(processor.analyze, SAMPLE_RESUME, SAMPLE_JD)
+        assert joined.wait(timeout=5)
+        release.set()
+        results = sorted((first.result(), second.result()), key=lambda r: "reused" in r)
+        assert results[1] == {**results[0], "reused": True}
+    assert mock_provider.complete.call_count == 1
+    statuses = sorted(str(c.kwargs["cache_status"]) for c in mock_log.call_args_list)
+    assert statuses == ["None", "coalesced"]
+
+
+def test_coalesced_waiter_gets_the_leader_error(mock_provider, mock_prompts):
+    processor = Processor(mock_provider)
+    key = processor._prepare(SAMPLE_RESUME, SAMPLE_JD, "full", None).key
+    flight, _ = _in_flight.claim(key)
+    flight.set_exception(Exception("API error"))
+    try:
+        with patch("src.processor.log_llm_call") as mock_log:
+            with pytest.raises(Exception, match="API error"):
+                asyncio.run(processor.aanalyze(SAMPLE_RESUME, SAMPLE_JD))
+    finally:
+        with _in_flight.lead(key, flight):
+            pass
+    mock_provider.acomplete.assert_not_called()
+    assert mock_log.call_args.kwargs["cache_status"] == "coalesced"
+    assert mock_log.call_args.kwargs["status"] == "error"
+
+
+def test_analyze_logs_the_provider_that_answered(mock_provider, mock_prompts):
+    def complete(system, user, max_tokens, user_prefix=""):
+        served_by.set(("openrouter", "google/gemini-2.5-flash"))
+        return _MOCK_RESPONSE, {"input": 100, "output": 50}
+
+    mock_provider.complete.side_effect = complete
+    with patch("src.processor.log_llm_call") as mock_log:
+        Processor(mock_provider).analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+    assert mock_log.call_args.kwargs["provider"] == "openrouter"
+    assert mock_log.call_args.kwargs["model"] == "google/gemini-2.5-flash"
+
+
+def test_analyze_cascade_escalates_only_promising_jds(mock_provider, mock_prompts):
+    screen_provider = MagicMock()
+    screen_provider.model = "claude-haiku-4-5-20251001"
+    screen_provider.provider_name = "anthropic"
+
+    def screen(system, user, max_tokens, user_prefix=""):
+        score = 90 if "great" in user else 30
+        return f'{{"score": {score}}}', {"input": 100, "output": 20}
+
+    screen_provider.complete.side_effect = screen
+    mock_provider.complete.return_value = (
+        _MOCK_RESPONSE,
+        {"input": 120, "output": 600},
+    )
+    job_descs = ["great fit", "poor fit", "another poor fit", "great match too"]
+
+    with patch("src.processor.log_llm_call"):
+        cascade = Processor(mock_provider).analyze_cascade(
+            SAMPLE_RESUME, job_descs, Processor(screen_provider), threshold=70
+        )
+        items = []
+        while True:
+            try:
+                items.append(next(cascade))
+            except StopIteration as stop:
+                report = stop.value
+                break
+
+    by_index = {item["index"]: item for item in items}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert [by_index[i]["escalated"] for i in range(4)] == [True, False, False, True]
+    assert by_index[1]["screen_score"] == 30
+    assert by_index[0]["result"] is not None
+    assert by_index[0]["result"]["content"] == _MOCK_RESPONSE
+    assert mock_provider.complete.call_count == 2
+    assert report["escalated"] == 2
+    assert report["full_calls_saved"] == 2
+    assert report["tokens_used"] == 4 * 120 + 2 * 720
+    # Skipped JDs are costed like the escalated full calls
+    assert report["tokens_full_only"] == 4 * 720
+    assert report["tokens_saved"] == 4 * 720 - (4 * 120 + 2 * 720)
+
+
+def _drain_cascade(cascade) -> tuple[list, dict]:
+    items = []
+    while True:
+        try:
+            items.append(next(cascade))
+        except StopIteration as stop:
+            return items, stop.value
+
+
+def test_analyze_cascade_report_ignores_failed_and_reused_screenings(
+    mock_provider, mock_prompts, tmp_path
+):
+    screen_provider = MagicMock(provider_name="anthropic", model="haiku")
+
+    def screen(system, user, max_tokens, user_prefix=""):
+        if "broken" in user:
+            raise Exception("API error")
+        return '{"score": 30}', {"input": 100, "output": 20}
+
+    screen_provider.complete.side_effect = screen
+    screener = Processor(screen_provider, cache=ResultCache(tmp_path / "cache.db"))
+    job_descs = ["poor fit", "broken JD"]
+    with patch("src.processor.log_llm_call"):
+        _, report = _drain_cascade(
+            Processor(mock_provider).analyze_cascade(
+                SAMPLE_RESUME, job_descs, screener, threshold=70
+            )
+        )
+        _, rerun = _drain_cascade(
+            Processor(mock_provider).analyze_cascade(
+                SAMPLE_RESUME, job_descs, screener, threshold=70
+            )
+        )
+    # The failed screening neither saved a full call nor spent tokens
+    assert report["full_calls_saved"] == 1
+    assert report["tokens_used"] == 120
+    # The cached screening spent nothing the second time
+    assert rerun["full_calls_saved"] == 1
+    assert rerun["tokens_used"] == 0
+    mock_provider.complete.assert_not_called()
+
+
+def test_analyze_sends_local_keyword_check(mock_provider, mock_prompts):
+    job_desc = "Python and Kubernetes engineer"
+    with patch("src.processor.log_llm_call"):
+        Processor(mock_provider).analyze(resume=SAMPLE_RESUME, job_desc=job_desc)
+    user = mock_provider.complete.call_args.args[1]
+    assert "Present: Python" in user
+    assert "Missing: Kubernetes" in user
+
+
+def test_analyze_result_includes_local_missing_keywords(mock_provider, mock_prompts):
+    # _MOCK_RESPONSE adds no missing terms of its own
+    job_desc = "Python and Kubernetes engineer"
+    with patch("src.processor.log_llm_call"):
+        result = Processor(mock_provider).analyze(
+            resume=SAMPLE_RESUME, job_desc=job_desc
+        )
+    data = json.loads(result["content"])
+    assert data["missing_keywords"] == ["Kubernetes"]
+    assert data["score"] == 85
+
+
+def test_analyze_can_send_resume_as_plain_text(mock_provider, mock_prompts):
+    resume = "#set text(size: 10pt)\n== Skills\n*Python*, SQL \\\n"
+    with patch("src.processor.log_llm_call"):
+        Processor(mock_provider, resume_format="text").analyze(
+            resume=resume, job_desc=SAMPLE_JD
+        )
+    prefix = mock_provider.complete.call_args.kwargs["user_prefix"]
+    assert "RESUME (plain text):\n== Skills\nPython, SQL\n" in prefix
+    assert "#set" not in prefix
+
+
+def test_analyze_logs_estimated_input_tokens(mock_provider, mock_prompts):
+    with patch("src.processor.log_llm_call") as mock_log:
+        Processor(mock_provider).analyze(resume=SAMPLE_RESUME, job_desc=SAMPLE_JD)
+    estimated = mock_log.call_args.kwargs["estimated_input_tokens"]
+    assert estimated > 0
+    assert mock_log.call_args.kwargs["input_tokens"] == 100
+
+
+def test_analyze_trims_job_description_to_input_budget(mock_provider, mock_prompts):
+    job_desc = "Requirements\n- Python\n- SQL\n\nBenefits\n" + "- Free lunch\n" * 500
+    with patch("src.processor.log_llm_call"):
+        Processor(mock_provider, input_budget=1000).analyze(
+            resume=SAMPLE_RESUME, job_desc=job_desc
+        )
+    user = mock_provider.complete.call_args.args[1]
+    assert "- Python" in user
+    assert "Free lunch" not in user
+
+
+def test_analyze_keeps_job_description_within_budget(mock_provider, mock_prompts):
+    job_desc = "Requirements\n- Python\n\nBenefits\n- Free lunch"
+    with patch("src.processor.log_llm_call"):
+        Processor(mock_provider, input_budget=1000).analyze(
+            resume=SAMPLE_RESUME, job_desc=job_desc
+        )
+    assert "Free lunch" in mock_provider.complete.call_args.args[1]
+
+
+def test_analyze_reuses_result_of_near_duplicate_job_description(
+    mock_provider, mock_prompts, tmp_path
+):
+    job_desc = (
+        "Backend engineer\n\n- Build Python services on AWS\n"
+        "- Own Kubernetes deployments and monitoring\n- Review code"
+    )
+    repost = job_desc.replace("- Review code", "- Review code daily")
+    processor = Processor(
+        mock_provider, near_duplicates=NearDuplicateIndex(tmp_path / "history.db")
+    )
+    with patch("src.processor.log_llm_call") as mock_log:
+        first = processor.analyze(resume=SAMPLE_RESUME, job_desc=job_desc)
+        result = processor.analyze(resume=SAMPLE_RESUME, job_desc=repost)
+    assert mock_provider.complete.call_count == 1
+    assert result["content"] == first["content"]
+    assert result["near_duplicate"] >= 0.8
+    assert mock_log.call_args.kwargs["cache_status"] == "near_duplicate"
+
+
+def test_analyze_calls_provider_for_each_mostly_boilerplate_posting(
+    mock_provider, mock_prompts, tmp_path
+):
+    boilerplate = (
+        "\n\nBenefits\n- Health insurance and a learning budget\n\n"
+        "Equal Opportunity Employer\nWe welcome applicants of every background."
+    )
+    processor = Processor(
+        mock_provider, near_duplicates=NearDuplicateIndex(tmp_path / "history.db")
+    )
+    with patch("src.processor.log_llm_call"):
+        processor.analyze(SAMPLE_RESUME, "Benefits Analyst" + boilerplate)
+        result = processor.analyze(
+            SAMPLE_RESUME, "Diversity and Inclusion Lead" + boilerplate
+        )
+    assert mock_provider.complete.call_count == 2
+    assert "near_duplicate" not in result
+
+
+def _results(items: list[BatchItem]) -> dict[int, AnalysisResult]:
+    results = {}
+    for item in items:
+        assert item["result"] is not None, item["error"]
+        results[item["index"]] = item["result"]
+    return results
+
+
+def _packed_response(*scores: int) -> str:
+    return json.dumps(
+        [
+            {"job": n, "score": score, "main_fixes": f"fix {n}"}
+            for n, score in enumerate(scores, 1)
+        ]
+    )
+
+
+def test_analyze_packed_scores_many_jobs_in_one_call(mock_provider, mock_prompts):
+    mock_provider.complete.return_value = (
+        _packed_response(80, 60, 40),
+        {"input": 1000, "output": 90},
+    )
+    with patch("src.processor.log_llm_call") as mock_log:
+        items = list(
+            Processor(mock_provider).analyze_packed(SAMPLE_RESUME, ["A", "B", "C"])
+        )
+    assert mock_provider.complete.call_count == 1
+    user = mock_provider.complete.call_args.args[1]
+    assert "JOB 1\nJD:\nA" in user and "JOB 3\nJD:\nC" in user
+    results = _results(items)
+    assert json.loads(results[1]["content"]) == {"score": 60, "main_fixes": "fix 2"}
+    # Tokens are split between the items, nothing lost or counted twice
+    assert sum(result["tokens"]["input"] for result in results.values()) == 1000
+    assert sum(result["tokens"]["output"] for result in results.values()) == 90
+    rows = [call.kwargs for call in mock_log.call_args_list]
+    assert len(rows) == 3
+    assert {row["feature"] for row in rows} == {"packed_score"}
+    assert len({row["batch_id"] for row in rows}) == 1
+
+
+def test_analyze_packed_caps_jobs_per_call(mock_provider, mock_prompts):
+    mock_provider.complete.side_effect = lambda system, user, max_tokens, **kw: (
+        _packed_response(*[70] * user.count("JOB ")),
+        {"input": 100, "output": 10},
+    )
+    with patch("src.processor.log_llm_call"):
+        items = list(
+            Processor(mock_provider).analyze_packed(
+                SAMPLE_RESUME, [f"JD {i}" for i in range(15)]
+            )
+        )
+    assert len(items) == 15
+    assert all(item["error"] is None for item in items)
+    assert mock_provider.complete.call_count == 2
+
+
+def test_analyze_packed_scores_missing_jobs_on_their_own(mock_provider, mock_prompts):
+    mock_provider.complete.side_effect = [
+        (_packed_response(80), {"input": 100, "output": 10}),
+        (_MOCK_RESPONSE, {"input": 50, "output": 5}),
+    ]
+    with patch("src.processor.log_llm_call") as mock_log:
+        items = list(Processor(mock_provider).analyze_packed(SAMPLE_RESUME, ["A", "B"]))
+    results = _results(items)
+    assert json.loads(results[0]["content"])["score"] == 80
+    assert results[1]["content"] == _MOCK_RESPONSE
+    statuses = [call.kwargs["status"] for call in mock_log.call_args_list]
+    assert statuses == ["success", "error", "success"]
+
+
+def test_analyze_packed_reports_failed_calls(mock_provider, mock_prompts):
+    mock_provider.complete.side_effect = RuntimeError("overloaded")
+    with patch("src.processor.log_llm_call") as mock_log:
+        items = list(Processor(mock_provider).analyze_packed(SAMPLE_RESUME, ["A", "B"]))
+    assert [item["error"] for item in items] == ["overloaded", "overloaded"]
+    assert mock_provider.complete.call_count == 1
+    assert mock_log.call_count == 2
+
+
+def test_analyze_packed_results_serve_later_single_scores(
+    mock_provider, mock_prompts, tmp_path
+):
+    mock_provider.complete.return_value = (
+        _packed_response(80, 60),
+        {"input": 100, "output": 10},
+    )
+    processor = Processor(mock_provider, cache=ResultCache(tmp_path / "cache.db"))
+    with patch("src.processor.log_llm_call"):
+        list(processor.analyze_packed(SAMPLE_RESUME, ["A", "B"]))
+        result = processor.analyze(SAMPLE_RESUME, "B", mode="score")
+    assert json.loads(result["content"])["score"] == 60
+    assert mock_provider.complete.call_count == 1
+
+
+_TYPST_RESUME = """#let name = "Jane Doe"
+= Jane Doe
+
+== Experience
+#work(title: "Engineer", company: "Acme")
+- Built Python services
+- Ran the on-call rotation
+
+#work(title: "Intern", company: "Initech")
+- Wrote SQL reports
+
+== Skills
+- Python, SQL
+"""
+
+
+def test_rescore_without_base_sends_the_whole_resume(mock_provider, mock_prompts):
+    with patch("src.processor.log_llm_call"):
+        result, base = Processor(mock_provider).rescore(_TYPST_RESUME, SAMPLE_JD)
+    assert (
+        "Ran the on-call rotation"
+        in mock_provider.complete.call_args.kwargs["user_prefix"]
+    )
+    assert base == RescoreBase(_TYPST_RESUME, SAMPLE_JD, _MOCK_RESPONSE)
+    assert result["content"] == _MOCK_RESPONSE
+
+
+def test_rescore_sends_only_changed_entries(mock_provider, mock_prompts):
+    base = RescoreBase(_TYPST_RESUME, SAMPLE_JD, '{"score": 70}')
+    edited = _TYPST_RESUME.replace(
+        "Built Python services", "Built Python and Go services"
+    )
+    with patch("src.processor.log_llm_call") as mock_log:
+        result, new_base = Processor(mock_provider).rescore(edited, SAMPLE_JD, base)
+    user = mock_provider.complete.call_args.args[1]
+    assert 'PREVIOUS RESULT:\n{"score": 70}' in user
+    assert "- - Built Python services\n+ - Built Python and Go services" in user
+    assert "Wrote SQL reports" not in user
+    assert (
+        "Wrote SQL reports"
+        not in mock_provider.complete.call_args.kwargs["user_prefix"]
+    )
+    assert mock_log.call_args.kwargs["feature"] == "delta"
+    assert new_base == RescoreBase(edited, SAMPLE_JD, result["content"], deltas=1)
+
+
+def test_rescore_of_unchanged_resume_reuses_base(mock_provider, mock_prompts):
+    base = RescoreBase(_TYPST_RESUME, SAMPLE_JD, '{"score": 70}')
+    result, new_base = Processor(mock_provider).rescore(_TYPST_RESUME, SAMPLE_JD, base)
+    assert result["content"] == '{"score": 70}'
+    assert new_base is base
+    mock_provider.complete.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "edited, job_desc, deltas",
+    [
+        # Most of the resume rewritten
+        ("= Jane Doe\n\n== Projects\n- A compiler in Rust\n", SAMPLE_JD, 0),
+        # Another job description
+        (_TYPST_RESUME.replace("SQL reports", "SQL dashboards"), "Other JD", 0),
+        # Too many deltas in a row
+        (_TYPST_RESUME.replace("SQL reports", "SQL dashboards"), SAMPLE_JD, 3),
+    ],
+)
+def test_rescore_falls_back_to_whole_resume(
+    mock_provider, mock_prompts, edited, job_desc, deltas
+):
+    base = RescoreBase(_TYPST_RESUME, SAMPLE_JD, '{"score": 70}', deltas=deltas)
+    with patch("src.processor.log_llm_call"):
+        _, new_base = Processor(mock_provider).rescore(edited, job_desc, base)
+    assert (
+        f"RESUME (Typst source):\n{edited}"
+        in mock_provider.complete.call_args.kwargs["user_prefix"]
+    )
+    assert new_base.deltas == 0
+
+
+def _section_provider(mock_provider: MagicMock, fail: str | None = None) -> MagicMock:
+    def complete(system, user, max_tokens, user_prefix=""):
+        heading = re.search(r"RESUME \(Typst source\):\n=+ (.*)", user_prefix)
+        if heading is None:
+            overview = {"score": 77, "missing_keywords": ["Go"]}
+            return json.dumps(overview), {"input": 100, "output": 20}
+        title = heading.group(1)
+        if title == fail:
+            raise RuntimeError("overloaded")
+        improvement = {"section": title, "comment": f"Improve {title}"}
+        return json.dumps({"improvements": [improvement]}), {"input": 10, "output": 5}
+
+    mock_provider.complete.side_effect = complete
+    return mock_provider
+
+
+def test_analyze_sections_merges_section_critiques_with_overview(
+    mock_provider, mock_prompts
+):
+    provider = _section_provider(mock_provider)
+    with patch("src.processor.log_llm_call") as mock_log:
+        result = Processor(provider).analyze_sections(_TYPST_RESUME, SAMPLE_JD)
+    data = json.loads(result["content"])
+    assert data["score"] == 77
+    assert data["missing_keywords"] == ["Go"]
+    assert [imp["section"] for imp in data["improvements"]] == [
+        "Jane Doe",
+        "Experience",
+        "Skills",
+    ]
+    assert result["tokens"] == {"input": 130, "output": 35}
+    assert provider.complete.call_count == 4
+    features = sorted(call.kwargs["feature"] for call in mock_log.call_args_list)
+    assert features == ["overview", "section", "section", "section"]
+
+
+def test_analyze_sections_runs_sections_concurrently(mock_provider, mock_prompts):
+    barrier = threading.Barrier(4, timeout=5)
+
+    def complete(system, user, max_tokens, user_prefix=""):
+        # Times out unless all four requests are in flight at once
+        barrier.wait()
+        return '{"score": 80, "improvements": []}', {"input": 1, "output": 1}
+
+    mock_provider.complete.side_effect = complete
+    with patch("src.processor.log_llm_call"):
+        result = Processor(mock_provider).analyze_sections(_TYPST_RESUME, SAMPLE_JD)
+    assert json.loads(result["content"])["score"] == 80
+
+
+def test_analyze_sections_skips_failed_sections(mock_provider, mock_prompts):
+    provider = _section_provider(mock_provider, fail="Skills")
+    with patch("src.processor.log_llm_call"):
+        result = Processor(provider).analyze_sections(_TYPST_RESUME, SAMPLE_JD)
+    data = json.loads(result["content"])
+    assert [imp["section"] for imp in data["improvements"]] == [
+        "Jane Doe",
+        "Experience",
+    ]
+
+
+def test_analyze_sections_reuses_unchanged_sections_from_cache(
+    mock_provider, mock_prompts, tmp_path
+):
+    provider = _section_provider(mock_provider)
+    processor = Processor(provider, cache=ResultCache(tmp_path / "cache.db"))
+    edited = _TYPST_RESUME.replace("- Python, SQL", "- Python, SQL, Go")
+    with patch("src.processor.log_llm_call"):
+        processor.analyze_sections(_TYPST_RESUME, SAMPLE_JD)
+        processor.analyze_sections(edited, SAMPLE_JD)
+    # Second run: overview and Skills again, the other sections from the cache
+    assert provider.complete.call_count == 6
+
+
+def test_analyze_sections_without_sections_runs_full_analysis(
+    mock_provider, mock_prompts
+):
+    with patch("src.processor.log_llm_call") as mock_log:
+        Processor(mock_provider).analyze_sections(SAMPLE_RESUME, SAMPLE_JD)
+    assert mock_provider.complete.call_count == 1
+    assert mock_log.call_args.kwargs["feature"] == "full"
@@ -0,0 +1,70 @@
+import time
+
+import numpy as np
+
+from src.ranker import JobIndex
+
+_JOBS = [
+    ("chef", "Pastry chef: croissants, bread and cakes"),
+    ("backend", "Backend engineer: Python, Kubernetes, PostgreSQL. Python daily."),
+    ("data", "Data analyst: SQL and Python reporting"),
+]
+_RESUME = "= Jane Doe\n== Skills\n*Python*, Kubernetes, PostgreSQL\n"
+
+
+def test_rank_orders_jobs_by_bm25_score():
+    index = JobIndex()
+    index.add(_JOBS)
+    ranked = index.rank(_RESUME)
+    assert [job_id for job_id, _ in ranked] == ["backend", "data", "chef"]
+    assert ranked[-1][1] == 0
+
+
+def test_rank_returns_top_k_within_job_ids():
+    index = JobIndex()
+    index.add(_JOBS)
+    assert [job_id for job_id, _ in index.rank(_RESUME, top_k=1)] == ["backend"]
+    ranked = index.rank(_RESUME, top_k=1, job_ids=["chef", "data", "unknown"])
+    assert [job_id for job_id, _ in ranked] == ["data"]
+
+
+def test_add_skips_indexed_jobs():
+    index = JobIndex()
+    assert index.add(_JOBS) == 3
+    assert index.add([("chef", "changed text"), ("new", "Rust developer")]) == 1
+    assert len(index) == 4
+    assert "new" in index
+
+
+def test_scores_are_zero_without_common_terms():
+    index = JobIndex()
+    index.add(_JOBS)
+    assert not index.scores("Nothing relevant here").any()
+    assert JobIndex().scores(_RESUME).shape == (0,)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = JobIndex(tmp_path / "index.npz")
+    index.add(_JOBS)
+    index.save()
+    loaded = JobIndex.load(tmp_path / "index.npz")
+    assert len(loaded) == 3
+    assert loaded.rank(_RESUME) == index.rank(_RESUME)
+    assert loaded.add([("rust", "Rust developer")]) == 1
+    assert [job_id for job_id, _ in loaded.rank(_RESUME)][-1] in {"chef", "rust"}
+
+
+def test_load_returns_empty_index_when_missing(tmp_path):
+    assert len(JobIndex.load(tmp_path / "missing.npz")) == 0
+
+
+def test_rank_scores_thousands_of_jobs_quickly():
+    index = JobIndex()
+    rng = np.random.default_rng(0)
+    words = np.array([f"term{i}" for i in range(5000)] + ["python", "kubernetes"])
+    index.add(
+        (str(i), " ".join(words[rng.integers(0, 5002, 300)])) for i in range(3000)
+    )
+    start = time.perf_counter()
+    index.rank(_RESUME, top_k=50)
+    assert time.perf_counter() - start < 0.5
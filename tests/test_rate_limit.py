@@ -0,0 +1,61 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.providers.rate_limit import RateLimiter, TokenBucket, get_rate_limiter
+
+
+def test_token_bucket_allows_burst_then_queues_in_order():
+    bucket = TokenBucket(per_minute=60)
+    t0 = time.monotonic()
+    assert bucket.reserve(60, now=t0) == 0
+    # Empty bucket refills at one per second, later callers wait longer
+    assert bucket.reserve(1, now=t0) == pytest.approx(1.0)
+    assert bucket.reserve(1, now=t0) == pytest.approx(2.0)
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(per_minute=60)
+    t0 = time.monotonic()
+    bucket.reserve(60, now=t0)
+    assert bucket.reserve(10, now=t0 + 10.0) == pytest.approx(0, abs=1e-6)
+    assert bucket.reserve(10, now=t0 + 10.0) == pytest.approx(10.0)
+
+
+def test_token_bucket_caps_oversized_requests():
+    bucket = TokenBucket(per_minute=60)
+    t0 = time.monotonic()
+    bucket.reserve(60, now=t0)
+    # Bigger than the bucket: waits for a full refill instead of never running
+    assert bucket.reserve(1000, now=t0) == pytest.approx(60.0)
+
+
+def test_rate_limiter_waits_for_the_tightest_limit():
+    limiter = RateLimiter(rpm=100, tpm=600)
+    assert limiter.reserve(600) == 0
+    assert limiter.reserve(60) == pytest.approx(6.0, abs=0.1)
+
+
+def test_rate_limiter_without_limits_never_waits():
+    limiter = RateLimiter()
+    assert all(limiter.reserve(1_000_000) == 0 for _ in range(100))
+
+
+def test_aacquire_sleeps_for_the_reservation():
+    limiter = RateLimiter(rpm=1)
+    with patch(
+        "src.providers.rate_limit.asyncio.sleep", new_callable=AsyncMock
+    ) as mock_sleep:
+        assert asyncio.run(limiter.aacquire(10)) == 0
+        waited = asyncio.run(limiter.aacquire(10))
+    assert waited == pytest.approx(60, abs=1)
+    mock_sleep.assert_awaited_once()
+
+
+def test_get_rate_limiter_is_shared_per_provider():
+    with patch.dict("src.providers.rate_limit._limiters", clear=True):
+        assert get_rate_limiter("anthropic") is get_rate_limiter("anthropic")
+        assert get_rate_limiter("anthropic") is not get_rate_limiter("openai")
+        assert get_rate_limiter("unknown").reserve(10**9) == 0
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+
+from src.result_cache import ResultCache, cache_key
+
+
+def test_cache_key_is_stable_and_unambiguous():
+    assert cache_key("a", "b") == cache_key("a", "b")
+    assert cache_key("ab", "c") != cache_key("a", "bc")
+
+
+def test_get_returns_stored_result(tmp_path):
+    cache = ResultCache(db_path=tmp_path / "cache.db")
+    cache.set("k", '{"score": 80}', {"input": 10, "output": 5})
+    assert cache.get("k") == ('{"score": 80}', {"input": 10, "output": 5})
+    assert cache.get("missing") is None
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ResultCache(db_path=tmp_path / "cache.db", ttl_seconds=60)
+    with patch("src.result_cache.time.time", return_value=1000.0):
+        cache.set("k", "content", {"input": 1, "output": 1})
+    with patch("src.result_cache.time.time", return_value=1061.0):
+        assert cache.get("k") is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ResultCache(
+        db_path=tmp_path / "cache.db", max_entries=2, ttl_seconds=float("inf")
+    )
+    with patch("src.result_cache.time.time", return_value=1.0):
+        cache.set("a", "A", {"input": 1, "output": 1})
+    with patch("src.result_cache.time.time", return_value=2.0):
+        cache.set("b", "B", {"input": 1, "output": 1})
+    with patch("src.result_cache.time.time", return_value=3.0):
+        cache.get("a")
+    with patch("src.result_cache.time.time", return_value=4.0):
+        cache.set("c", "C", {"input": 1, "output": 1})
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
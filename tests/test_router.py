@@ -0,0 +1,136 @@
+import random
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.llm_logger import flush, log_llm_call, read_calls_since
+from src.processor import Processor, RescoreBase
+from src.router import ModelStats, Router
+
+_HAIKU = "claude-haiku-4-5-20251001"
+_SONNET = "claude-sonnet-4-6"
+
+
+@pytest.fixture
+def log_db(tmp_path):
+    with patch("src.llm_logger._DB_PATH", tmp_path / "history.db"):
+        yield
+
+
+def _log(model: str, duration_ms: int, status: str = "success", n: int = 5) -> None:
+    for _ in range(n):
+        log_llm_call(
+            feature="score",
+            model=model,
+            duration_ms=duration_ms,
+            status=status,
+            output_tokens=200,
+        )
+    flush()
+
+
+def test_model_stats_rates():
+    stats = ModelStats()
+    stats.add(1000, True, 200)
+    stats.add(3000, True, 300)
+    stats.add(500, False, None)
+    assert stats.samples == 3
+    assert stats.error_rate == pytest.approx(1 / 3)
+    assert stats.median_ms == 2000
+    assert list(stats.tokens_per_s) == [200.0, 100.0]
+
+
+def test_full_mode_keeps_the_configured_model(log_db):
+    _log(_HAIKU, 100)
+    assert Router(explore_rate=0).route("anthropic", _SONNET, "full") == _SONNET
+
+
+def test_score_defaults_to_a_fast_model_without_data(log_db):
+    assert Router(explore_rate=0).route("anthropic", _SONNET, "score") == _HAIKU
+
+
+def test_score_picks_the_fastest_healthy_model(log_db):
+    _log(_HAIKU, 4000)
+    _log(_SONNET, 1500)
+    assert Router(explore_rate=0).route("anthropic", _SONNET, "score") == _SONNET
+
+
+def test_score_avoids_unhealthy_models(log_db):
+    _log(_HAIKU, 500, status="error")
+    _log(_SONNET, 3000)
+    assert Router(explore_rate=0).route("anthropic", _SONNET, "score") == _SONNET
+
+
+def test_refresh_reads_only_new_rows(log_db):
+    router = Router(explore_rate=0)
+    _log(_HAIKU, 1000)
+    with patch("src.router.read_calls_since", wraps=read_calls_since) as spy:
+        router.refresh()
+        _log(_HAIKU, 1000, n=1)
+        router.refresh()
+    assert [c.args[0] for c in spy.call_args_list] == [0, 5]
+    assert router.stats("anthropic", _HAIKU, "score").samples == 6
+
+
+def test_score_prefers_throughput_among_similar_latencies(log_db):
+    _log(_HAIKU, 1000)
+    for _ in range(5):
+        log_llm_call(
+            feature="score",
+            model=_SONNET,
+            duration_ms=1050,
+            status="success",
+            output_tokens=400,
+        )
+    flush()
+    assert Router(explore_rate=0).route("anthropic", _SONNET, "score") == _SONNET
+
+
+def test_exploration_retries_excluded_models(log_db):
+    _log(_HAIKU, 500, status="error")
+    _log(_SONNET, 3000)
+    router = Router(explore_rate=0.5, rng=random.Random(0))
+    routed = {router.route("anthropic", _SONNET, "score") for _ in range(50)}
+    assert routed == {_HAIKU, _SONNET}
+
+
+def test_failing_delta_rescores_steer_score_routing(log_db):
+    resume = (
+        '#let name = "Jane Doe"\n= Jane Doe\n\n== Experience\n'
+        '#work(title: "Engineer", company: "Acme")\n'
+        "- Built Python services\n- Ran the on-call rotation\n\n"
+        '#work(title: "Intern", company: "Initech")\n- Wrote SQL reports\n\n'
+        "== Skills\n- Python, SQL\n"
+    )
+    edited = resume.replace("Built Python services", "Built Python and Go services")
+    base = RescoreBase(resume, "Python engineer", '{"score": 70}')
+    provider = MagicMock(provider_name="anthropic", model=_HAIKU)
+    provider.complete.side_effect = TimeoutError("slow")
+    processor = Processor(provider)
+    with patch("src.processor.load_prompt", return_value="fake prompt"):
+        for _ in range(5):
+            with pytest.raises(TimeoutError):
+                processor.rescore(edited, "Python engineer", base)
+    flush()
+    assert read_calls_since(0)[0]["feature"] == "delta"
+    router = Router(explore_rate=0)
+    assert router.route("anthropic", _SONNET, "score") == _SONNET
+    assert router.stats("anthropic", _HAIKU, "score").error_rate == 1.0
+
+
+def test_packed_call_counts_as_one_score_call(log_db):
+    for _ in range(3):
+        log_llm_call(
+            feature="packed_score",
+            model=_HAIKU,
+            duration_ms=2000,
+            status="success",
+            output_tokens=100,
+            batch_id="batch",
+        )
+    flush()
+    router = Router(explore_rate=0)
+    router.refresh()
+    stats = router.stats("anthropic", _HAIKU, "score")
+    assert stats.samples == 1
+    assert list(stats.tokens_per_s) == [150.0]
@@ -0,0 +1,49 @@
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def test_first_caller_leads_and_later_callers_wait():
+    flights = SingleFlight()
+    future, leader = flights.claim("k")
+    same, follower_leads = flights.claim("k")
+    assert leader and not follower_leads
+    assert same is future
+    assert flights.claim("other")[1]
+
+
+def test_lead_shares_result_and_releases_key():
+    flights = SingleFlight()
+    future, _ = flights.claim("k")
+    with flights.lead("k", future):
+        future.set_result("done")
+    assert future.result() == "done"
+    assert len(flights) == 0
+    assert flights.claim("k")[1]
+
+
+def test_lead_passes_failure_to_waiters():
+    flights = SingleFlight()
+    future, _ = flights.claim("k")
+    with pytest.raises(ValueError):
+        with flights.lead("k", future):
+            raise ValueError("boom")
+    with pytest.raises(ValueError, match="boom"):
+        future.result()
+    assert len(flights) == 0
+
+
+def test_abandoned_lead_does_not_leave_waiters_hanging():
+    flights = SingleFlight()
+    future, _ = flights.claim("k")
+
+    def leader():
+        with flights.lead("k", future):
+            yield "chunk"
+            future.set_result("done")
+
+    stream = leader()
+    next(stream)
+    stream.close()
+    with pytest.raises(RuntimeError, match="without result"):
+        future.result(timeout=1)
@@ -0,0 +1,14 @@
+from src.providers.tokens import estimate_input_tokens, estimate_tokens
+
+
+def test_estimate_tokens_scales_with_length():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 101
+    assert estimate_tokens("a" * 200, "b" * 200) == estimate_tokens("a" * 400)
+
+
+def test_estimate_input_tokens_uses_provider_density():
+    text = "a" * 700
+    assert estimate_input_tokens("anthropic", text) == 201
+    assert estimate_input_tokens("openai", text) == 176
+    assert estimate_input_tokens("unknown", text) == estimate_tokens(text)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+
+from src.typst_compiler import (
+    CompileCache,
+    TypstCompileError,
+    compile_pages,
+    compile_pdf,
+)
+
+
+@pytest.fixture
+def fresh_cache():
+    with (
+        patch("src.typst_compiler._cache", CompileCache()) as cache,
+        patch("src.typst_compiler._page_index", OrderedDict()),
+        patch("src.typst_compiler._failures", OrderedDict()),
+    ):
+        yield cache
+
+
+def test_compile_pdf_compiles_unchanged_source_once(fresh_cache):
+    with patch("src.typst_compiler.typst.compile", return_value=b"%PDF") as mock:
+        assert compile_pdf("= Resume") == b"%PDF"
+        assert compile_pdf("= Resume") == b"%PDF"
+    mock.assert_called_once_with(b"= Resume")
+
+
+def test_compile_pdf_caches_compile_errors_briefly(fresh_cache):
+    with (
+        patch(
+            "src.typst_compiler.typst.compile",
+            side_effect=RuntimeError("unclosed delimiter"),
+        ) as mock,
+        pytest.raises(TypstCompileError, match="unclosed delimiter"),
+    ):
+        compile_pdf("#foo(")
+    with pytest.raises(TypstCompileError, match="unclosed delimiter"):
+        compile_pdf("#foo(")
+    mock.assert_called_once()
+    with (
+        patch("src.typst_compiler.time.monotonic", return_value=1e12),
+        patch("src.typst_compiler.typst.compile", return_value=b"%PDF"),
+    ):
+        assert compile_pdf("#foo(") == b"%PDF"
+
+
+def test_compile_pdf_retries_network_failures(fresh_cache):
+    error = RuntimeError("failed to download package (network error)")
+    with (
+        patch("src.typst_compiler.typst.compile", side_effect=error),
+        pytest.raises(TypstCompileError, match="download"),
+    ):
+        compile_pdf('#import "@preview/basic-resume:0.2.8": *')
+    with patch("src.typst_compiler.typst.compile", return_value=b"%PDF"):
+        assert compile_pdf('#import "@preview/basic-resume:0.2.8": *') == b"%PDF"
+
+
+def test_cache_evicts_least_recently_used_over_byte_cap():
+    cache = CompileCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    cache.get("a")
+    cache.put("c", b"1234")
+    assert cache.get("a") == b"1234"
+    assert cache.get("b") is None
+    assert cache.size == 8
+
+
+def test_cache_skips_values_larger_than_cap():
+    cache = CompileCache(max_bytes=3)
+    cache.put("a", b"1234")
+    assert cache.get("a") is None
+
+
+def test_compile_pages_reuses_unchanged_pages(fresh_cache):
+    with patch(
+        "src.typst_compiler.typst.compile",
+        side_effect=[[b"page-1", b"page-2"], [b"page-1", b"page-2 edited"]],
+    ) as mock:
+        first = compile_pages("= v1")
+        again = compile_pages("= v1")
+        second = compile_pages("= v2")
+    assert mock.call_count == 2
+    assert again == first
+    assert second[0] is first[0]
+    assert second[1] == b"page-2 edited"
+
+
+def test_compile_pages_wraps_single_page_output(fresh_cache):
+    with patch("src.typst_compiler.typst.compile", return_value=b"only-page"):
+        assert compile_pages("= one page") == [b"only-page"]
@@ -0,0 +1,77 @@
+from src.typst_sections import (
+    Change,
+    changed_ratio,
+    diff_sections,
+    split_entries,
+    split_sections,
+)
+
+_RESUME = """#import "@preview/basic-resume:0.2.9": *
+#show: resume.with(author: "Jane Doe")
+
+== Experience
+#work(
+  title: "Engineer",
+  company: "Acme",
+)
+- Built Python services
+
+#work(title: "Intern", company: "Initech")
+- Wrote SQL reports
+
+== Skills
+- Python, SQL
+"""
+
+
+def test_split_sections_at_headings_with_preamble_first():
+    sections = split_sections(_RESUME)
+    assert [s.title for s in sections] == ["", "Experience", "Skills"]
+    assert sections[1].source.startswith("== Experience\n#work(")
+    assert "".join(s.source + "\n" for s in sections) == _RESUME
+
+
+def test_split_entries_keeps_bullets_with_their_entry():
+    entries = split_entries(split_sections(_RESUME)[1])
+    assert entries[0] == "== Experience"
+    assert entries[1].startswith('#work(\n  title: "Engineer"')
+    assert entries[1].endswith("- Built Python services")
+    assert entries[2].endswith("- Wrote SQL reports")
+
+
+def test_diff_sections_reports_only_edited_entries():
+    edited = _RESUME.replace("Wrote SQL reports", "Wrote SQL and dbt reports")
+    assert diff_sections(_RESUME, edited) == [
+        Change(
+            section="Experience",
+            before='#work(title: "Intern", company: "Initech")\n- Wrote SQL reports',
+            after='#work(title: "Intern", company: "Initech")\n- Wrote SQL and dbt reports',
+        )
+    ]
+    assert diff_sections(_RESUME, _RESUME) == []
+
+
+def test_diff_sections_reports_added_and_removed_sections():
+    edited = _RESUME.replace("== Skills\n- Python, SQL\n", "== Languages\n- French\n")
+    changes = diff_sections(_RESUME, edited)
+    assert [(c.section, bool(c.before), bool(c.after)) for c in changes] == [
+        ("Languages", False, True),
+        ("Skills", True, False),
+    ]
+
+
+def test_change_prompt_is_a_line_diff_with_context():
+    change = Change("Skills", "== Skills\n- Python", "== Skills\n- Python, Go")
+    assert change.to_prompt() == (
+        "SECTION: Skills\n  == Skills\n- - Python\n+ - Python, Go"
+    )
+
+
+def test_changed_ratio_is_the_share_of_edited_entries():
+    edited = _RESUME.replace("Wrote SQL reports", "Wrote SQL and dbt reports")
+    ratio = changed_ratio(diff_sections(_RESUME, edited), _RESUME, edited)
+    assert 0.1 < ratio < 0.3
+
+
+def test_split_sections_is_cached_by_content():
+    assert split_sections(_RESUME) is split_sections(str(_RESUME))
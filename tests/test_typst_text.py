@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from src.typst_text import reduce_typst, savings_report
+
+_SOURCE = """#import "@preview/basic-resume:0.2.9": *
+#set text(size: 10pt)
+
+#let name = "Jane Roe"
+#let email = "jane@example.com"
+
+#show: resume.with(
+  author: name,
+  email: email,
+  accent-color: "#26428b",
+  font: "New Computer Modern",
+  author-position: left,
+)
+
+// Drafts below
+== Experience
+
+#work(
+  title: "Engineer",
+  company: "Acme",
+  dates: dates-helper(start-date: "May 2022", end-date: "Present"),
+)
+- Cut *latency* by 40% for \\$2M+ of _trades_, see #link("https://acme.com")[Acme] /* hidden */
+*Tools*: Git, Docker \\
+"""
+
+
+def test_reduce_typst_keeps_content_and_structure():
+    assert reduce_typst(_SOURCE) == (
+        "Jane Roe | jane@example.com\n"
+        "\n"
+        "== Experience\n"
+        "\n"
+        "Engineer | Acme | May 2022 - Present\n"
+        "- Cut latency by 40% for $2M+ of trades, see Acme\n"
+        "Tools: Git, Docker\n"
+    )
+
+
+def test_reduce_typst_is_cached_by_content():
+    assert reduce_typst(_SOURCE) is reduce_typst(_SOURCE)
+
+
+def test_examples_shrink_and_keep_their_text():
+    paths = sorted(Path("data/examples").glob("*.typ"))
+    rows = savings_report(paths)
+    assert [row["resume"] for row in rows] == [path.name for path in paths]
+    for row, path in zip(rows, paths):
+        assert row["text_tokens"] < row["typst_tokens"]
+        assert row["saved_pct"] > 15
+        reduced = reduce_typst(path.read_text(encoding="utf-8"))
+        assert "#" not in reduced.replace("C#", "")
+        assert "== Education" in reduced